@@ -1,4 +1,8 @@
 def __getattr__(name):
+    if name.startswith("__"):
+        # Avoid loading the whole app for module introspection.
+        raise AttributeError(name)
+
     from .main import patchday
 
     return getattr(patchday, name)
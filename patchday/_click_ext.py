@@ -11,7 +11,7 @@ def schedule_option(**kwargs):
 
 class DeliveryMethodChoice(Choice):
     def __init__(self):
-        from patchday.types import DeliveryMethod
+        from patchday.constants import DeliveryMethod
 
         super().__init__([x.value for x in DeliveryMethod], case_sensitive=False)
 
@@ -39,14 +39,34 @@ def expiration_option(**kwargs):
     )
 
 
+def recurrence_option(**kwargs):
+    def callback(ctx, param, value):
+        if value is None:
+            return None
+
+        from patchday.recurrence import parse_recurrence
+
+        try:
+            return parse_recurrence(value)
+        except ValueError as err:
+            raise click.BadParameter(f"{err}", param=param)
+
+    if "help" not in kwargs:
+        kwargs["help"] = "calendar rule instead of the expiration, e.g. 'mon/thu 9am'"
+
+    return option("--recurrence", "-r", callback=callback, **kwargs)
+
+
 def quantity_option(**kwargs):
     def callback(ctx, param, value):
         if value is None:
             return None
 
-        from patchday.types import DeliveryMethod, validate_quantity
+        from patchday.constants import DeliveryMethod
+        from patchday.main import patchday
+        from patchday.types import validate_quantity
 
-        int_value = validate_quantity(value)
+        int_value = validate_quantity(value, max_quantity=patchday.max_quantity)
         delivery_method = ctx.params.get("delivery_method")
         if int_value != 1 and delivery_method != DeliveryMethod.PATCH:
             raise click.BadOptionUsage(
@@ -68,12 +88,13 @@ def quantity_option(**kwargs):
 
 
 def prompt_for_quantity() -> int:
+    from patchday.main import patchday
     from patchday.types import validate_quantity
 
     value = click.prompt("Enter the number of patches you use")
     while True:
         try:
-            return validate_quantity(value)
+            return validate_quantity(value, max_quantity=patchday.max_quantity)
         except Exception as err:
             click.echo(f"Invalid quantity '{value}'. Problem: {err}")
             value = click.prompt("Enter the number of patches you use")
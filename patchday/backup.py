@@ -0,0 +1,325 @@
+import hashlib
+import json
+import zlib
+from datetime import datetime
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+from zoneinfo import ZoneInfo
+
+from patchday.clock import get_clock
+from patchday.exceptions import PatchDayException, ReadOnlyStorageError
+from patchday.history import HISTORY_DIR, LOCK_FILE
+from patchday.storage import LOG_SUFFIX, file_lock, write_atomic
+
+if TYPE_CHECKING:
+    from patchday.storage import PatchData
+
+# Where snapshots live, inside the storage directory.
+SNAPSHOTS_DIR = ".snapshots"
+
+# Files are split into chunks of this size so a change to one part of a
+# large file only stores the chunks that changed.
+CHUNK_SIZE = 64 * 1024
+
+
+class SnapshotNotFoundError(PatchDayException):
+    def __init__(self, at: datetime | None = None) -> None:
+        when = f" at or before {at.isoformat()}" if at else ""
+        super().__init__(f"No snapshot{when}.")
+
+
+class Snapshot(NamedTuple):
+    """
+    A point-in-time copy of every storage key.
+    """
+
+    snapshot_id: str
+    """
+    The ID of the snapshot, sortable by creation time.
+    """
+
+    created: float
+    """
+    The epoch time the snapshot was taken.
+    """
+
+    files: dict[str, dict]
+    """
+    Storage key -> ``{"size", "chunks", "stat"}``. Application history
+    files are included by their path, such as ``history/hot.0.jsonl``.
+    """
+
+    @property
+    def created_date(self) -> datetime:
+        return datetime.fromtimestamp(self.created)
+
+    @property
+    def size(self) -> int:
+        return sum(f["size"] for f in self.files.values())
+
+
+class RetentionPolicy(NamedTuple):
+    """
+    Which snapshots to keep when pruning.
+    """
+
+    keep_last: int = 10
+    """
+    The number of most recent snapshots to keep.
+    """
+
+    keep_daily: int = 7
+    """
+    The number of days to keep the newest snapshot of.
+    """
+
+    keep_weekly: int = 4
+    """
+    The number of weeks to keep the newest snapshot of.
+    """
+
+    def select(self, snapshots: list[Snapshot]) -> set[str]:
+        """
+        The IDs of the snapshots to keep.
+        """
+        newest_first = sorted(snapshots, key=lambda s: s.created, reverse=True)
+        keep = {s.snapshot_id for s in newest_first[: self.keep_last]}
+        for count, period in (
+            (self.keep_daily, lambda d: d.date()),
+            (self.keep_weekly, lambda d: d.isocalendar()[:2]),
+        ):
+            seen: set = set()
+            for snapshot in newest_first:
+                if len(seen) >= count:
+                    break
+
+                elif (key := period(snapshot.created_date)) not in seen:
+                    seen.add(key)
+                    keep.add(snapshot.snapshot_id)
+
+        return keep
+
+
+def _is_history_file(key: str) -> bool:
+    return key.startswith(f"{HISTORY_DIR}/")
+
+
+class Backups:
+    """
+    Snapshots of the storage directory. File contents are split into
+    chunks stored by their hash, so a snapshot only adds the chunks that
+    changed and unchanged files are not even read again.
+    """
+
+    def __init__(
+        self, patchdata: "PatchData", retention: RetentionPolicy | None = None
+    ):
+        self.patchdata = patchdata
+        self.retention = retention or RetentionPolicy()
+
+    @cached_property
+    def root(self) -> Path:
+        return self.patchdata.path / SNAPSHOTS_DIR
+
+    @property
+    def _manifests(self) -> Path:
+        return self.root / "snapshots"
+
+    @property
+    def _objects(self) -> Path:
+        return self.root / "objects"
+
+    def snapshots(self) -> list[Snapshot]:
+        """
+        Every snapshot, oldest first.
+        """
+        if not self._manifests.is_dir():
+            return []
+
+        return sorted(
+            (self._load(path) for path in self._manifests.glob("*.json")),
+            key=lambda s: s.created,
+        )
+
+    def find(self, at: datetime | None = None) -> Snapshot:
+        """
+        The newest snapshot taken at or before the given time.
+        """
+        snapshots = self.snapshots()
+        if at is not None:
+            timestamp = at.timestamp()
+            snapshots = [s for s in snapshots if s.created <= timestamp]
+
+        if not snapshots:
+            raise SnapshotNotFoundError(at)
+
+        return snapshots[-1]
+
+    def snapshot(self) -> Snapshot:
+        """
+        Take a snapshot of every storage key.
+        """
+        self._check_writable()
+        previous = self.snapshots()
+        last_files = previous[-1].files if previous else {}
+        files = {}
+        for key, path in self._iter_keys():
+            if not _is_history_file(key) and path.with_suffix(LOG_SUFFIX).is_file():
+                # Fold appended records in, so the file holds all of them.
+                self.patchdata.open(key).compact()
+
+            stat = path.stat()
+            stat_token = [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+            if (last := last_files.get(key)) and last.get("stat") == stat_token:
+                # Unchanged since the last snapshot.
+                files[key] = last
+                continue
+
+            content = path.read_bytes()
+            chunks = [
+                self._put_chunk(content[idx : idx + CHUNK_SIZE])
+                for idx in range(0, len(content), CHUNK_SIZE)
+            ]
+            files[key] = {"size": len(content), "chunks": chunks, "stat": stat_token}
+
+        now = get_clock().now().astimezone(ZoneInfo("UTC"))
+        snapshot = Snapshot(
+            snapshot_id=now.strftime("%Y%m%dT%H%M%S%fZ"),
+            created=now.timestamp(),
+            files=files,
+        )
+        manifest = json.dumps(snapshot._asdict()).encode("utf-8")
+        write_atomic(self._manifests / f"{snapshot.snapshot_id}.json", manifest)
+        return snapshot
+
+    def prune(self) -> list[str]:
+        """
+        Delete the snapshots the retention policy does not keep, and any
+        chunks no remaining snapshot uses.
+
+        Returns:
+            list[str]: The IDs of the deleted snapshots.
+        """
+        self._check_writable()
+        snapshots = self.snapshots()
+        keep = self.retention.select(snapshots)
+        removed = []
+        used: set[str] = set()
+        for snapshot in snapshots:
+            if snapshot.snapshot_id in keep:
+                for file in snapshot.files.values():
+                    used.update(file["chunks"])
+            else:
+                (self._manifests / f"{snapshot.snapshot_id}.json").unlink()
+                removed.append(snapshot.snapshot_id)
+
+        if removed and self._objects.is_dir():
+            for path in self._objects.glob("*/*"):
+                if path.name not in used:
+                    path.unlink()
+
+        return removed
+
+    def read(self, snapshot: Snapshot, key: str) -> bytes:
+        """
+        The content a storage key had when the snapshot was taken.
+        """
+        if (file := snapshot.files.get(key)) is None:
+            raise KeyError(f"Snapshot '{snapshot.snapshot_id}' has no key '{key}'.")
+
+        return b"".join(
+            zlib.decompress(self._chunk_path(h).read_bytes()) for h in file["chunks"]
+        )
+
+    def restore(
+        self, at: datetime | None = None, keys: list[str] | None = None
+    ) -> Snapshot:
+        """
+        Restore storage from the newest snapshot taken at or before ``at``.
+
+        Args:
+            at (datetime | None): The point in time. Defaults to the latest
+              snapshot.
+            keys (list[str] | None): Only restore these keys. By default,
+              everything is restored and keys created since are removed.
+
+        Returns:
+            Snapshot: The snapshot restored from.
+        """
+        self._check_writable()
+        snapshot = self.find(at)
+        if keys is None:
+            # Keys created since are removed.
+            restore_keys = [
+                *snapshot.files,
+                *(k for k, _ in self._iter_keys() if k not in snapshot.files),
+            ]
+
+        else:
+            restore_keys = keys
+
+        history_keys = [k for k in restore_keys if _is_history_file(k)]
+        for key in restore_keys:
+            if _is_history_file(key):
+                continue
+
+            db = self.patchdata.open(key)
+            if key in snapshot.files:
+                db.persist_raw(json.loads(self.read(snapshot, key)))
+            else:
+                db.delete()
+
+        if history_keys:
+            self._restore_history(snapshot, history_keys)
+
+        return snapshot
+
+    def _restore_history(self, snapshot: Snapshot, keys: list[str]):
+        # Written as files, under the lock that takes and compaction use.
+        base = self.patchdata.path
+        with file_lock(base / HISTORY_DIR / LOCK_FILE):
+            for key in keys:
+                if key in snapshot.files:
+                    write_atomic(base / key, self.read(snapshot, key))
+                else:
+                    (base / key).unlink(missing_ok=True)
+
+    def _iter_keys(self):
+        base = self.patchdata.path
+        if not base.is_dir():
+            return
+
+        for path in sorted(base.rglob("*.json")):
+            relative = path.relative_to(base)
+            if relative.parts[0] in (SNAPSHOTS_DIR, HISTORY_DIR) or (
+                path.name.startswith(".")
+            ):
+                continue
+
+            yield relative.with_suffix("").as_posix(), path
+
+        # Segments never change, so after the first snapshot they cost a stat.
+        history = base / HISTORY_DIR
+        if history.is_dir():
+            for path in sorted(history.iterdir()):
+                if path.is_file() and not path.name.startswith("."):
+                    yield path.relative_to(base).as_posix(), path
+
+    def _put_chunk(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+        if not path.is_file():
+            write_atomic(path, zlib.compress(data))
+
+        return digest
+
+    def _chunk_path(self, digest: str) -> Path:
+        return self._objects / digest[:2] / digest
+
+    def _load(self, path: Path) -> Snapshot:
+        return Snapshot(**json.loads(path.read_text()))
+
+    def _check_writable(self):
+        if self.patchdata.read_only:
+            raise ReadOnlyStorageError(SNAPSHOTS_DIR)
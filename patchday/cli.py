@@ -1,34 +1,67 @@
+import signal
 import sys
 
 import click
 from typing import TYPE_CHECKING
 
-
-import patchday
 from patchday._click_ext import (
     expiration_option,
     delivery_method_option,
     quantity_option,
     prompt_for_quantity,
+    recurrence_option,
     schedule_option,
 )
 from patchday.date import format_date
 from patchday.exceptions import ScheduleNotExistsError
-from patchday.tui import launch_app
+from patchday.status import STATUS_FORMATS
 
 if TYPE_CHECKING:
+    from patchday.recurrence import RecurrenceRule
     from patchday.types import DeliveryMethod
 
 
 @click.group(invoke_without_command=True)
+@click.option("--profile", is_flag=True, help="print storage metrics when done")
 @click.pass_context
-def app(ctx):
+def app(ctx, profile):
+    if profile:
+        ctx.call_on_close(_print_profile)
+
     if sys.argv[1:]:
         return
 
+    # NOTE: Textual is slow to import; only load it when launching the TUI.
+    from patchday.tui import launch_app
+
     launch_app()
 
 
+def _print_profile():
+    from patchday.main import patchday
+
+    click.echo(patchday.metrics.format_summary(), err=True)
+
+
+@app.command()
+@click.option(
+    "--format",
+    "-f",
+    "output_format",
+    type=click.Choice(STATUS_FORMATS),
+    default="short",
+    help="short for prompts, long for every schedule, or json",
+)
+def status(output_format):
+    """
+    show what is due next
+    """
+    from patchday.status import get_status
+
+    if text := get_status(output_format=output_format):
+        click.echo(text)
+
+
 @app.group()
 def hormones():
     """
@@ -36,6 +69,45 @@ def hormones():
     """
 
 
+@hormones.command()
+@schedule_option(multiple=True, help="only this schedule; repeat for several")
+@click.option("--all-expired", is_flag=True, help="take everything that is due")
+@click.option(
+    "--at",
+    type=click.DateTime(),
+    help="when they were taken; defaults to now",
+)
+def take(schedule_id, all_expired, at):
+    """
+    take the next hormone, or all expired ones
+    """
+    from patchday.main import patchday
+
+    if not all_expired and len(schedule_id) != 1:
+        raise click.UsageError("Give one --schedule-id, or use --all-expired.")
+
+    try:
+        if all_expired:
+            taken = patchday.schedules.take_expired(
+                schedule_ids=list(schedule_id) or None, date=at
+            )
+        else:
+            schedule = patchday.schedules.get(schedule_id[0])
+            if schedule is None:
+                raise ScheduleNotExistsError(schedule_id[0])
+
+            next_id = schedule.next_expired_hormone.hormone_id
+            taken = {schedule.schedule_id: schedule.take([next_id], date=at)}
+    except ScheduleNotExistsError as err:
+        raise click.UsageError(f"{err}")
+
+    if not taken:
+        click.echo("Nothing is due.")
+
+    for taken_id, applications in taken.items():
+        click.echo(f"Took {len(applications)} from '{taken_id}'.")
+
+
 @app.group()
 def sites():
     """
@@ -61,13 +133,25 @@ def _list():
 
 
 def _list_schedules():
-    for sched in list(patchday.schedules):
-        if exp_date := sched.next_expired_hormone.expiration_date:
+    from patchday.main import patchday
+
+    # NOTE: Reads the summary and inventory files so listing does not
+    #   validate every model.
+    supplies = {s.schedule_id: s for s in patchday.inventory.load()}
+    for summary in patchday.summary.load():
+        if exp_date := summary.next_expiration_date:
             suffix = format_date(exp_date)
         else:
             suffix = "not taken yet"
 
-        click.echo(f"{sched.delivery_method.value} - {suffix}")
+        if supply := supplies.get(summary.schedule_id):
+            suffix = f"{suffix} - {supply.stock} left"
+            if runs_out := supply.runs_out_date:
+                suffix = f"{suffix}, runs out {format_date(runs_out)}"
+            if supply.is_low():
+                suffix = f"{suffix} (low)"
+
+        click.echo(f"{summary.delivery_method} - {suffix}")
 
 
 @schedule.command()
@@ -75,17 +159,19 @@ def _list_schedules():
 @delivery_method_option(prompt=True)
 @expiration_option(prompt=True, default="3d12h")
 @quantity_option()
+@recurrence_option()
 def create(
     schedule_id: str,
     delivery_method: "DeliveryMethod",
     expiration: int,
     quantity: int | None,
+    recurrence: "RecurrenceRule | None",
 ):
     """
     make a schedule
     """
+    from patchday.constants import DeliveryMethod
     from patchday.main import patchday
-    from patchday.types import DeliveryMethod
 
     if delivery_method is DeliveryMethod.PATCH and quantity is None:
         # Only prompt for the quantity if the delivery method is 'patches'
@@ -97,6 +183,7 @@ def create(
         "expiration": expiration,
         "schedule_id": schedule_id,
         "quantity": quantity,
+        "recurrence": recurrence,
     }
 
     click.echo("Creating a schedule with:")
@@ -106,6 +193,9 @@ def create(
     if delivery_method is DeliveryMethod.PATCH:
         click.echo(f"\tnumber of patches: {quantity}")
 
+    if recurrence is not None:
+        click.echo(f"\trecurrence: {recurrence}")
+
 
 @schedule.command()
 @click.argument("schedule_id", required=False)
@@ -113,9 +203,175 @@ def remove(schedule_id):
     """
     delete a schedule
     """
+    from patchday.main import patchday
+
     try:
         patchday.schedules.remove_schedule(schedule_id)
     except ScheduleNotExistsError as err:
         raise click.UsageError(f"{err}")
 
     click.echo(f"Successfully remove schedule '{schedule_id}'")
+
+
+@schedule.command()
+@click.argument("schedule_id")
+@click.argument("amount", type=click.IntRange(min=0))
+@click.option("--set", "replace", is_flag=True, help="set the stock instead of adding")
+@click.option(
+    "--alert-days", type=click.IntRange(min=0), help="warn this many days ahead"
+)
+def refill(schedule_id, amount, replace, alert_days):
+    """
+    record new supplies
+    """
+    from patchday.main import patchday
+
+    try:
+        schedule = patchday.schedules[schedule_id]
+    except KeyError:
+        raise click.UsageError(f"No such schedule: {schedule_id}")
+
+    supply = patchday.inventory.refill(
+        schedule, amount, replace=replace, alert_days=alert_days
+    )
+    message = f"'{schedule_id}' has {supply.stock} left"
+    if runs_out := supply.runs_out_date:
+        message = f"{message}, running out {format_date(runs_out)}"
+
+    click.echo(f"{message}.")
+
+
+@app.command()
+@click.option(
+    "--socket",
+    "socket_path",
+    is_flag=False,
+    flag_value="",
+    type=click.Path(dir_okay=False),
+    help="where to listen; defaults to pday.sock in the storage directory",
+)
+def serve(socket_path):
+    """
+    keep patchday loaded for faster commands
+    """
+    from pathlib import Path
+
+    from patchday.daemon import Daemon
+
+    daemon = Daemon(Path(socket_path) if socket_path else None)
+    try:
+        daemon.start()
+    except RuntimeError as err:
+        raise click.UsageError(f"{err}")
+
+    click.echo(f"Listening on '{daemon.path}'.")
+    # Stop cleanly, removing the socket, when a service manager stops it.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+@app.command()
+def undo():
+    """
+    undo the last take or schedule change
+    """
+    _move_journal("undo")
+
+
+@app.command()
+def redo():
+    """
+    redo the last undone change
+    """
+    _move_journal("redo")
+
+
+def _move_journal(direction: str):
+    from patchday.journal import describe_entry
+    from patchday.main import patchday
+
+    if entry := getattr(patchday.journal, direction)():
+        click.echo(f"{direction.capitalize()}: {describe_entry(entry)}")
+    else:
+        click.echo(f"Nothing to {direction}.")
+
+
+@app.command()
+@click.option("--list", "list_snapshots", is_flag=True, help="list the snapshots")
+def backup(list_snapshots):
+    """
+    snapshot the stored data
+    """
+    from patchday.main import patchday
+
+    if list_snapshots:
+        for snapshot in patchday.backups.snapshots():
+            date = format_date(snapshot.created_date)
+            click.echo(f"{snapshot.snapshot_id} - {date} ({snapshot.size} bytes)")
+
+        return
+
+    snapshot = patchday.backups.snapshot()
+    patchday.backups.prune()
+    click.echo(f"Created snapshot '{snapshot.snapshot_id}'")
+
+
+@app.command()
+@click.option("--at", help="ISO date or time to restore to; defaults to the latest")
+@click.option("--key", "keys", multiple=True, help="only restore this storage key")
+def restore(at, keys):
+    """
+    restore stored data from a snapshot
+    """
+    from datetime import datetime
+
+    from patchday.backup import SnapshotNotFoundError
+    from patchday.main import patchday
+
+    try:
+        when = datetime.fromisoformat(at) if at else None
+    except ValueError as err:
+        raise click.BadParameter(f"{err}", param_hint="--at")
+
+    try:
+        snapshot = patchday.backups.restore(at=when, keys=list(keys) or None)
+    except (SnapshotNotFoundError, KeyError) as err:
+        raise click.UsageError(f"{err}")
+
+    click.echo(f"Restored snapshot '{snapshot.snapshot_id}'")
+
+
+@app.group()
+def maintenance():
+    """
+    fix up stored data
+    """
+
+
+@maintenance.command()
+def repair():
+    """
+    store fixes that reads only make in memory
+    """
+    from patchday.main import patchday
+
+    if repaired := patchday.schedules.repair(all_schedules=True):
+        for schedule_id in repaired:
+            click.echo(f"Repaired schedule '{schedule_id}'")
+
+    else:
+        click.echo("Nothing to repair.")
+
+
+@maintenance.command()
+def compact():
+    """
+    compress old application history
+    """
+    from patchday.main import patchday
+
+    moved = patchday.history.compact()
+    click.echo(f"Compacted {moved} application(s).")
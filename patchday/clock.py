@@ -0,0 +1,92 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+
+
+class Clock:
+    """
+    The source of the current time. Everything that asks "what time is it"
+    goes through :func:`now` so simulations and tests can replace it.
+    """
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def time(self) -> float:
+        return self.now().timestamp()
+
+
+class SystemClock(Clock):
+    """
+    The wall clock.
+    """
+
+
+class ManualClock(Clock):
+    """
+    A clock that only moves when told to.
+    """
+
+    def __init__(self, start: datetime | None = None):
+        self._now = start or datetime.now()
+
+    def now(self) -> datetime:
+        return self._now
+
+    def set(self, date: datetime):
+        self._now = date
+
+    def advance(self, delta: timedelta | float):
+        """
+        Move the clock forward by a duration or a number of seconds.
+        """
+        if not isinstance(delta, timedelta):
+            delta = timedelta(seconds=delta)
+
+        self._now += delta
+
+
+_SYSTEM_CLOCK = SystemClock()
+
+# The clock for this context, e.g. a simulation on another thread.
+_clock: ContextVar[Clock | None] = ContextVar("patchday_clock", default=None)
+
+# The clock used when none is set in the context.
+_default_clock: Clock = _SYSTEM_CLOCK
+
+
+def get_clock() -> Clock:
+    return _clock.get() or _default_clock
+
+
+def set_clock(clock: Clock | None) -> Clock:
+    """
+    Set the process-wide clock, or restore the system clock with ``None``.
+
+    Returns:
+        :class:`Clock`: The previous clock.
+    """
+    global _default_clock
+    previous = _default_clock
+    _default_clock = clock or _SYSTEM_CLOCK
+    return previous
+
+
+@contextmanager
+def use_clock(clock: Clock) -> Iterator[Clock]:
+    """
+    Use a clock in this context only, e.g. for one simulation.
+    """
+    token = _clock.set(clock)
+    try:
+        yield clock
+    finally:
+        _clock.reset(token)
+
+
+def now() -> datetime:
+    """
+    The current time according to the clock in use.
+    """
+    return (_clock.get() or _default_clock).now()
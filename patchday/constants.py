@@ -1 +1,19 @@
+from enum import Enum
+
+# Default policy limits. Pass `None` to `PatchDay` to remove them.
 MAX_QUANTITY = 10
+MAX_SCHEDULES = 10
+
+
+class DeliveryMethod(str, Enum):
+    PATCH = "PATCH"
+    INJECTION = "INJECTION"
+    PILL = "PILL"
+    GEL = "GEL"
+
+    @property
+    def plural_name(self) -> str:
+        if self is DeliveryMethod.PATCH:
+            return "patches"
+
+        return f"{self.lower()}s"
@@ -0,0 +1,219 @@
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from patchday.storage import DEFAULT_STORAGE_PATH
+
+# NOTE: The `pday` console script imports this module before forwarding a
+#   command, so like `patchday.status` it must never import click, pydantic,
+#   Textual or FastAPI. The daemon imports the CLI when it starts.
+
+# Set to a path to use a different socket, e.g. one per storage directory.
+SOCKET_ENV = "PATCHDAY_SOCKET"
+
+# Settings read from the environment. Commands only run in the daemon when
+# the client's match the daemon's, e.g. never with a read-only client.
+ENV_PREFIX = "PATCHDAY_"
+
+# How long the client waits for the daemon to answer.
+CLIENT_TIMEOUT = 30.0
+
+# Commands that never prompt, so they can run without a terminal. Groups
+# are listed with each subcommand; bare groups only when run on their own.
+FORWARDED_COMMANDS = frozenset(
+    (
+        "hormones take",
+        "schedule",
+        "schedule list",
+        "schedule refill",
+        "schedule remove",
+    )
+)
+FORWARDED_LEAF_COMMANDS = frozenset(("status", "undo", "redo"))
+
+
+def get_socket_path() -> Path:
+    if value := os.environ.get(SOCKET_ENV):
+        return Path(value)
+
+    return DEFAULT_STORAGE_PATH / "pday.sock"
+
+
+def get_env() -> dict[str, str]:
+    """
+    The environment variables a command's behavior depends on. Forwarded
+    commands never take paths, so the working directory does not matter.
+    """
+    return {
+        name: value
+        for name, value in os.environ.items()
+        if name.startswith(ENV_PREFIX) and name != SOCKET_ENV
+    }
+
+
+def is_forwarded(args: list[str]) -> bool:
+    """
+    True if the daemon can run the command.
+    """
+    if args and args[0] in FORWARDED_LEAF_COMMANDS:
+        return True
+
+    return " ".join(args[:2]) in FORWARDED_COMMANDS
+
+
+def forward(args: list[str], path: Path | None = None) -> dict | None:
+    """
+    Run a command in the daemon.
+
+    Args:
+        args (list[str]): The arguments after ``pday``.
+        path (Path | None): The socket. Defaults to :func:`get_socket_path`.
+
+    Returns:
+        dict | None: The ``code``, ``stdout`` and ``stderr``, or ``None``
+        when no daemon is running, it does not answer or it refuses to run
+        the command with this process's environment.
+    """
+    path = path or get_socket_path()
+    request = json.dumps({"args": args, "env": get_env()}).encode() + b"\n"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(CLIENT_TIMEOUT)
+        try:
+            client.connect(str(path))
+            client.sendall(request)
+            client.shutdown(socket.SHUT_WR)
+            with client.makefile("rb") as reader:
+                response = json.loads(reader.readline())
+        except (OSError, ValueError):
+            # Gone, stuck or not a daemon; the command runs in this process.
+            return None
+
+    return response if isinstance(response, dict) else None
+
+
+def _is_listening(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(str(path))
+        except OSError:
+            return False
+
+    return True
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_Server"
+
+    def handle(self):
+        if not (line := self.rfile.readline()):
+            # Only checking that the daemon is listening.
+            return
+
+        request = json.loads(line)
+        response = self.server.daemon.run_command(
+            request["args"], env=request.get("env", {})
+        )
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: Path, daemon: "Daemon"):
+        self.daemon = daemon
+        super().__init__(str(path), _Handler)
+
+
+class Daemon:
+    """
+    Keeps ``patchday`` loaded and answers CLI commands over a Unix socket,
+    so repeated commands skip importing and loading everything again.
+    Stored data is re-read only when it changes, like in any process.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or get_socket_path()
+        self.env = get_env()
+        self._lock = threading.Lock()
+        self._server: _Server | None = None
+
+    def start(self):
+        """
+        Warm up and listen, without serving yet.
+        """
+        if _is_listening(self.path):
+            raise RuntimeError(f"A daemon is already listening on '{self.path}'.")
+
+        # Not answering, so left over from a daemon that did not stop cleanly.
+        self.path.unlink(missing_ok=True)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        from patchday.cli import app
+        from patchday.main import patchday
+
+        self._app = app
+        patchday.schedules.get_schedules()
+        patchday.summary.load()
+        self._server = _Server(self.path, self)
+
+    def serve_forever(self):
+        if self._server is None:
+            self.start()
+
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self.path.unlink(missing_ok=True)
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+    def run_command(
+        self, args: list[str], env: dict[str, str] | None = None
+    ) -> dict | None:
+        """
+        Run a command as if it was run in a shell.
+
+        Args:
+            args (list[str]): The arguments after ``pday``.
+            env (dict[str, str] | None): The client's :func:`get_env`.
+              Defaults to the daemon's own.
+
+        Returns:
+            dict | None: The ``code``, ``stdout`` and ``stderr``, or ``None``
+            if the client's environment differs from the daemon's, so the
+            client runs the command itself.
+        """
+        if env is not None and env != self.env:
+            return None
+
+        elif not is_forwarded(args):
+            return {"code": 2, "stdout": "", "stderr": f"Cannot forward {args}.\n"}
+
+        stdout, stderr = StringIO(), StringIO()
+        # NOTE: Commands read `sys.argv` and print to the process's streams,
+        #   so they run one at a time.
+        with self._lock, redirect_stdout(stdout), redirect_stderr(stderr):
+            argv, sys.argv = sys.argv, ["pday", *args]
+            try:
+                self._app.main(args, prog_name="pday")
+                code = 0
+            except SystemExit as err:
+                code = err.code if isinstance(err.code, int) else int(bool(err.code))
+            except Exception as err:  # noqa: BLE001
+                # A failing command must not take the daemon down with it,
+                # so anything it raises is reported like the CLI would.
+                print(f"Error: {err}", file=sys.stderr)
+                code = 1
+            finally:
+                sys.argv = argv
+
+        return {"code": code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
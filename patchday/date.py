@@ -1,6 +1,8 @@
 import re
 from datetime import datetime
 
+from patchday.clock import get_clock
+
 DURATION_PATTERN = re.compile(r"(\d+)([dhmsw])")
 MINUTE = 60
 HOUR = 3600
@@ -104,8 +106,7 @@ def format_date(date: datetime) -> str:
     Returns:
         str: The formatted date.
     """
-    now = datetime.now()
-    delta = date - now
+    delta = date - get_clock().now()
     seconds = int(delta.total_seconds())
 
     if abs(seconds) < 60:
@@ -134,3 +135,17 @@ def format_date(date: datetime) -> str:
     )
     formatted_date = date.strftime(f"%A, %B {date.day}{suffix} %I:%M %p")
     return formatted_date.lstrip("0").replace(" 0", " ")
+
+
+def to_local(date: datetime) -> datetime:
+    """
+    Convert a date with a time zone to naive local time, which is how dates
+    are stored and compared. Naive dates are returned as they are.
+
+    Args:
+        date: The date to convert.
+
+    Returns:
+        datetime: The naive local date.
+    """
+    return date.astimezone().replace(tzinfo=None) if date.tzinfo else date
@@ -0,0 +1,294 @@
+import asyncio
+import threading
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Iterator
+from datetime import datetime
+from enum import Enum
+from itertools import count
+from typing import TYPE_CHECKING, final
+
+from pydantic import BaseModel, Field
+
+from patchday.clock import get_clock
+from patchday.types import HormoneID, ScheduleID
+
+if TYPE_CHECKING:
+    from patchday.schedule import ScheduleManager
+
+# The amount of events a subscriber may fall behind before the oldest
+# ones are dropped.
+DEFAULT_QUEUE_SIZE = 64
+
+
+class EventType(str, Enum):
+    HORMONE_TAKEN = "HORMONE_TAKEN"
+    HORMONE_EXPIRED = "HORMONE_EXPIRED"
+    SCHEDULE_CREATED = "SCHEDULE_CREATED"
+    SCHEDULE_REMOVED = "SCHEDULE_REMOVED"
+    LOW_STOCK = "LOW_STOCK"
+
+
+class Event(BaseModel):
+    """
+    Something that happened to a schedule.
+    """
+
+    event_type: EventType
+    """
+    The kind of change.
+    """
+
+    schedule_id: ScheduleID
+    """
+    The schedule the event belongs to.
+    """
+
+    hormone_id: HormoneID | None = None
+    """
+    The hormone the event is about, if any.
+    """
+
+    date: datetime = Field(default_factory=lambda: get_clock().now())
+    """
+    When the event happened.
+    """
+
+    sequence: int = 0
+    """
+    The bus-assigned ordering of the event.
+    """
+
+
+@final
+class Subscription:
+    """
+    A bounded queue of events for a single consumer. When the consumer
+    falls behind, the oldest events are dropped and counted in ``dropped``
+    so the publisher never blocks on a slow client.
+    """
+
+    def __init__(self, bus: "EventBus", maxsize: int = DEFAULT_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.closed = False
+        self._bus = bus
+        self._queue: deque[Event] = deque()
+        self._condition = threading.Condition()
+        self._wakeup: Callable[[], None] | None = None
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[Event]:
+        while (event := self.get()) is not None:
+            yield event
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    async def __aiter__(self) -> AsyncIterator[Event]:
+        while (event := await self.aget()) is not None:
+            yield event
+
+    def put(self, event: Event) -> None:
+        with self._condition:
+            if self.closed:
+                return
+
+            if len(self._queue) >= self.maxsize:
+                self._queue.popleft()
+                self.dropped += 1
+
+            self._queue.append(event)
+            self._condition.notify()
+            wakeup = self._wakeup
+
+        if wakeup is not None:
+            wakeup()
+
+    def get(self, timeout: float | None = None) -> Event | None:
+        """
+        Block until the next event arrives.
+
+        Args:
+            timeout (float | None): Seconds to wait before giving up.
+
+        Returns:
+            Event | None: The event, or ``None`` on timeout or close.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._queue or self.closed, timeout)
+            return self._queue.popleft() if self._queue else None
+
+    async def aget(self, timeout: float | None = None) -> Event | None:
+        """
+        Await the next event without holding a thread.
+
+        Args:
+            timeout (float | None): Seconds to wait before giving up.
+
+        Returns:
+            Event | None: The event, or ``None`` on timeout or close.
+        """
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        with self._condition:
+            if self._queue:
+                return self._queue.popleft()
+            elif self.closed:
+                return None
+
+            self._wakeup = lambda: loop.call_soon_threadsafe(ready.set)
+
+        try:
+            await asyncio.wait_for(ready.wait(), timeout)
+        # NOTE: Not the builtin `TimeoutError` until Python 3.11.
+        except asyncio.TimeoutError:  # noqa: UP041
+            pass
+        finally:
+            with self._condition:
+                self._wakeup = None
+
+        with self._condition:
+            return self._queue.popleft() if self._queue else None
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+            wakeup = self._wakeup
+
+        if wakeup is not None:
+            wakeup()
+
+        self._bus.unsubscribe(self)
+
+
+class EventBus:
+    """
+    In-process publish/subscribe for schedule events.
+    """
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscriptions: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._sequence = count(1)
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, maxsize: int | None = None) -> Subscription:
+        subscription = Subscription(self, maxsize=maxsize or self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(
+        self, event_type: EventType, schedule_id: ScheduleID, **kwargs
+    ) -> Event:
+        """
+        Send an event to every subscriber.
+
+        Args:
+            event_type (EventType): The kind of event.
+            schedule_id (ScheduleID): The schedule the event is about.
+            **kwargs: Additional :class:`Event` fields.
+
+        Returns:
+            Event: The published event.
+        """
+        event = Event(
+            event_type=event_type,
+            schedule_id=schedule_id,
+            sequence=next(self._sequence),
+            **kwargs,
+        )
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            subscription.put(event)
+
+        return event
+
+
+class ExpirationWatcher:
+    """
+    Publishes ``HORMONE_EXPIRED`` events when expiration dates pass.
+    It sleeps until the nearest expiration (or until a schedule changes)
+    so the cost does not depend on how many clients are listening.
+    """
+
+    def __init__(self, schedules: "ScheduleManager", bus: EventBus):
+        self.schedules = schedules
+        self.bus = bus
+        self.last_checked = get_clock().now()
+
+    def check(self, now: datetime | None = None) -> list[Event]:
+        """
+        Publish an event for every hormone that expired since the last check.
+
+        Returns:
+            list[Event]: The published events.
+        """
+        now = now or get_clock().now()
+        events = []
+        for schedule_id, hormone_id, expiration_date in self._expirations():
+            if self.last_checked < expiration_date <= now:
+                events.append(
+                    self.bus.publish(
+                        EventType.HORMONE_EXPIRED,
+                        schedule_id,
+                        hormone_id=hormone_id,
+                        date=expiration_date,
+                    )
+                )
+
+        self.last_checked = now
+        return events
+
+    def next_expiration(self) -> datetime | None:
+        upcoming = [
+            date for _, _, date in self._expirations() if date > self.last_checked
+        ]
+        return min(upcoming, default=None)
+
+    async def run(self, max_sleep: float = 3600):
+        with self.bus.subscribe() as changes:
+            while True:
+                # Storage reads are blocking; keep them off the event loop.
+                await asyncio.to_thread(self.check)
+                if next_date := await asyncio.to_thread(self.next_expiration):
+                    delay = (next_date - get_clock().now()).total_seconds()
+                    timeout = min(max(delay, 0), max_sleep)
+                else:
+                    timeout = max_sleep
+
+                # Wake up early when a schedule changes.
+                await changes.aget(timeout=timeout)
+
+    def _expirations(self) -> Iterator[tuple[ScheduleID, HormoneID, datetime]]:
+        for schedule in self.schedules:
+            for hormone in schedule.hormones:
+                if expiration_date := hormone.expiration_date:
+                    yield schedule.schedule_id, hormone.hormone_id, expiration_date
+
+
+def format_sse(event: Event) -> str:
+    """
+    Encode an event as a server-sent event frame.
+    """
+    return (
+        f"id: {event.sequence}\n"
+        f"event: {event.event_type.value}\n"
+        f"data: {event.model_dump_json()}\n\n"
+    )
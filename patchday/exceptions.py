@@ -10,9 +10,17 @@ class StorageCorruption(PatchDayException):
     """
 
     def __init__(self, storage_key: str, reason: str) -> None:
-        super().__init__(f"Storage '{storage_key}' is corrupted: {reason}'")
+        super().__init__(
+            f"Storage '{storage_key}' is corrupted: {reason}. "
+            f"Run 'pday restore --key {storage_key}' to restore it from a backup."
+        )
 
 
 class ScheduleNotExistsError(PatchDayException):
     def __init__(self, schedule_id: str) -> None:
         super().__init__(f"Schedule '{schedule_id}' does not exist.")
+
+
+class ReadOnlyStorageError(PatchDayException):
+    def __init__(self, storage_key: str) -> None:
+        super().__init__(f"Cannot write '{storage_key}': storage is read-only.")
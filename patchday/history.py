@@ -0,0 +1,329 @@
+import json
+import lzma
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime, timedelta
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from patchday.clock import get_clock
+from patchday.exceptions import ReadOnlyStorageError
+from patchday.journal import get_recording
+from patchday.models import HormoneApplication
+from patchday.storage import file_lock, write_atomic
+from patchday.tracing import span
+
+if TYPE_CHECKING:
+    from patchday.storage import PatchData
+    from patchday.types import ScheduleID
+
+# Where the application history lives, inside the storage directory.
+HISTORY_DIR = "history"
+
+# Held while changing the history, by every process sharing the directory.
+LOCK_FILE = ".lock"
+
+# Held by the one process that compacts the history on a schedule.
+COMPACTOR_LOCK_FILE = ".compactor.lock"
+
+# Applications newer than this stay in the uncompressed hot file.
+HOT_PERIOD = timedelta(days=31)
+
+# Compression for segments: codec -> (file extension, compress, decompress).
+CODECS = {
+    "lzma": ("xz", lzma.compress, lzma.decompress),
+    "zlib": ("zz", zlib.compress, zlib.decompress),
+}
+
+
+def _select(
+    applications: Iterable[HormoneApplication],
+    start: datetime | None,
+    end: datetime | None,
+    schedule_id: "ScheduleID | None",
+) -> list[HormoneApplication]:
+    result = [
+        application
+        for application in applications
+        if (not schedule_id or application.schedule_id == schedule_id)
+        and (not start or application.date >= start)
+        and (not end or application.date < end)
+    ]
+    result.sort(key=lambda a: a.date)
+    return result
+
+
+class History:
+    """
+    Every hormone application, in two tiers. New applications are appended
+    to a small uncompressed hot file. Compaction moves older ones into
+    immutable compressed segments, one or more per month, listed in an
+    index with each segment's time range and schedules so queries only
+    decompress the segments they need.
+    """
+
+    def __init__(self, patchdata: "PatchData", codec: str = "lzma"):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec '{codec}'. Choose from {list(CODECS)}.")
+
+        self.patchdata = patchdata
+        self.codec = codec
+
+    @cached_property
+    def root(self) -> Path:
+        return self.patchdata.path / HISTORY_DIR
+
+    @property
+    def compactor_lock_file(self) -> Path:
+        """
+        Lock it to be the only process compacting on a schedule.
+        """
+        return self.root / COMPACTOR_LOCK_FILE
+
+    @property
+    def _index_file(self) -> Path:
+        return self.root / "index.json"
+
+    @property
+    def segments(self) -> list[dict]:
+        """
+        The index entries of the compressed segments, oldest first.
+        """
+        return self._load_index()["segments"]
+
+    def append(self, application: HormoneApplication):
+        """
+        Record an application in the hot tier.
+        """
+        self.extend([application])
+
+    def extend(self, applications: list[HormoneApplication]):
+        """
+        Record several applications with one write. Inside a journaled
+        operation, undoing it removes them again.
+        """
+        self._check_writable()
+        if not applications:
+            return
+
+        lines = "".join(
+            f"{a.model_dump_json(exclude_none=True)}\n" for a in applications
+        )
+        with self._lock():
+            hot_file = self.root / self._load_index()["hot"]
+            with open(hot_file, "a", encoding="utf8") as file:
+                file.write(lines)
+
+        self._record(applications)
+
+    def extend_later(self, build: Callable[[], list[HormoneApplication]]):
+        """
+        Record the applications ``build`` returns. In memory, they are only
+        built when first read, so a simulation does not build one per take.
+        """
+        self.extend(build())
+
+    def remove(self, applications: list[HormoneApplication]):
+        """
+        Remove applications from the hot tier, such as when undoing a take.
+        Ones already compacted into a segment are kept.
+        """
+        self._check_writable()
+        remove = [a.model_dump(mode="json", exclude_none=True) for a in applications]
+        with self._lock():
+            hot = self._load_index()["hot"]
+            keep = []
+            for record in self._read_hot(hot):
+                if record in remove:
+                    remove.remove(record)
+                else:
+                    keep.append(record)
+
+            content = "".join(f"{json.dumps(r)}\n" for r in keep)
+            write_atomic(self.root / hot, content.encode("utf8"))
+
+    def query(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        schedule_id: "ScheduleID | None" = None,
+    ) -> list[HormoneApplication]:
+        """
+        The applications in a time range, oldest first.
+
+        Args:
+            start (datetime | None): Include applications at or after this.
+            end (datetime | None): Include applications before this.
+            schedule_id (ScheduleID | None): Only this schedule's applications.
+
+        Returns:
+            list[HormoneApplication]
+        """
+        with span("history.query") as query_span:
+            index = self._load_index()
+            records = []
+            read = 0
+            for segment in index["segments"]:
+                if (
+                    (start and datetime.fromisoformat(segment["end"]) < start)
+                    or (end and datetime.fromisoformat(segment["start"]) >= end)
+                    or (schedule_id and schedule_id not in segment["schedule_ids"])
+                ):
+                    continue
+
+                read += 1
+                records.extend(self._read_segment(segment))
+
+            records.extend(self._read_hot(index["hot"]))
+            query_span.set_attribute("segments_read", read)
+
+        applications = map(HormoneApplication.model_validate, records)
+        return _select(applications, start, end, schedule_id)
+
+    def compact(self, now: datetime | None = None) -> int:
+        """
+        Move applications older than :data:`HOT_PERIOD` from the hot file
+        into compressed monthly segments. Existing segments are never
+        rewritten.
+
+        Returns:
+            int: The number of applications moved.
+        """
+        self._check_writable()
+        cutoff = (now or get_clock().now()) - HOT_PERIOD
+        with self._lock(), span("history.compact") as compact_span:
+            index = self._load_index()
+            old_hot = index["hot"]
+            months: dict[str, list[dict]] = {}
+            keep = []
+            for record in self._read_hot(old_hot):
+                date = datetime.fromisoformat(record["date"])
+                if date < cutoff:
+                    months.setdefault(date.strftime("%Y-%m"), []).append(record)
+                else:
+                    keep.append(record)
+
+            if not months:
+                return 0
+
+            extension, compress, _ = CODECS[self.codec]
+            for month, records in sorted(months.items()):
+                records.sort(key=lambda r: r["date"])
+                sequence = sum(s["name"].startswith(month) for s in index["segments"])
+                name = f"{month}.{sequence}.jsonl.{extension}"
+                content = "".join(f"{json.dumps(r)}\n" for r in records)
+                write_atomic(self.root / name, compress(content.encode("utf8")))
+                index["segments"].append(
+                    {
+                        "name": name,
+                        "codec": self.codec,
+                        "start": records[0]["date"],
+                        "end": records[-1]["date"],
+                        "count": len(records),
+                        "schedule_ids": sorted({r["schedule_id"] for r in records}),
+                    }
+                )
+
+            # Swapping the index is the commit point: a crash before it
+            # leaves the old hot file in charge and orphans the segments.
+            index["segments"].sort(key=lambda s: s["start"])
+            index["hot"] = f"hot.{int(old_hot.split('.')[1]) + 1}.jsonl"
+            content = "".join(f"{json.dumps(r)}\n" for r in keep)
+            write_atomic(self.root / index["hot"], content.encode("utf8"))
+            write_atomic(self._index_file, json.dumps(index).encode("utf8"))
+            (self.root / old_hot).unlink(missing_ok=True)
+
+            moved = sum(len(r) for r in months.values())
+            compact_span.set_attribute("moved", moved)
+            return moved
+
+    def _lock(self):
+        return file_lock(self.root / LOCK_FILE)
+
+    def _record(self, applications: list[HormoneApplication]):
+        if (recording := get_recording(self.patchdata)) is not None:
+            recording.append(
+                {
+                    "key": HISTORY_DIR,
+                    "applications": [a.model_dump(mode="json") for a in applications],
+                }
+            )
+
+    def _read_hot(self, name: str) -> Iterator[dict]:
+        path = self.root / name
+        if not path.is_file():
+            return
+
+        with open(path, encoding="utf8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _read_segment(self, segment: dict) -> list[dict]:
+        _, _, decompress = CODECS[segment["codec"]]
+        content = decompress((self.root / segment["name"]).read_bytes())
+        return [json.loads(line) for line in content.decode("utf8").splitlines()]
+
+    def _load_index(self) -> dict:
+        if self._index_file.is_file():
+            return json.loads(self._index_file.read_text())
+
+        return {"hot": "hot.0.jsonl", "segments": []}
+
+    def _check_writable(self):
+        if self.patchdata.read_only:
+            raise ReadOnlyStorageError(HISTORY_DIR)
+
+
+class MemoryHistory(History):
+    """
+    Application history kept in memory, for in-memory storage.
+    """
+
+    def __init__(self, patchdata: "PatchData"):
+        super().__init__(patchdata)
+        self._applications: list[HormoneApplication] = []
+        self._pending: list[Callable[[], list[HormoneApplication]]] = []
+
+    @property
+    def applications(self) -> list[HormoneApplication]:
+        while self._pending:
+            self._applications.extend(self._pending.pop(0)())
+
+        return self._applications
+
+    @property
+    def segments(self) -> list[dict]:
+        return []
+
+    def extend(self, applications: list[HormoneApplication]):
+        self._check_writable()
+        self.applications.extend(applications)
+        self._record(applications)
+
+    def extend_later(self, build: Callable[[], list[HormoneApplication]]):
+        self._check_writable()
+        if get_recording(self.patchdata) is not None:
+            # Undoing needs them now.
+            self.extend(build())
+        else:
+            self._pending.append(build)
+
+    def remove(self, applications: list[HormoneApplication]):
+        self._check_writable()
+        for application in applications:
+            if application in self.applications:
+                self.applications.remove(application)
+
+    def query(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        schedule_id: "ScheduleID | None" = None,
+    ) -> list[HormoneApplication]:
+        return _select(self.applications, start, end, schedule_id)
+
+    def compact(self, now: datetime | None = None) -> int:
+        # Nothing to compress in memory.
+        return 0
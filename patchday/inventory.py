@@ -0,0 +1,254 @@
+import heapq
+from datetime import datetime, timedelta
+from functools import cached_property
+from typing import TYPE_CHECKING, NamedTuple
+
+from patchday.clock import get_clock
+
+if TYPE_CHECKING:
+    from patchday.recurrence import RecurrenceRule
+    from patchday.schedule import HormoneSchedule
+    from patchday.storage import ManagedData, PatchData
+
+INVENTORY_KEY = "inventory"
+
+# Warn when a supply will run out within this many days.
+LOW_STOCK_DAYS = 7
+
+
+# NOTE: A named tuple like `ScheduleSummary`, so listing schedules can show
+#   supplies without importing pydantic.
+class Supply(NamedTuple):
+    """
+    The stock of hormones for a schedule and when it runs out.
+    """
+
+    schedule_id: str
+    """
+    The schedule the supply is for.
+    """
+
+    stock: int
+    """
+    The number of patches, vials, pills or doses left.
+    """
+
+    alert_days: int = LOW_STOCK_DAYS
+    """
+    Warn when the supply runs out within this many days.
+    """
+
+    runs_out: float | None = None
+    """
+    The epoch time of the first take with nothing left, as of the last
+    take or refill.
+    """
+
+    @property
+    def runs_out_date(self) -> datetime | None:
+        if self.runs_out is None:
+            return None
+
+        return datetime.fromtimestamp(self.runs_out)
+
+    def is_low(self, now: datetime | None = None) -> bool:
+        """
+        True if the supply runs out within :attr:`alert_days`.
+        """
+        if self.runs_out is None:
+            return False
+
+        now = now or get_clock().now()
+        return self.runs_out - now.timestamp() <= self.alert_days * 86400
+
+
+def forecast_run_out(
+    expirations: list[datetime | None],
+    stock: int,
+    interval: timedelta,
+    recurrence: "RecurrenceRule | None" = None,
+    now: datetime | None = None,
+) -> datetime | None:
+    """
+    When a schedule runs out, assuming each hormone is replaced when it
+    expires and every take uses one unit.
+
+    Args:
+        expirations (list[datetime | None]): When each of the schedule's
+          hormones expires; ``None`` for ones not taken yet, which are due
+          now.
+        stock (int): The units left.
+        interval (timedelta): The expiration duration.
+        recurrence (RecurrenceRule | None): The schedule's calendar rule.
+        now (datetime | None): The current time.
+
+    Returns:
+        datetime | None: The time of the first take with nothing left.
+    """
+    if not expirations:
+        return None
+
+    now = now or get_clock().now()
+    dues = sorted(date or now for date in expirations)
+    if recurrence is None:
+        # Every hormone repeats on the same interval, so the takes go round
+        # the hormones in order.
+        rounds, idx = divmod(max(stock, 0), len(dues))
+        return dues[idx] + rounds * interval
+
+    # Calendar rules are not evenly spaced; step through the takes.
+    heapq.heapify(dues)
+    for _ in range(max(stock, 0)):
+        heapq.heapreplace(dues, recurrence.next_after(dues[0]))
+
+    return dues[0]
+
+
+def _to_supply(record: dict) -> Supply:
+    return Supply(**record)
+
+
+class Inventory:
+    """
+    Tracks each schedule's supply. Every take uses one unit, and the
+    run-out forecast is stored with the stock so reading it is one
+    small file.
+    """
+
+    def __init__(self, patchdata: "PatchData"):
+        self.patchdata = patchdata
+
+    @cached_property
+    def db(self) -> "ManagedData":
+        return self.patchdata.open(INVENTORY_KEY)
+
+    def load(self) -> list[Supply]:
+        """
+        Every tracked supply.
+        """
+        return [_to_supply(record) for record in self.db.load_raw_list()]
+
+    def get(self, schedule_id: str) -> Supply | None:
+        return next((s for s in self.load() if s.schedule_id == schedule_id), None)
+
+    def low_stock(self, now: datetime | None = None) -> list[Supply]:
+        """
+        The supplies running out within their alert days.
+        """
+        return [supply for supply in self.load() if supply.is_low(now)]
+
+    def refill(
+        self,
+        schedule: "HormoneSchedule",
+        amount: int,
+        replace: bool = False,
+        alert_days: int | None = None,
+    ) -> Supply:
+        """
+        Record new stock for a schedule, starting to track it if needed.
+
+        Args:
+            schedule (HormoneSchedule): The schedule.
+            amount (int): The units added.
+            replace (bool): Set the stock to ``amount`` instead of adding,
+              e.g. after counting what is left.
+            alert_days (int | None): Change when to warn about low stock.
+
+        Returns:
+            :class:`Supply`
+        """
+        if amount < 0:
+            raise ValueError("Refill amount must not be negative.")
+
+        supply = self.get(schedule.schedule_id) or Supply(schedule.schedule_id, 0)
+        supply = supply._replace(stock=amount if replace else supply.stock + amount)
+        if alert_days is not None:
+            supply = supply._replace(alert_days=alert_days)
+
+        with self.patchdata.journal.record(
+            "refill", schedule_ids=[schedule.schedule_id]
+        ):
+            return self._save(schedule, supply)
+
+    def consume(self, schedule: "HormoneSchedule", amount: int = 1) -> Supply | None:
+        """
+        Use units for a take. Does nothing for untracked schedules.
+        Every take that leaves the supply low publishes a low-stock event,
+        so the reminder comes while the user has the supplies in hand.
+        """
+        return self.consume_all([(schedule, amount)]).get(schedule.schedule_id)
+
+    def consume_all(
+        self, takes: list[tuple["HormoneSchedule", int]]
+    ) -> dict[str, Supply]:
+        """
+        :meth:`consume` for several schedules, with one write.
+
+        Args:
+            takes (list[tuple[HormoneSchedule, int]]): Each schedule and the
+              units it used.
+
+        Returns:
+            dict[str, Supply]: The tracked supplies that changed.
+        """
+        records = self.db.load_raw_list()
+        supplies = {r["schedule_id"]: _to_supply(r) for r in records}
+        changed = {}
+        for schedule, amount in takes:
+            if (supply := supplies.get(schedule.schedule_id)) is None:
+                continue
+
+            supply = supply._replace(stock=max(supply.stock - amount, 0))
+            changed[schedule.schedule_id] = self._forecast(schedule, supply)
+
+        if not changed:
+            return {}
+
+        from patchday.events import EventType
+
+        supplies.update(changed)
+        items = [s._asdict() for s in supplies.values()]
+        self.db.persist_raw_list(items, "schedule_id", previous=records)
+        for supply in changed.values():
+            if supply.is_low():
+                self.patchdata.event_bus.publish(
+                    EventType.LOW_STOCK, supply.schedule_id
+                )
+
+        return changed
+
+    def forecast(self, schedule: "HormoneSchedule") -> Supply | None:
+        """
+        The schedule's supply with the run-out date computed from its
+        hormones now, without saving.
+        """
+        if (supply := self.get(schedule.schedule_id)) is None:
+            return None
+
+        return self._forecast(schedule, supply)
+
+    def remove(self, schedule_id: str):
+        """
+        Stop tracking a schedule's supply.
+        """
+        records = self.db.load_raw_list()
+        if any(r["schedule_id"] == schedule_id for r in records):
+            items = [r for r in records if r["schedule_id"] != schedule_id]
+            self.db.persist_raw_list(items, "schedule_id", previous=records)
+
+    def _forecast(self, schedule: "HormoneSchedule", supply: Supply) -> Supply:
+        run_out = forecast_run_out(
+            [h.expiration_date for h in schedule.hormones],
+            supply.stock,
+            schedule.expiration_duration.timedelta,
+            recurrence=schedule.recurrence,
+        )
+        return supply._replace(runs_out=run_out.timestamp() if run_out else None)
+
+    def _save(self, schedule: "HormoneSchedule", supply: Supply) -> Supply:
+        supply = self._forecast(schedule, supply)
+        records = self.db.load_raw_list()
+        items = [r for r in records if r["schedule_id"] != supply.schedule_id]
+        items.append(supply._asdict())
+        self.db.persist_raw_list(items, "schedule_id", previous=records)
+        return supply
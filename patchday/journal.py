@@ -0,0 +1,217 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cached_property
+from typing import TYPE_CHECKING, Any
+
+from patchday.clock import get_clock
+
+if TYPE_CHECKING:
+    from patchday.storage import ManagedData, PatchData
+
+# The storage key holding the undo and redo stacks.
+JOURNAL_KEY = "journal"
+
+# How many operations can be undone.
+JOURNAL_SIZE = 50
+
+# The journal recording in this context and the changes recorded so far.
+_recording: ContextVar[tuple["PatchData", list[dict]] | None] = ContextVar(
+    "patchday_journal_recording", default=None
+)
+
+
+def get_recording(patchdata: "PatchData") -> list[dict] | None:
+    """
+    The list collecting changes for an operation being recorded on the given
+    storage, if any.
+    """
+    if (recording := _recording.get()) is not None and recording[0] is patchdata:
+        return recording[1]
+
+    return None
+
+
+def diff_records(
+    key: str,
+    id_key: str,
+    previous: list[dict],
+    items: list[dict],
+    versioned: bool = False,
+) -> list[dict]:
+    """
+    The record-level changes between two versions of a stored list.
+    ``versioned`` keys are stamped for syncing when a change is undone or
+    redone.
+    """
+    before = {x[id_key]: x for x in previous}
+    after = {x[id_key]: x for x in items}
+    return [
+        {
+            "key": key,
+            "id_key": id_key,
+            "versioned": versioned,
+            "id": record_id,
+            "before": before.get(record_id),
+            "after": after.get(record_id),
+        }
+        for record_id in (*before, *(x for x in after if x not in before))
+        if before.get(record_id) != after.get(record_id)
+    ]
+
+
+def describe_entry(entry: dict) -> str:
+    """
+    A short description of a journal entry, such as ``take 'My Schedule'``.
+    """
+    schedules = ", ".join(f"'{x}'" for x in entry.get("schedule_ids", []))
+    return f"{entry['operation']} {schedules}".strip()
+
+
+class Journal:
+    """
+    A bounded undo/redo history. Each entry holds only the records an
+    operation changed, before and after, so undoing or redoing one costs
+    the same however much is stored.
+    """
+
+    def __init__(self, patchdata: "PatchData", size: int = JOURNAL_SIZE):
+        self.patchdata = patchdata
+        self.size = size
+
+    @cached_property
+    def db(self) -> "ManagedData":
+        return self.patchdata.open(JOURNAL_KEY)
+
+    @property
+    def undo_entries(self) -> list[dict]:
+        return self._load()["undo"]
+
+    @property
+    def redo_entries(self) -> list[dict]:
+        return self._load()["redo"]
+
+    @contextmanager
+    def record(self, operation: str, **details: Any) -> Iterator[None]:
+        """
+        Record the storage changes made inside the block as one undoable
+        operation. Operations recorded inside another are part of it.
+        Nothing is recorded when the size is 0.
+        """
+        if not self.size or get_recording(self.patchdata) is not None:
+            yield
+            return
+
+        changes: list[dict] = []
+        token = _recording.set((self.patchdata, changes))
+        try:
+            yield
+        finally:
+            _recording.reset(token)
+
+        if not changes:
+            return
+
+        entry = {
+            "operation": operation,
+            "date": get_clock().now().isoformat(),
+            **details,
+            "changes": changes,
+        }
+        state = self._load()
+        state["undo"] = [*state["undo"], entry][-self.size :]
+        state["redo"] = []
+        self.db.persist_raw(state)
+
+    def undo(self) -> dict | None:
+        """
+        Revert the last recorded operation.
+
+        Returns:
+            dict | None: The entry undone, or ``None`` if there was none.
+        """
+        return self._move("undo", "redo", "before")
+
+    def redo(self) -> dict | None:
+        """
+        Re-apply the last undone operation.
+
+        Returns:
+            dict | None: The entry redone, or ``None`` if there was none.
+        """
+        return self._move("redo", "undo", "after")
+
+    def _move(self, source: str, target: str, side: str) -> dict | None:
+        state = self._load()
+        if not state[source]:
+            return None
+
+        entry = state[source].pop()
+        changes = entry["changes"]
+        self._apply(reversed(changes) if side == "before" else changes, side)
+        state[target] = [*state[target], entry][-self.size :]
+        self.db.persist_raw(state)
+        return entry
+
+    def _apply(self, changes, side: str):
+        # Write each key once:
+        #   key -> (id key, versioned, stored records, records by ID).
+        pending: dict[str, tuple[str, bool, list[dict], dict[Any, dict]]] = {}
+
+        def flush(key: str):
+            if (item := pending.pop(key, None)) is not None:
+                id_key, versioned, previous, records = item
+                self.patchdata.open(key).persist_raw_list(
+                    list(records.values()),
+                    id_key,
+                    previous=previous,
+                    versioned=versioned,
+                )
+
+        for change in changes:
+            if "applications" in change:
+                # Appended to the application history, not stored by ID.
+                self._apply_history(change["applications"], side)
+                continue
+
+            key, id_key, value = change["key"], change["id_key"], change[side]
+            versioned = change.get("versioned", False)
+            if "id" not in change:
+                # The whole key was deleted.
+                flush(key)
+                db = self.patchdata.open(key)
+                if value is None:
+                    db.delete(id_key=id_key, versioned=versioned)
+                else:
+                    db.persist_raw_list(value, id_key, versioned=versioned)
+
+                continue
+
+            if key not in pending:
+                previous = self.patchdata.open(key).load_raw_list()
+                records = {x[id_key]: x for x in previous}
+                pending[key] = (id_key, versioned, previous, records)
+
+            records = pending[key][3]
+            if value is None:
+                records.pop(change["id"], None)
+            else:
+                records[change["id"]] = value
+
+        for key in list(pending):
+            flush(key)
+
+    def _apply_history(self, records: list[dict], side: str):
+        from patchday.models import HormoneApplication
+
+        applications = [HormoneApplication.model_validate(x) for x in records]
+        if side == "before":
+            self.patchdata.history.remove(applications)
+        else:
+            self.patchdata.history.extend(applications)
+
+    def _load(self) -> dict:
+        state: dict = self.db._load_data({})
+        state.setdefault("undo", [])
+        state.setdefault("redo", [])
+        return state
@@ -0,0 +1,368 @@
+import math
+from collections.abc import Iterable, Sequence
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, NamedTuple
+
+from patchday.constants import DeliveryMethod
+
+try:
+    import numpy as np
+except ImportError:
+    # NOTE: NumPy is optional (`pip install patchday[levels]`); without it,
+    #   curves are evaluated point by point.
+    np = None
+
+if TYPE_CHECKING:
+    from patchday.history import History
+    from patchday.schedule import HormoneSchedule, ScheduleManager
+    from patchday.types import ScheduleID
+
+# A dose's effect is ignored once it has decayed for this many half-lives
+# (to below 0.025% of its peak).
+CUTOFF_HALF_LIVES = 12
+
+
+class ReleaseModel(NamedTuple):
+    """
+    How a delivery method releases hormones and how fast the body clears
+    them. Levels are relative: one worn patch at steady state is 1.0, and
+    other doses are scaled so taking them on schedule averages 1.0.
+    These are rough population estimates, not medical advice.
+    """
+
+    elimination_half_life: timedelta
+    """
+    How long the level takes to halve once nothing more is released.
+    """
+
+    absorption_half_life: timedelta | None = None
+    """
+    How fast a single dose is absorbed. ``None`` means the hormone is
+    released steadily for as long as it is worn, like a patch.
+    """
+
+    @property
+    def worn(self) -> bool:
+        return self.absorption_half_life is None
+
+    @property
+    def effect_seconds(self) -> float:
+        """
+        How long a dose has a noticeable effect after it stops releasing.
+        """
+        absorption = self.absorption_half_life or timedelta(0)
+        longest = max(self.elimination_half_life, absorption)
+        return CUTOFF_HALF_LIVES * longest.total_seconds()
+
+    def level(self, offset: float, wear: float | None, interval: float) -> float:
+        """
+        The level from one dose ``offset`` seconds after it was applied.
+
+        Args:
+            offset (float): Seconds since the application.
+            wear (float | None): Seconds it was worn, or ``None`` if it
+              still is. Only used by worn models.
+            interval (float): The schedule's expiration duration in seconds,
+              used to scale single doses.
+
+        Returns:
+            float
+        """
+        if offset < 0:
+            return 0.0
+
+        ke = _rate(self.elimination_half_life)
+        if self.absorption_half_life is None:
+            if wear is None or offset <= wear:
+                return 1 - math.exp(-ke * offset)
+
+            return (1 - math.exp(-ke * wear)) * math.exp(-ke * (offset - wear))
+
+        ka = _absorption_rate(self.absorption_half_life, ke)
+        scale = ke * interval * ka / (ka - ke)
+        return scale * (math.exp(-ke * offset) - math.exp(-ka * offset))
+
+    def levels(self, offsets, wear: float | None, interval: float):
+        """
+        :meth:`level` for a NumPy array of offsets, all at or after the
+        application.
+        """
+        ke = _rate(self.elimination_half_life)
+        if self.absorption_half_life is None:
+            if wear is None:
+                return 1 - np.exp(-ke * offsets)
+
+            released = 1 - np.exp(-ke * np.minimum(offsets, wear))
+            return released * np.exp(-ke * np.maximum(offsets - wear, 0))
+
+        ka = _absorption_rate(self.absorption_half_life, ke)
+        scale = ke * interval * ka / (ka - ke)
+        return scale * (np.exp(-ke * offsets) - np.exp(-ka * offsets))
+
+
+def _rate(half_life: timedelta) -> float:
+    return math.log(2) / half_life.total_seconds()
+
+
+def _absorption_rate(half_life: timedelta, ke: float) -> float:
+    # The single-dose formula divides by (ka - ke).
+    ka = _rate(half_life)
+    return ka * 1.0001 if math.isclose(ka, ke) else ka
+
+
+RELEASE_MODELS: dict[DeliveryMethod, ReleaseModel] = {
+    DeliveryMethod.PATCH: ReleaseModel(elimination_half_life=timedelta(hours=6)),
+    DeliveryMethod.INJECTION: ReleaseModel(
+        elimination_half_life=timedelta(days=4),
+        absorption_half_life=timedelta(days=1),
+    ),
+    DeliveryMethod.PILL: ReleaseModel(
+        elimination_half_life=timedelta(hours=14),
+        absorption_half_life=timedelta(hours=1),
+    ),
+    DeliveryMethod.GEL: ReleaseModel(
+        elimination_half_life=timedelta(hours=12),
+        absorption_half_life=timedelta(hours=4),
+    ),
+}
+
+
+class Dose(NamedTuple):
+    hormone_id: int
+    """
+    The hormone applied.
+    """
+
+    start: float
+    """
+    When it was applied, in epoch seconds.
+    """
+
+    end: float | None = None
+    """
+    When a worn dose was removed, or ``None`` if it still is worn.
+    """
+
+
+class LevelCurve(NamedTuple):
+    """
+    Estimated levels on an evenly spaced time grid.
+    """
+
+    start: datetime
+    """
+    The time of the first value.
+    """
+
+    step: timedelta
+    """
+    The time between values.
+    """
+
+    values: Sequence[float]
+    """
+    The levels; a NumPy array when NumPy is installed.
+    """
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def end(self) -> datetime:
+        return self.start + self.step * len(self.values)
+
+    def at(self, date: datetime) -> float:
+        """
+        The level at the grid point at or before the given time.
+        """
+        index = int((date - self.start) / self.step)
+        if not 0 <= index < len(self.values):
+            raise IndexError(f"{date} is outside the curve.")
+
+        return float(self.values[index])
+
+
+class _Curve:
+    # A cached curve and the doses it includes.
+    __slots__ = ("doses", "interval", "start", "step", "values")
+
+    def __init__(self, start: float, step: float, interval: float):
+        self.start = start
+        self.step = step
+        self.interval = interval
+        self.values = _zeros(0)
+        self.doses: set[Dose] = set()
+
+
+class Levels:
+    """
+    Estimates hormone levels from the application history by adding up
+    each application's release and decay curve. Curves are cached per
+    schedule; new applications are added to the cached values and only
+    the part of the grid past the cached end is evaluated in full.
+    """
+
+    def __init__(
+        self,
+        schedules: "ScheduleManager",
+        history: "History",
+        models: dict[DeliveryMethod, ReleaseModel] | None = None,
+    ):
+        self.schedules = schedules
+        self.history = history
+        self.models = models or RELEASE_MODELS
+        self._curves: dict[ScheduleID, _Curve] = {}
+
+    def estimate(
+        self,
+        schedule_id: "ScheduleID",
+        start: datetime,
+        end: datetime,
+        step: timedelta = timedelta(minutes=1),
+    ) -> LevelCurve:
+        """
+        Estimate a schedule's levels over a time range.
+
+        Args:
+            schedule_id (ScheduleID): The schedule.
+            start (datetime): The first grid point.
+            end (datetime): Where the grid ends (exclusive).
+            step (timedelta): The grid spacing. Defaults to a minute.
+
+        Returns:
+            :class:`LevelCurve`
+        """
+        schedule = self.schedules[schedule_id]
+        model = self.models[schedule.delivery_method]
+        interval = float(int(schedule.expiration_duration))
+        t0, dt = start.timestamp(), step.total_seconds()
+        size = max(0, math.ceil((end.timestamp() - t0) / dt))
+
+        curve = self._curves.get(schedule_id)
+        if curve is None or (curve.start, curve.step, curve.interval) != (
+            t0,
+            dt,
+            interval,
+        ):
+            curve = self._curves[schedule_id] = _Curve(t0, dt, interval)
+
+        doses = set(self._get_doses(schedule, model, start, end))
+        cached = len(curve.values)
+        if cached:
+            # Only the applications that changed since the curve was cached.
+            for dose in curve.doses - doses:
+                self._add(curve, curve.values, 0, dose, model, sign=-1)
+
+            for dose in doses - curve.doses:
+                self._add(curve, curve.values, 0, dose, model)
+
+        if size > cached:
+            tail = _zeros(size - cached)
+            for dose in doses:
+                self._add(curve, tail, cached, dose, model)
+
+            curve.values = _concat(curve.values, tail)
+
+        curve.doses = doses
+        values = curve.values[:size]
+        if np is not None:
+            # Slicing an array makes a view; later updates must not change it.
+            values = values.copy()
+
+        return LevelCurve(start=start, step=step, values=values)
+
+    def estimate_all(
+        self, start: datetime, end: datetime, step: timedelta = timedelta(minutes=1)
+    ) -> dict["ScheduleID", LevelCurve]:
+        """
+        :meth:`estimate` every schedule.
+        """
+        return {
+            schedule.schedule_id: self.estimate(schedule.schedule_id, start, end, step)
+            for schedule in self.schedules.get_schedules()
+        }
+
+    def clear(self):
+        self._curves.clear()
+
+    def _get_doses(
+        self,
+        schedule: "HormoneSchedule",
+        model: ReleaseModel,
+        start: datetime,
+        end: datetime,
+    ) -> Iterable[Dose]:
+        # Applications from before the grid can still have an effect.
+        lookback = schedule.expiration_duration.timedelta + timedelta(
+            seconds=model.effect_seconds
+        )
+        applications = {
+            (a.hormone_id, a.date)
+            for a in self.history.query(
+                start=start - lookback, end=end, schedule_id=schedule.schedule_id
+            )
+        }
+        # Include what was applied before history was recorded.
+        applications.update(
+            (h.hormone_id, h.date_applied)
+            for h in schedule.hormones
+            if h.date_applied is not None and start - lookback <= h.date_applied < end
+        )
+        if not model.worn:
+            return (Dose(h_id, date.timestamp()) for h_id, date in applications)
+
+        # A worn hormone is removed when the next one goes in its place.
+        doses = []
+        last: dict[int, float] = {}
+        for hormone_id, date in sorted(applications, key=lambda a: a[1], reverse=True):
+            applied = date.timestamp()
+            doses.append(Dose(hormone_id, applied, last.get(hormone_id)))
+            last[hormone_id] = applied
+
+        return doses
+
+    def _add(
+        self,
+        curve: _Curve,
+        values,
+        offset: int,
+        dose: Dose,
+        model: ReleaseModel,
+        sign: int = 1,
+    ):
+        # Add a dose's levels to `values`, which hold grid points
+        # `offset` to `offset + len(values)`.
+        if dose.end is None and model.worn:
+            effect_end = math.inf
+        else:
+            effect_end = (dose.end or dose.start) + model.effect_seconds
+
+        first = max(offset, math.ceil((dose.start - curve.start) / curve.step))
+        last = offset + len(values)
+        if effect_end != math.inf:
+            last = min(last, math.floor((effect_end - curve.start) / curve.step) + 1)
+
+        if first >= last:
+            return
+
+        wear = None if dose.end is None else dose.end - dose.start
+        first_offset = curve.start + first * curve.step - dose.start
+        if np is not None:
+            offsets = first_offset + np.arange(last - first) * curve.step
+            levels = model.levels(offsets, wear, curve.interval)
+            values[first - offset : last - offset] += sign * levels
+            return
+
+        for idx in range(first, last):
+            level = model.level(
+                first_offset + (idx - first) * curve.step, wear, curve.interval
+            )
+            values[idx - offset] += sign * level
+
+
+def _zeros(size: int):
+    return [0.0] * size if np is None else np.zeros(size)
+
+
+def _concat(values, tail):
+    return values + tail if np is None else np.concatenate((values, tail))
@@ -1,34 +1,202 @@
+import atexit
+import copy
+import json
 import logging
+import os
 import sys
+import uuid
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import cached_property
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Any
+
+# Environment variables for configuring logging without code changes.
+LOG_LEVEL_ENV = "PATCHDAY_LOG_LEVEL"
+LOG_FORMAT_ENV = "PATCHDAY_LOG_FORMAT"
+LOG_STREAM_ENV = "PATCHDAY_LOG_STREAM"
+LOG_ASYNC_ENV = "PATCHDAY_LOG_ASYNC"
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# The ID of the request (or other unit of work) being handled.
+correlation_id: ContextVar[str | None] = ContextVar(
+    "patchday_correlation_id", default=None
+)
+
+Message = str | Callable[[], str]
+Context = Mapping[str, Any] | Callable[[], Mapping[str, Any]]
+
+
+class CorrelationFilter(logging.Filter):
+    """
+    Stamps records with the correlation ID. It must run on the caller's
+    thread, before queueing, because the ID lives in a context variable.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if cid := getattr(record, "correlation_id", None):
+            data["correlation_id"] = cid
+
+        if context := getattr(record, "context", None):
+            data.update(context)
+
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(data, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queues records without formatting them first, so formatting and I/O
+    both happen on the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # NOTE: The base class merges args into the message here, on the
+        #   caller's thread. The queue never leaves this process, so skip it.
+        return copy.copy(record)
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    if (value := os.environ.get(name)) is None:
+        return default
+
+    return value.lower() not in ("0", "false", "no", "off", "")
 
 
 class PDLogger:
+    def __init__(self, name: str = "patchday"):
+        self.name = name
+        self._listener: QueueListener | None = None
+
     @cached_property
     def logger(self) -> logging.Logger:
-        logger = logging.getLogger("patchday")
-        if logger.hasHandlers():
+        logger = logging.getLogger(self.name)
+        if logger.handlers:
             return logger
 
         # Create logger for the first time.
-        logger.setLevel(logging.DEBUG)
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setLevel(logging.DEBUG)
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        level = os.environ.get(LOG_LEVEL_ENV, "DEBUG").upper()
+        logger.setLevel(level)
+        logger.addHandler(self._create_handler())
         return logger
 
-    def info(self, msg: str) -> None:
-        self.logger.info(msg)
+    def _create_handler(self) -> logging.Handler:
+        stream_name = os.environ.get(LOG_STREAM_ENV, "stderr").lower()
+        stream = sys.stdout if stream_name == "stdout" else sys.stderr
+        output = logging.StreamHandler(stream)
+        if os.environ.get(LOG_FORMAT_ENV, "text").lower() == "json":
+            output.setFormatter(JSONFormatter())
+        else:
+            output.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+        if not _env_flag(LOG_ASYNC_ENV, True):
+            output.addFilter(CorrelationFilter())
+            return output
+
+        queue: SimpleQueue = SimpleQueue()
+        handler = DeferredQueueHandler(queue)
+        handler.addFilter(CorrelationFilter())
+        self._listener = QueueListener(queue, output, respect_handler_level=True)
+        self._listener.start()
+        atexit.register(self.close)
+        return handler
+
+    def flush(self):
+        """
+        Wait for queued records to be written.
+        """
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener.start()
+
+    def close(self):
+        """
+        Write any queued records and stop the listener thread.
+        """
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def log(
+        self,
+        level: int,
+        msg: Message,
+        *args,
+        context: Context | None = None,
+        exc_info=None,
+    ):
+        """
+        Log a message. Nothing is built unless the level is enabled: ``msg``
+        and ``context`` may be callables, and ``args`` are merged into the
+        message off the calling thread.
+
+        Args:
+            level (int): The logging level.
+            msg (str | Callable[[], str]): The message or a function making it.
+            *args: ``%``-style arguments for the message.
+            context (Mapping | Callable[[], Mapping] | None): Extra structured
+              fields, or a function making them.
+            exc_info: Exception info, as with :mod:`logging`.
+        """
+        if not self.logger.isEnabledFor(level):
+            return
+
+        if callable(msg):
+            msg = msg()
+
+        extra = None
+        if context is not None:
+            extra = {"context": dict(context() if callable(context) else context)}
+
+        self.logger.log(level, msg, *args, extra=extra, exc_info=exc_info)
+
+    def info(self, msg: Message, *args, **kwargs) -> None:
+        self.log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg: Message, *args, **kwargs) -> None:
+        self.log(logging.WARNING, msg, *args, **kwargs)
+
+    def error(self, msg: Message, *args, **kwargs) -> None:
+        self.log(logging.ERROR, msg, *args, **kwargs)
+
+    def debug(self, msg: Message, *args, **kwargs) -> None:
+        self.log(logging.DEBUG, msg, *args, **kwargs)
 
-    def error(self, msg: str) -> None:
-        self.logger.error(msg)
+    @contextmanager
+    def correlate(self, cid: str | None = None) -> Iterator[str]:
+        """
+        Tag every record logged inside the block with a correlation ID.
 
-    def debug(self, msg: str) -> None:
-        self.logger.debug(msg)
+        Args:
+            cid (str | None): The ID to use. Defaults to a new random one.
+        """
+        cid = cid or uuid.uuid4().hex
+        token = correlation_id.set(cid)
+        try:
+            yield cid
+        finally:
+            correlation_id.reset(token)
 
 
 logger = PDLogger()
@@ -1,26 +1,134 @@
-from pathlib import Path
-
+import os
 from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-from patchday.schedule import ScheduleManager
+from patchday.constants import MAX_QUANTITY, MAX_SCHEDULES
+from patchday.metrics import StorageMetrics
 from patchday.storage import PatchData
 
+if TYPE_CHECKING:
+    from patchday.backup import Backups
+    from patchday.events import EventBus
+    from patchday.history import History
+    from patchday.inventory import Inventory
+    from patchday.journal import Journal
+    from patchday.levels import Levels
+    from patchday.schedule import ScheduleManager
+    from patchday.summary import Summary
+    from patchday.sync import Replica
+
 
 class PatchDay:
     """
     The entry point PatchDay application class.
     """
 
-    def __init__(self, storage_path: Path | None = None):
+    def __init__(
+        self,
+        storage_path: Path | None = None,
+        max_schedules: int | None = MAX_SCHEDULES,
+        max_quantity: int | None = MAX_QUANTITY,
+        read_only: bool = False,
+        patchdata: PatchData | None = None,
+        shared_cache: bool = False,
+    ):
+        """
+        Args:
+            storage_path (Path | None): Where to store data. Defaults to the
+              XDG config directory.
+            max_schedules (int | None): The most schedules allowed, or
+              ``None`` for no limit.
+            max_quantity (int | None): The most hormones a schedule may have,
+              or ``None`` for no limit.
+            read_only (bool): Never write to storage. Reads still work, with
+              any repairs made in memory only.
+            patchdata (PatchData | None): Use this storage instead of opening
+              ``storage_path``, e.g. a
+              :class:`~patchday.storage.MemoryPatchData`.
+            shared_cache (bool): Share parsed data with other processes using
+              the same storage, such as service workers.
+        """
         self._storage_path = storage_path
+        self.max_schedules = max_schedules
+        self.max_quantity = max_quantity
+        self.read_only = read_only
+        self._patchdata = patchdata
+        self.shared_cache = shared_cache
 
     @cached_property
     def _db(self) -> PatchData:
-        return PatchData(path=self._storage_path)
+        if self._patchdata is not None:
+            return self._patchdata
+
+        return PatchData(
+            path=self._storage_path,
+            read_only=self.read_only,
+            shared_cache=self.shared_cache,
+        )
 
     @cached_property
-    def schedules(self) -> ScheduleManager:
-        return ScheduleManager(self._db)
+    def schedules(self) -> "ScheduleManager":
+        # NOTE: Imported here so light commands can use storage without pydantic.
+        from patchday.schedule import ScheduleManager
+
+        return ScheduleManager(
+            self._db,
+            max_schedules=self.max_schedules,
+            max_quantity=self.max_quantity,
+        )
+
+    @cached_property
+    def levels(self) -> "Levels":
+        """
+        Hormone level estimates from the application history.
+        """
+        from patchday.levels import Levels
+
+        return Levels(self.schedules, self.history)
+
+    @property
+    def event_bus(self) -> "EventBus":
+        return self._db.event_bus
+
+    @property
+    def replica(self) -> "Replica":
+        return self._db.replica
+
+    @property
+    def backups(self) -> "Backups":
+        return self._db.backups
+
+    @property
+    def history(self) -> "History":
+        return self._db.history
+
+    @property
+    def inventory(self) -> "Inventory":
+        return self._db.inventory
+
+    @property
+    def journal(self) -> "Journal":
+        return self._db.journal
+
+    @property
+    def metrics(self) -> StorageMetrics:
+        return self._db.metrics
+
+    @property
+    def summary(self) -> "Summary":
+        return self._db.summary
+
+
+# Set to "1" to run against storage that must not be written, such as a
+# read-only mount shared by service replicas.
+READ_ONLY_ENV = "PATCHDAY_READ_ONLY"
 
+# Set to "1" to share parsed data between processes, such as the workers of
+# `uvicorn patchday.service:app --workers N`.
+SHARED_CACHE_ENV = "PATCHDAY_SHARED_CACHE"
 
-patchday = PatchDay()
+patchday = PatchDay(
+    read_only=os.environ.get(READ_ONLY_ENV) == "1",
+    shared_cache=os.environ.get(SHARED_CACHE_ENV) == "1",
+)
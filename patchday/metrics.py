@@ -0,0 +1,157 @@
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class OperationStats:
+    """
+    Totals for one storage operation on one key.
+    """
+
+    __slots__ = (
+        "bytes_read",
+        "bytes_written",
+        "calls",
+        "collapsed_loads",
+        "seconds",
+        "validation_seconds",
+    )
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.validation_seconds = 0.0
+        self.collapsed_loads = 0
+
+    def add(self, other: "OperationStats"):
+        for attr in self.__slots__:
+            setattr(self, attr, getattr(self, attr) + getattr(other, attr))
+
+
+# The measurement of the storage operation running in this context, if any.
+_current: ContextVar[tuple[str, OperationStats] | None] = ContextVar(
+    "patchday_storage_measurement", default=None
+)
+
+
+def record_read(size: int):
+    if current := _current.get():
+        current[1].bytes_read += size
+
+
+def record_write(size: int):
+    if current := _current.get():
+        current[1].bytes_written += size
+
+
+def record_validation(seconds: float):
+    if current := _current.get():
+        current[1].validation_seconds += seconds
+
+
+def record_collapsed():
+    if current := _current.get():
+        current[1].collapsed_loads += 1
+
+
+class StorageMetrics:
+    """
+    Counts, wall time, bytes and pydantic validation time per storage
+    key and operation.
+    """
+
+    def __init__(self):
+        self._stats: dict[tuple[str, str], OperationStats] = {}
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> Iterator[tuple[str, str, OperationStats]]:
+        with self._lock:
+            items = sorted(self._stats.items())
+
+        for (key, operation), stats in items:
+            yield key, operation, stats
+
+    def __getitem__(self, key_and_operation: tuple[str, str]) -> OperationStats:
+        return self._stats.get(key_and_operation) or OperationStats()
+
+    @contextmanager
+    def measure(self, key: str, operation: str) -> Iterator[OperationStats]:
+        """
+        Measure a storage operation. Operations nested in another operation
+        on the same key count towards the outer one only.
+        """
+        current = _current.get()
+        if current is not None and current[0] == key:
+            yield current[1]
+            return
+
+        stats = OperationStats()
+        token = _current.set((key, stats))
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds = time.perf_counter() - start
+            stats.calls = 1
+            _current.reset(token)
+            with self._lock:
+                self._stats.setdefault((key, operation), OperationStats()).add(stats)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def format_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+        """
+        series = (
+            ("calls_total", "calls", "Storage operations."),
+            ("seconds_total", "seconds", "Wall time spent in storage operations."),
+            ("read_bytes_total", "bytes_read", "Bytes read from storage."),
+            ("written_bytes_total", "bytes_written", "Bytes written to storage."),
+            (
+                "validation_seconds_total",
+                "validation_seconds",
+                "Time spent validating models.",
+            ),
+            (
+                "collapsed_loads_total",
+                "collapsed_loads",
+                "Loads that waited for the same load in another thread.",
+            ),
+        )
+        rows = list(self)
+        lines = []
+        for name, attr, description in series:
+            metric = f"patchday_storage_{name}"
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} counter")
+            for key, operation, stats in rows:
+                labels = f'key="{key}",operation="{operation}"'
+                lines.append(f"{metric}{{{labels}}} {getattr(stats, attr)}")
+
+        return "\n".join(lines) + "\n"
+
+    def format_summary(self) -> str:
+        """
+        Render the metrics as a table for humans.
+        """
+        header = (
+            f"{'key':<16}{'operation':<20}{'calls':>6}{'ms':>10}"
+            f"{'read':>10}{'written':>10}{'validate ms':>13}{'shared':>8}"
+        )
+        lines = [header]
+        for key, operation, stats in self:
+            lines.append(
+                f"{key:<16}{operation:<20}{stats.calls:>6}"
+                f"{stats.seconds * 1000:>10.2f}{stats.bytes_read:>10}"
+                f"{stats.bytes_written:>10}{stats.validation_seconds * 1000:>13.2f}"
+                f"{stats.collapsed_loads:>8}"
+            )
+
+        return "\n".join(lines)
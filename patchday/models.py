@@ -1,12 +1,16 @@
 from datetime import datetime
+from typing import ClassVar
 
 from pydantic import BaseModel
 
+from patchday.clock import get_clock
+
 from patchday.types import (
     SiteID,
     HormoneID,
     ScheduleID,
     ExpirationDuration,
+    Recurrence,
 )
 
 
@@ -26,10 +30,20 @@ class HormoneApplication(BaseModel):
     (new schedule or changing a schedule's quantity setting).
     """
 
+    schedule_id: ScheduleID | None = None
+    """
+    The schedule the hormone belongs to.
+    """
+
+    location: SiteID | None = None
+    """
+    The site the hormone was applied to.
+    """
+
     @classmethod
     def from_hormone(cls, hormone: "Hormone", **kwargs) -> "HormoneApplication":
         if "date" not in kwargs:
-            kwargs["date"] = datetime.now()
+            kwargs["date"] = get_clock().now()
 
         return HormoneApplication(hormone_id=hormone.hormone_id, **kwargs)
 
@@ -75,6 +89,21 @@ class Hormone(BaseModel):
     The ID of the schedule this hormone belongs to.
     """
 
+    hlc: str | None = None
+    """
+    The hybrid logical clock version of the last change, used
+    when syncing devices.
+    """
+
+    recurrence: Recurrence | None = None
+    """
+    The schedule's calendar rule, if it has one. It decides the
+    expiration date instead of the expiration duration.
+    """
+
+    # The recurrence is the schedule's, set when loading.
+    storage_exclude: ClassVar[set[str]] = {"recurrence"}
+
     def __lt__(self, other: "Hormone") -> bool:
         expiration_date = self.expiration_date
         other_expiration_date = other.expiration_date
@@ -99,7 +128,7 @@ class Hormone(BaseModel):
         True if this hormone needs to be re-applied.
         """
         if expiration_date := self.expiration_date:
-            return expiration_date <= datetime.now()
+            return expiration_date <= get_clock().now()
 
         return False
 
@@ -113,6 +142,9 @@ class Hormone(BaseModel):
             # If not applied, it doesn't have an exp. date.
             return None
 
+        elif self.recurrence is not None:
+            return self.recurrence.next_after(date_applied)
+
         return self.expiration_duration.date_from(date_applied)
 
     def apply(self, application: HormoneApplication | None = None):
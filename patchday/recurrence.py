@@ -0,0 +1,223 @@
+import re
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta, tzinfo
+from functools import lru_cache
+from typing import NamedTuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+TIME_PATTERN = re.compile(r"^(\d{1,2})(?::(\d{2}))?(am|pm)?$")
+INTERVAL_PATTERN = re.compile(r"^(\d+)([dw])$")
+
+# NOTE: Not `datetime.UTC`, which is new in Python 3.11.
+UTC = ZoneInfo("UTC")
+
+
+class RecurrenceRule(NamedTuple):
+    """
+    A calendar rule such as "every Monday and Thursday at 9am" or "every
+    14 days at 8am", in a time zone. Unlike an expiration duration, the
+    wall-clock time does not drift when doses are late or when daylight
+    saving time changes.
+    """
+
+    at: time
+    """
+    The wall-clock time of each occurrence.
+    """
+
+    weekdays: tuple[int, ...] = ()
+    """
+    The weekdays (0 is Monday) it occurs on, for weekly rules.
+    """
+
+    interval_days: int = 0
+    """
+    The days between occurrences, for interval rules.
+    """
+
+    anchor: date | None = None
+    """
+    A day an interval rule occurs on. Without one, intervals count from
+    the day being asked about, e.g. the day a hormone was applied.
+    """
+
+    timezone: str | None = None
+    """
+    The IANA time zone, such as ``"America/New_York"``. Defaults to the
+    system's.
+    """
+
+    def __str__(self) -> str:
+        if self.weekdays:
+            parts = ["/".join(WEEKDAYS[d] for d in self.weekdays)]
+        else:
+            parts = ["every", f"{self.interval_days}d"]
+
+        parts.append(self.at.strftime("%H:%M"))
+        if self.anchor:
+            parts.extend(("from", self.anchor.isoformat()))
+        if self.timezone:
+            parts.append(self.timezone)
+
+        return " ".join(parts)
+
+    def next_after(self, after: datetime) -> datetime:
+        """
+        The first occurrence strictly after the given time. Takes constant
+        time, however far apart occurrences are.
+
+        Args:
+            after (datetime): Naive datetimes are system-local, like the
+              rest of patchday.
+
+        Returns:
+            datetime: Naive or aware, like ``after``.
+        """
+        zone = _get_zone(self.timezone)
+        after_aware = after if after.tzinfo else after.astimezone()
+        day = (after_aware.astimezone(zone) if zone else after_aware).date()
+
+        if self.weekdays:
+            weekday = day.weekday()
+            if _localize(day, self.at, zone) <= after_aware:
+                weekday += 1
+
+            # Each weekday this week and next, so a bisect finds the next one.
+            upcoming = (*self.weekdays, *(d + 7 for d in self.weekdays))
+            offset = upcoming[bisect_left(upcoming, weekday)] - day.weekday()
+            next_day = day + timedelta(offset)
+
+        elif self.anchor is None:
+            next_day = day + timedelta(self.interval_days)
+
+        else:
+            # The first occurrence on or after `day`, then the one after it
+            # if that time has passed.
+            next_day = day + timedelta(-(day - self.anchor).days % self.interval_days)
+            if _localize(next_day, self.at, zone) <= after_aware:
+                next_day += timedelta(self.interval_days)
+
+        return _convert(_localize(next_day, self.at, zone), after)
+
+    def between(self, start: datetime, end: datetime) -> list[datetime]:
+        """
+        Every occurrence after ``start`` and up to ``end``.
+        """
+        occurrences = []
+        occurrence = self.next_after(start)
+        while occurrence <= end:
+            occurrences.append(occurrence)
+            occurrence = self.next_after(occurrence)
+
+        return occurrences
+
+
+@lru_cache
+def _get_zone(name: str | None) -> tzinfo | None:
+    # NOTE: ZoneInfo objects cache their transitions, so keep one per zone.
+    if name is None:
+        return None
+
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as err:
+        raise ValueError(f"Unknown time zone '{name}'.") from err
+
+
+def _localize(day: date, at: time, zone: tzinfo | None) -> datetime:
+    # Wall-clock times skipped by a DST change resolve to the same time
+    # after the change (e.g. 2:30 becomes 3:30); repeated ones to the first.
+    if zone is None:
+        return datetime.combine(day, at).astimezone()
+
+    return datetime.combine(day, at, tzinfo=zone).astimezone(UTC)
+
+
+def _convert(occurrence: datetime, like: datetime) -> datetime:
+    if like.tzinfo:
+        return occurrence.astimezone(like.tzinfo)
+
+    return occurrence.astimezone().replace(tzinfo=None)
+
+
+@lru_cache(maxsize=256)
+def parse_recurrence(value: str) -> RecurrenceRule:
+    """
+    Parse a rule such as ``"mon/thu 9am"``, ``"mon-fri 21:30 Europe/Berlin"``,
+    ``"daily 8am"`` or ``"every 14d 8am from 2024-01-01"``.
+
+    Args:
+        value (str): The rule.
+
+    Returns:
+        :class:`RecurrenceRule`
+    """
+    tokens = value.split()
+    kwargs: dict = {}
+    idx = 0
+    while idx < len(tokens):
+        token = tokens[idx]
+        lowered = token.lower()
+        if lowered == "at":
+            pass
+        elif lowered == "daily":
+            kwargs["interval_days"] = 1
+        elif lowered == "every" and idx + 1 < len(tokens):
+            idx += 1
+            if not (match := INTERVAL_PATTERN.match(tokens[idx].lower())):
+                raise ValueError(f"Invalid interval '{tokens[idx]}'. Expecting '14d'.")
+
+            amount, unit = int(match.group(1)), match.group(2)
+            kwargs["interval_days"] = amount * (7 if unit == "w" else 1)
+        elif lowered == "from" and idx + 1 < len(tokens):
+            idx += 1
+            kwargs["anchor"] = date.fromisoformat(tokens[idx])
+        elif match := TIME_PATTERN.match(lowered):
+            kwargs["at"] = _parse_time(*match.groups())
+        elif weekdays := _parse_weekdays(lowered):
+            kwargs["weekdays"] = weekdays
+        elif "/" in token or token.upper() == "UTC":
+            _get_zone(token)
+            kwargs["timezone"] = token
+        else:
+            raise ValueError(f"Invalid recurrence '{value}': unexpected '{token}'.")
+
+        idx += 1
+
+    if "at" not in kwargs:
+        raise ValueError(f"Invalid recurrence '{value}': missing a time like '9am'.")
+    elif bool(kwargs.get("weekdays")) == bool(kwargs.get("interval_days")):
+        raise ValueError(
+            f"Invalid recurrence '{value}': expecting weekdays like 'mon/thu' "
+            "or an interval like 'every 14d'."
+        )
+
+    return RecurrenceRule(**kwargs)
+
+
+def _parse_time(hour: str, minute: str | None, meridiem: str | None) -> time:
+    hours, minutes = int(hour), int(minute or 0)
+    if meridiem:
+        if not 1 <= hours <= 12:
+            raise ValueError(f"Invalid hour '{hour}{meridiem}'.")
+
+        hours = hours % 12 + (12 if meridiem == "pm" else 0)
+
+    return time(hours, minutes)
+
+
+def _parse_weekdays(value: str) -> tuple[int, ...]:
+    weekdays: set[int] = set()
+    for part in re.split(r"[/,]", value):
+        first, _, last = part.partition("-")
+        if first not in WEEKDAYS or (last and last not in WEEKDAYS):
+            return ()
+
+        start = WEEKDAYS.index(first)
+        end = WEEKDAYS.index(last) if last else start
+        weekdays.update(
+            d % 7 for d in range(start, end + 1 if end >= start else end + 8)
+        )
+
+    return tuple(sorted(weekdays))
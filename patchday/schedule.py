@@ -1,13 +1,26 @@
-from collections.abc import Iterator
+from collections.abc import Callable, Iterator
+from datetime import datetime
 from functools import cached_property
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, ClassVar, Optional
 
 from pydantic import BaseModel, computed_field
 
+from patchday.clock import get_clock
+from patchday.constants import MAX_QUANTITY, MAX_SCHEDULES
+from patchday.date import to_local
+from patchday.events import EventType
 from patchday.exceptions import ScheduleNotExistsError
-from patchday.models import Hormone
-from patchday.storage import ManagedData
-from patchday.types import DeliveryMethod, ExpirationDuration, ScheduleID
+from patchday.models import Hormone, HormoneApplication
+from patchday.storage import SCHEDULES_KEY, ManagedData, get_hormones_key
+from patchday.tracing import span
+from patchday.types import (
+    DeliveryMethod,
+    ExpirationDuration,
+    HormoneID,
+    Recurrence,
+    ScheduleID,
+    validate_quantity,
+)
 
 if TYPE_CHECKING:
     from patchday.storage import PatchData
@@ -19,15 +32,28 @@ class Manager:
 
 
 class ScheduleManager(Manager):
-    _DB_KEY = "schedules"
+    _DB_KEY = SCHEDULES_KEY
 
-    def __init__(self, patchdata: "PatchData", max_schedules: int = 10):
+    def __init__(
+        self,
+        patchdata: "PatchData",
+        max_schedules: int | None = MAX_SCHEDULES,
+        max_quantity: int | None = MAX_QUANTITY,
+    ):
         self._max_schedules = max_schedules
+        self._max_quantity = max_quantity
+        self._index: tuple[tuple, dict[ScheduleID, HormoneSchedule]] | None = None
         super().__init__(patchdata)
 
     def __iter__(self) -> Iterator["HormoneSchedule"]:
         yield from self.get_schedules()
 
+    def __len__(self) -> int:
+        return len(self._get_index())
+
+    def __contains__(self, schedule_id: ScheduleID) -> bool:
+        return schedule_id in self._get_index()
+
     def __add__(self, other: dict) -> "ScheduleManager":
         if not isinstance(other, dict):
             raise TypeError(
@@ -38,13 +64,11 @@ class ScheduleManager(Manager):
         return self
 
     def __getitem__(self, schedule_id: ScheduleID | int) -> "HormoneSchedule":
-        schedules = self.get_schedules()
         if isinstance(schedule_id, int):
-            return schedules[schedule_id]
+            return self.get_schedules()[schedule_id]
 
-        for schedule in schedules:
-            if schedule.schedule_id == schedule_id:
-                return schedule
+        elif schedule := self._get_index().get(schedule_id):
+            return schedule
 
         raise KeyError(f"No such schedule: {schedule_id}")
 
@@ -57,18 +81,49 @@ class ScheduleManager(Manager):
         return self.patchdata.open(self._DB_KEY)
 
     def get(self, schedule_id: ScheduleID) -> Optional["HormoneSchedule"]:
-        schedules = self.get_schedules()
-        for schedule in schedules:
-            if schedule.schedule_id == schedule_id:
-                return schedule
-
-        return None
+        return self._get_index().get(schedule_id)
 
     def get_schedules(self) -> list["HormoneSchedule"]:
         """
         Get the schedules stored on the system.
         """
-        return self.db.load_list(HormoneSchedule, patchdata=self.patchdata)
+        return list(self._get_index().values())
+
+    def _get_index(self) -> dict[ScheduleID, "HormoneSchedule"]:
+        # NOTE: The schedules are only loaded and validated again once the
+        #   stored data changes, so lookups stay cheap for many schedules.
+        self.patchdata.migrate()
+        generation = self.db.generation()
+        if self._index is None or self._index[0] != generation:
+            with span("schedules.load"):
+                schedules = self.db.load_list(HormoneSchedule, patchdata=self.patchdata)
+
+            self._index = (generation, {s.schedule_id: s for s in schedules})
+
+        return self._index[1]
+
+    def _advance_index(
+        self,
+        added: dict[ScheduleID, "HormoneSchedule"] | None = None,
+        removed: list[ScheduleID] | None = None,
+    ):
+        # NOTE: After this manager's own write, change the index in place
+        #   instead of loading and validating every schedule again. It is
+        #   only reloaded once someone else writes. The generations come from
+        #   the write itself, so a write right before or after it still counts.
+        if (
+            self._index is None
+            or (last_write := self.db.last_write) is None
+            or self._index[0] != last_write[0]
+        ):
+            return
+
+        index = self._index[1]
+        for schedule_id in removed or []:
+            index.pop(schedule_id, None)
+
+        index.update(added or {})
+        self._index = (last_write[1], index)
 
     def create_schedule(
         self,
@@ -76,6 +131,7 @@ class ScheduleManager(Manager):
         expiration: ExpirationDuration,
         schedule_id: str | None = None,
         quantity: int = 1,
+        recurrence: Recurrence | str | None = None,
     ):
         """
         Create a new schedule.
@@ -85,43 +141,172 @@ class ScheduleManager(Manager):
             expiration (ExpirationDuration): The expiration duration to use.
             schedule_id (str): The ID of the schedule to create.
             quantity (int): The quantity of the schedule to create.
+            recurrence (Recurrence | str | None): A calendar rule such as
+              ``"mon/thu 9am"`` deciding expirations instead of the duration.
+        """
+        with span("schedules.create", schedule_id=schedule_id or ""):
+            self.create_schedules(
+                [
+                    {
+                        "delivery_method": delivery_method,
+                        "expiration": expiration,
+                        "schedule_id": schedule_id,
+                        "quantity": quantity,
+                        "recurrence": recurrence,
+                    }
+                ]
+            )
+
+    def create_schedules(self, schedules: list[dict]):
+        """
+        Create several schedules with a single write.
+
+        Args:
+            schedules (list[dict]): The keyword arguments for
+              :meth:`create_schedule`, one dict per schedule.
         """
-        existing_schedules = self.get_schedules()
-        if len(existing_schedules) == self._max_schedules:
-            # The performance of this application assumes a small number of schedules.
-            # However, smart enough users can change the max if they so desire.
+        existing = self._get_index()
+        if self._max_schedules is not None and (
+            len(existing) + len(schedules) > self._max_schedules
+        ):
             raise ValueError("Maximum schedules reached")
 
+        new_schedules: dict[ScheduleID, HormoneSchedule] = {}
+        for kwargs in schedules:
+            schedule = self._new_schedule(existing, new_schedules, **kwargs)
+            new_schedules[schedule.schedule_id] = schedule
+
+        with self.patchdata.journal.record("create", schedule_ids=list(new_schedules)):
+            # NOTE: The IDs are new, so the stored schedules are not rewritten.
+            records = self.db.append_list_objects(
+                list(new_schedules.values()), id_key="schedule_id"
+            )
+
+        for schedule, record in zip(new_schedules.values(), records):
+            # Stored with its sync version.
+            schedule.hlc = record.get("hlc")
+
+        self._advance_index(added=new_schedules)
+
+        for schedule_id in new_schedules:
+            self.patchdata.event_bus.publish(EventType.SCHEDULE_CREATED, schedule_id)
+
+    def _new_schedule(
+        self,
+        existing: dict[ScheduleID, "HormoneSchedule"],
+        pending: dict[ScheduleID, "HormoneSchedule"],
+        delivery_method: DeliveryMethod,
+        expiration: ExpirationDuration,
+        schedule_id: str | None = None,
+        quantity: int = 1,
+        recurrence: Recurrence | str | None = None,
+    ) -> "HormoneSchedule":
+        quantity = validate_quantity(quantity, max_quantity=self._max_quantity)
         if schedule_id is None:
             # Create a default one using the delivery method and existing schedules.
-            matching_schedules = [
-                s for s in existing_schedules if s.delivery_method == delivery_method
-            ]
-            index = len(matching_schedules)
+            index = sum(
+                1
+                for s in (*existing.values(), *pending.values())
+                if s.delivery_method == delivery_method
+            )
             schedule_id = f"{delivery_method.lower().capitalize()} Schedule {index}"
 
-        else:
-            # Ensure it does not exist.
-            for schedule in existing_schedules:
-                if schedule.schedule_id == schedule_id:
-                    raise ValueError(
-                        f"Schedule already exists with ID '{schedule_id}'."
-                    )
-
-        new_schedule = HormoneSchedule(
+        elif schedule_id in existing or schedule_id in pending:
+            raise ValueError(f"Schedule already exists with ID '{schedule_id}'.")
+
+        return HormoneSchedule(
             expiration_duration=expiration,
             delivery_method=delivery_method,
             schedule_id=schedule_id,
             quantity=quantity,
+            recurrence=recurrence,
             patchdata=self.patchdata,
         )
-        self.db.persist_list_object(new_schedule, id_key="schedule_id")
+
+    def repair(self, all_schedules: bool = False) -> list[ScheduleID]:
+        """
+        Store the fixes that reads found and only applied in memory, in one
+        pass.
+
+        Args:
+            all_schedules (bool): Check every schedule instead of only the
+              ones queued by earlier reads in this process.
+
+        Returns:
+            list[ScheduleID]: The IDs of the schedules that were repaired.
+        """
+        repaired = []
+        for schedule in self.get_schedules():
+            queued = schedule.db.key in self.patchdata.pending_repairs
+            if (all_schedules or queued) and schedule.repair():
+                repaired.append(schedule.schedule_id)
+
+        return repaired
 
     def remove_schedule(self, schedule_id: ScheduleID):
-        if not (schedule := self.get(schedule_id)):
-            raise ScheduleNotExistsError(schedule_id)
+        with span("schedules.remove", schedule_id=schedule_id):
+            if not (schedule := self.get(schedule_id)):
+                raise ScheduleNotExistsError(schedule_id)
+
+            with self.patchdata.journal.record("remove", schedule_ids=[schedule_id]):
+                self.db.delete_list_object(schedule, id_key="schedule_id")
+                schedule.db.delete(id_key="hormone_id", versioned=True)
+                self.patchdata.inventory.remove(schedule_id)
+
+            self._advance_index(removed=[schedule_id])
 
-        self.db.delete_list_object(schedule)
+            self.patchdata.event_bus.publish(EventType.SCHEDULE_REMOVED, schedule_id)
+
+    def take_expired(
+        self,
+        schedule_ids: list[ScheduleID] | None = None,
+        date: datetime | None = None,
+    ) -> dict[ScheduleID, list[HormoneApplication]]:
+        """
+        Take every hormone that is due, across schedules, as one undoable
+        operation. Each schedule's hormones are written once.
+
+        Args:
+            schedule_ids (list[ScheduleID] | None): The schedules to take.
+              Defaults to all of them.
+            date (datetime | None): When they were taken. Defaults to now.
+              Dates with a time zone are converted to local time.
+
+        Returns:
+            dict[ScheduleID, list[HormoneApplication]]: What was taken, for
+            the schedules that had anything due.
+        """
+        date = to_local(date) if date else get_clock().now()
+        if schedule_ids is None:
+            schedules = self.get_schedules()
+        else:
+            schedules = []
+            for schedule_id in schedule_ids:
+                if not (schedule := self.get(schedule_id)):
+                    raise ScheduleNotExistsError(schedule_id)
+
+                schedules.append(schedule)
+
+        due = [
+            (s, hormones) for s in schedules if (hormones := s.get_due_hormones(date))
+        ]
+        if not due:
+            return {}
+
+        with span("schedules.take", count=len(due)):
+            with self.patchdata.journal.record(
+                "take", schedule_ids=[s.schedule_id for s, _ in due]
+            ):
+                taken = {s.schedule_id: s._apply(hormones, date) for s, hormones in due}
+                applications = [a for x in taken.values() for a in x]
+                self.patchdata.inventory.consume_all(
+                    [(s, len(taken[s.schedule_id])) for s, _ in due]
+                )
+                self.patchdata.history.extend(applications)
+
+            _publish_takes(self.patchdata, applications)
+
+        return taken
 
 
 class HormoneSchedule(BaseModel):
@@ -153,10 +338,27 @@ class HormoneSchedule(BaseModel):
     patches.
     """
 
+    recurrence: Recurrence | None = None
+    """
+    A calendar rule such as ``"mon/thu 9am"``. When set, hormones
+    expire at its next occurrence after being taken instead of
+    after the expiration duration.
+    """
+
+    hlc: str | None = None
+    """
+    The hybrid logical clock version of the last change, used
+    when syncing devices.
+    """
+
+    # Hormones are stored in the schedule's own partition.
+    storage_exclude: ClassVar[set[str]] = {"hormones"}
+
     def __init__(self, **kwargs):
         patchdata = kwargs.pop("patchdata")
         super().__init__(**kwargs)
         self._patchdata = patchdata
+        self._hormone_index: tuple[tuple, dict[HormoneID, Hormone]] | None = None
 
     def _repr_pretty_(self, prt, cycle):
         output = f"{self.schedule_id}\n\t"
@@ -169,7 +371,7 @@ class HormoneSchedule(BaseModel):
 
     @cached_property
     def _db_key(self) -> str:
-        return self.delivery_method.value.lower()
+        return get_hormones_key(self.schedule_id)
 
     @cached_property
     def db(self) -> ManagedData:
@@ -178,11 +380,30 @@ class HormoneSchedule(BaseModel):
     @computed_field  # type: ignore
     @property
     def hormones(self) -> list[Hormone]:
-        existing_list = self.db.load_list(
-            Hormone, expiration_duration=self.expiration_duration
+        return list(self._get_hormone_index().values())
+
+    def get_hormone(self, hormone_id: HormoneID) -> Hormone | None:
+        return self._get_hormone_index().get(hormone_id)
+
+    def _get_hormone_index(self) -> dict[HormoneID, Hormone]:
+        # NOTE: Hormones are only loaded and validated again once the stored
+        #   data changes.
+        generation = self.db.generation()
+        if self._hormone_index is None or self._hormone_index[0] != generation:
+            with span("schedule.hormones", schedule_id=self.schedule_id):
+                hormones = self._validate_hormones(self._load_hormones())
+
+            self._hormone_index = (generation, {h.hormone_id: h for h in hormones})
+
+        return self._hormone_index[1]
+
+    def _load_hormones(self) -> list[Hormone]:
+        return self.db.load_list(
+            Hormone,
+            expiration_duration=self.expiration_duration,
+            schedule_id=self.schedule_id,
+            recurrence=self.recurrence,
         )
-        self._validate_hormones(existing_list)
-        return existing_list
 
     @property
     def active_hormones(self) -> list[Hormone]:
@@ -201,42 +422,155 @@ class HormoneSchedule(BaseModel):
         """
         The next hormone to worry about changing.
         """
-        if inactive_hormone := self.inactive_hormones:
-            # Any inactive hormone is considered most last (and most next).
-            return inactive_hormone[0]
+        hormones = self.hormones
+        for hormone in hormones:
+            if not hormone.active:
+                # Any inactive hormone is considered most last (and most next).
+                return hormone
 
-        return min(self.active_hormones)
+        return min(hormones)
 
     @property
     def last_taken_hormone(self) -> Hormone | None:
         return max(self.active_hormones)
 
-    def take_next_hormone(self):
-        hormone = self.next_expired_hormone
-        hormone.apply()
-        self.db.persist_list_object(hormone, id_key="hormone_id")
+    def get_due_hormones(self, date: datetime | None = None) -> list[Hormone]:
+        """
+        The hormones not taken yet or expired at the given time.
+
+        Args:
+            date (datetime | None): Defaults to now. Dates with a time zone
+              are converted to local time.
+
+        Returns:
+            list[Hormone]
+        """
+        date = to_local(date) if date else get_clock().now()
+        return [
+            h
+            for h in self.hormones
+            if (expiration_date := h.expiration_date) is None or expiration_date <= date
+        ]
+
+    def take_next_hormone(self) -> HormoneApplication:
+        (application,) = self._take(lambda _: [self.next_expired_hormone])
+        return application
+
+    def take(
+        self,
+        hormone_ids: list[HormoneID] | None = None,
+        date: datetime | None = None,
+    ) -> list[HormoneApplication]:
+        """
+        Take several hormones at once, with one write.
 
-    def _validate_hormones(self, existing_list: list[Hormone]):
+        Args:
+            hormone_ids (list[HormoneID] | None): The hormones to take.
+              Defaults to the ones that are due.
+            date (datetime | None): When they were taken. Defaults to now.
+              Dates with a time zone are converted to local time.
+
+        Returns:
+            list[HormoneApplication]
+        """
+        if hormone_ids is None:
+            return self._take(self.get_due_hormones, date)
+
+        def select(_) -> list[Hormone]:
+            index = self._get_hormone_index()
+            if missing := [x for x in hormone_ids if x not in index]:
+                raise KeyError(f"No such hormone: {missing[0]}")
+
+            return [index[x] for x in dict.fromkeys(hormone_ids)]
+
+        return self._take(select, date)
+
+    def _take(
+        self,
+        select: Callable[[datetime], list[Hormone]],
+        date: datetime | None = None,
+    ) -> list[HormoneApplication]:
+        with span("schedule.take", schedule_id=self.schedule_id) as take_span:
+            date = to_local(date) if date else get_clock().now()
+            hormones = select(date)
+            take_span.set_attribute("count", len(hormones))
+            if not hormones:
+                return []
+
+            with self._patchdata.journal.record(
+                "take", schedule_ids=[self.schedule_id]
+            ):
+                applications = self._apply(hormones, date)
+                self._patchdata.inventory.consume_all([(self, len(applications))])
+                self._patchdata.history.extend(applications)
+
+            _publish_takes(self._patchdata, applications)
+
+        return applications
+
+    def _apply(
+        self, hormones: list[Hormone], date: datetime
+    ) -> list[HormoneApplication]:
+        # Apply the hormones in memory, then save the whole list once so any
+        # in-memory defaults or trimming are stored too.
+        applications = []
+        for hormone in hormones:
+            application = HormoneApplication.from_hormone(
+                hormone,
+                date=date,
+                schedule_id=self.schedule_id,
+                location=hormone.location,
+            )
+            hormone.apply(application)
+            applications.append(application)
+
+        try:
+            self.db.persist_list(self.hormones, id_key="hormone_id")
+        except BaseException:
+            # The cached hormones were changed but not saved.
+            self._hormone_index = None
+            raise
+
+        self._patchdata.pending_repairs.discard(self.db.key)
+        return applications
+
+    def repair(self) -> bool:
+        """
+        Store the defaults or trimming that reads only apply in memory.
+
+        Returns:
+            bool: ``True`` if anything was written.
+        """
+        stored = self._load_hormones()
+        hormones = self._validate_hormones(stored)
+        self._patchdata.pending_repairs.discard(self.db.key)
+        if hormones == stored:
+            return False
+
+        with span("schedule.repair", schedule_id=self.schedule_id):
+            self.db.persist_list(hormones, id_key="hormone_id")
+
+        return True
+
+    def _validate_hormones(self, existing_list: list[Hormone]) -> list[Hormone]:
+        # NOTE: Never writes; fixes are made in memory and queued for `repair()`.
         existing_size = len(existing_list)
         if existing_size == self.quantity:
             # It is good.
-            return
+            return existing_list
+
+        self._patchdata.pending_repairs.add(self.db.key)
+        if existing_size < self.quantity:
+            return self._init_default_hormones(existing_list)
+
+        # NOTE: This state is not supposed to happen,
+        # but may during development. Keep the hormones that
+        # make the most sense to keep.
+        active_hormones = [h for h in existing_list if h.active]
+        inactive_hormones = [h for h in existing_list if not h.active]
+        return [*active_hormones, *inactive_hormones][: self.quantity]
 
-        elif existing_size < self.quantity:
-            self._init_default_hormones(existing_list)
-
-        elif existing_size > self.quantity:
-            # NOTE: This state is not supposed to happen,
-            # but may during development. Try to delete hormones that
-            # make the most sense to delete.
-            active_hormones = [h for h in existing_list if h.active]
-            inactive_hormones = [h for h in existing_list if not h.active]
-            hormones_to_persist = [*active_hormones, *inactive_hormones][
-                : self.quantity
-            ]
-            self.db.persist_list(hormones_to_persist)
-
-    def _init_default_hormones(self, existing_list: list[Hormone]):
+    def _init_default_hormones(self, existing_list: list[Hormone]) -> list[Hormone]:
         # NOTE: Assumes hormones size is less than the quantity defined in the schedule.
 
         # If we do 1 greater than the max, it should for sure be a unique ID.
@@ -249,15 +583,25 @@ class HormoneSchedule(BaseModel):
         )
 
         # Set defaults for any missing.
-        did_add = False
+        hormones = list(existing_list)
         for idx in range(len(existing_list), self.quantity):
             hormone_id = max_id + idx
             default_hormone = Hormone(
-                expiration_duration=self.expiration_duration, hormone_id=hormone_id
+                expiration_duration=self.expiration_duration,
+                hormone_id=hormone_id,
+                schedule_id=self.schedule_id,
+                recurrence=self.recurrence,
             )
-            existing_list.append(default_hormone)
-            did_add = True
+            hormones.append(default_hormone)
 
-        if did_add:
-            # Persist the defaults so we don't have to generate them again.
-            self.db.persist_list(existing_list)
+        return hormones
+
+
+def _publish_takes(patchdata: "PatchData", applications: list[HormoneApplication]):
+    for application in applications:
+        patchdata.event_bus.publish(
+            EventType.HORMONE_TAKEN,
+            application.schedule_id,
+            hormone_id=application.hormone_id,
+            date=application.date,
+        )
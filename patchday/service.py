@@ -1,8 +1,124 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel
+
+from patchday.events import ExpirationWatcher, format_sse
+from patchday.exceptions import ScheduleNotExistsError
+from patchday.logging import logger
 from patchday.main import patchday
-from patchday.schedule import HormoneSchedule
+from patchday.models import HormoneApplication
+from patchday.schedule import HormoneSchedule, ScheduleManager
+from patchday.storage import file_lock
+from patchday.sync import Delta
+from patchday.tracing import span
+from patchday.types import HormoneID, LocalDatetime, ScheduleID
+
+# How often idle event streams send something so proxies keep them open.
+KEEP_ALIVE_SECONDS = 15
+
+# Clients may send their own correlation ID; it is echoed on the response.
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# How often old application history is compacted.
+COMPACT_INTERVAL_SECONDS = 6 * 3600
+
+
+class ScheduleResponses:
+    """
+    The encoded ``/schedules`` response, kept per schedule and keyed by the
+    generations of the stored data it came from, so unchanged schedules are
+    not serialized again.
+    """
+
+    def __init__(self):
+        self._fragments: dict[str, tuple[tuple, bytes]] = {}
+        self._body: tuple[tuple, bytes] | None = None
+
+    def render(self, schedules: ScheduleManager) -> bytes:
+        schedules_generation = schedules.db.generation()
+        generations = []
+        fragments = {}
+        for schedule in schedules.get_schedules():
+            generation = (schedules_generation, schedule.db.generation())
+            cached = self._fragments.get(schedule.schedule_id)
+            if cached is None or cached[0] != generation:
+                cached = (generation, schedule.model_dump_json().encode())
+
+            fragments[schedule.schedule_id] = cached
+            generations.append(generation)
+
+        key = tuple(generations)
+        if self._body is None or self._body[0] != key:
+            # NOTE: Assigned whole, so concurrent requests never see a mix.
+            body = b"[" + b",".join(f for _, f in fragments.values()) + b"]"
+            self._fragments = fragments
+            self._body = (key, body)
+
+        return self._body[1]
+
+
+schedule_responses = ScheduleResponses()
+
+
+async def compact_history():
+    # Every worker runs this, but only the one holding the compactor lock
+    # compacts. The others keep trying, in case that worker exits.
+    while not patchday.read_only:
+        with file_lock(patchday.history.compactor_lock_file, blocking=False) as held:
+            while held:
+                try:
+                    await asyncio.to_thread(patchday.history.compact)
+                except (OSError, ValueError) as err:
+                    logger.error("Compacting history failed: %s", err, exc_info=err)
+
+                await asyncio.sleep(COMPACT_INTERVAL_SECONDS)
+
+        await asyncio.sleep(COMPACT_INTERVAL_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    watcher = ExpirationWatcher(patchday.schedules, patchday.event_bus)
+    tasks = [asyncio.create_task(watcher.run()), asyncio.create_task(compact_history())]
+    yield
+    for task in tasks:
+        task.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
+
 
-app = FastAPI()
+@app.middleware("http")
+async def correlate_requests(request: Request, call_next):
+    with (
+        logger.correlate(request.headers.get(REQUEST_ID_HEADER)) as request_id,
+        span(
+            "http.request",
+            method=request.method,
+            path=request.url.path,
+            request_id=request_id,
+        ),
+    ):
+        start = time.perf_counter()
+        response = await call_next(request)
+        logger.debug(
+            "%s %s %s",
+            request.method,
+            request.url.path,
+            response.status_code,
+            context=lambda: {
+                "method": request.method,
+                "path": request.url.path,
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            },
+        )
+        response.headers[REQUEST_ID_HEADER] = request_id
+        return response
 
 
 @app.get("/schedules", response_model=list[HormoneSchedule])
@@ -10,4 +126,192 @@ def get_schedules():
     """
     Retrieve a list of your schedules.
     """
-    return list(patchday.schedules)
+    # NOTE: Returning a response skips validating and serializing the models
+    #   again; `response_model` only documents it.
+    body = schedule_responses.render(patchday.schedules)
+    return Response(content=body, media_type="application/json")
+
+
+class TakeRequest(BaseModel):
+    """
+    What to take and when.
+    """
+
+    hormone_ids: list[HormoneID] | None = None
+    """
+    The hormones to take. Defaults to the ones that are due.
+    """
+
+    date: LocalDatetime | None = None
+    """
+    When they were taken. Defaults to now.
+    """
+
+
+class TakeExpiredRequest(BaseModel):
+    """
+    Which schedules to take everything due from, and when.
+    """
+
+    schedule_ids: list[ScheduleID] | None = None
+    """
+    The schedules. Defaults to all of them.
+    """
+
+    date: LocalDatetime | None = None
+    """
+    When they were taken. Defaults to now.
+    """
+
+
+@app.post("/schedules/{schedule_id}/take", response_model=list[HormoneApplication])
+def take(schedule_id: ScheduleID, request: TakeRequest | None = None):
+    """
+    Take several of a schedule's hormones at once.
+    """
+    request = request or TakeRequest()
+    if (schedule := patchday.schedules.get(schedule_id)) is None:
+        raise HTTPException(status_code=404, detail=f"No such schedule: {schedule_id}")
+
+    try:
+        return schedule.take(request.hormone_ids, date=request.date)
+    except KeyError as err:
+        raise HTTPException(status_code=404, detail=err.args[0])
+
+
+@app.post("/take", response_model=dict[ScheduleID, list[HormoneApplication]])
+def take_expired(request: TakeExpiredRequest | None = None):
+    """
+    Take everything that is due across schedules, one write per file.
+    """
+    request = request or TakeExpiredRequest()
+    try:
+        return patchday.schedules.take_expired(request.schedule_ids, date=request.date)
+    except ScheduleNotExistsError as err:
+        raise HTTPException(status_code=404, detail=f"{err}")
+
+
+@app.get("/inventory")
+def get_inventory():
+    """
+    The supply of each tracked schedule and when it runs out.
+    """
+    return [
+        {**supply._asdict(), "low": supply.is_low()}
+        for supply in patchday.inventory.load()
+    ]
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Storage metrics in the Prometheus text format.
+    """
+    return patchday.metrics.format_prometheus()
+
+
+@app.get("/events")
+async def stream_events(request: Request):
+    """
+    Stream schedule changes and expirations as server-sent events.
+    """
+    subscription = patchday.event_bus.subscribe()
+
+    async def event_stream():
+        dropped = 0
+        try:
+            while not await request.is_disconnected():
+                event = await subscription.aget(timeout=KEEP_ALIVE_SECONDS)
+                if subscription.dropped != dropped:
+                    # The client fell behind; tell it to re-fetch the schedules.
+                    dropped = subscription.dropped
+                    yield "event: RESYNC\ndata: {}\n\n"
+
+                yield format_sse(event) if event else ": keep-alive\n\n"
+
+        finally:
+            subscription.close()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@app.websocket("/events/ws")
+async def websocket_events(websocket: WebSocket):
+    """
+    Stream schedule changes and expirations over a WebSocket.
+    """
+    await websocket.accept()
+    subscription = patchday.event_bus.subscribe()
+
+    async def send_events():
+        async for event in subscription:
+            await websocket.send_text(event.model_dump_json())
+
+    async def wait_for_disconnect():
+        # Clients only send to close, so this notices idle ones going away.
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = {
+        asyncio.create_task(send_events()),
+        asyncio.create_task(wait_for_disconnect()),
+    }
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if (error := task.exception()) and not isinstance(
+                error, WebSocketDisconnect
+            ):
+                raise error
+
+    finally:
+        subscription.close()
+        for task in tasks:
+            task.cancel()
+
+
+@app.post("/undo")
+def undo():
+    """
+    Undo the last take or schedule change.
+    """
+    if (entry := patchday.journal.undo()) is None:
+        raise HTTPException(status_code=409, detail="Nothing to undo.")
+
+    return entry
+
+
+@app.post("/redo")
+def redo():
+    """
+    Redo the last undone change.
+    """
+    if (entry := patchday.journal.redo()) is None:
+        raise HTTPException(status_code=409, detail="Nothing to redo.")
+
+    return entry
+
+
+@app.get("/sync/node")
+def get_sync_node():
+    """
+    Identify this service to syncing devices.
+    """
+    return {"node_id": patchday.replica.node_id}
+
+
+@app.get("/sync", response_model=Delta)
+def get_sync_delta(since: str | None = None, exclude_node: str | None = None):
+    """
+    Get the changes made after the ``since`` clock value.
+    """
+    return patchday.replica.changes_since(since=since, exclude_node=exclude_node)
+
+
+@app.post("/sync")
+def post_sync_delta(delta: Delta):
+    """
+    Merge another device's changes.
+    """
+    applied = patchday.replica.apply(delta)
+    return {"applied": applied, "clock": str(patchday.replica.clock)}
@@ -0,0 +1,121 @@
+import marshal
+import mmap
+import struct
+import zlib
+from functools import cached_property
+from pathlib import Path
+from urllib.parse import quote
+
+from patchday.storage import file_lock, write_atomic
+
+# Where cached data lives, inside the storage directory.
+CACHE_DIR = ".cache"
+
+# Magic, then the generation and the stat (inode, mtime in ns, size) of the
+# file it was parsed from.
+HEADER = struct.Struct("<4sQQqQ")
+MAGIC = b"PDC2"
+
+# The shared write counters. Keys share a slot by hash, which only ever
+# invalidates more than needed.
+COUNTERS_FILE = "generations.counters"
+COUNTER = struct.Struct("<Q")
+COUNTER_SLOTS = 1 << 16
+
+
+class SharedCache:
+    """
+    Parsed storage data shared by every process using the same storage
+    directory, such as the workers of ``uvicorn --workers N``. Entries are
+    files in a compact binary encoding that loads faster than JSON; each
+    process still decodes its own copy.
+
+    Processes sharing the cache count their writes in memory-mapped
+    generation counters, and each entry is stamped with its key's
+    generation and the stat of the file it was parsed from. The generation
+    catches writes the stat cannot tell apart, such as two within one mtime
+    tick that reuse an inode; the stat catches writes from processes not
+    sharing the cache. Either way, no entry is served after its file changed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path / CACHE_DIR
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self, key: str) -> int:
+        """
+        The number of writes to a key made by every process sharing the cache.
+        """
+        if (counters := self._counters) is None:
+            return 0
+
+        return COUNTER.unpack_from(counters, self._slot(key))[0]
+
+    def count_write(self, key: str):
+        """
+        Move a key to its next generation, after writing it.
+        """
+        if (counters := self._counters) is None:
+            return
+
+        with file_lock(self.path / f".{COUNTERS_FILE}.lock"):
+            offset = self._slot(key)
+            COUNTER.pack_into(
+                counters, offset, COUNTER.unpack_from(counters, offset)[0] + 1
+            )
+
+    def get(self, key: str, stamp: tuple[int, int, int, int]) -> list | dict | None:
+        """
+        The data cached for a key, or ``None`` if it was not parsed from the
+        file with the given generation and stat.
+        """
+        try:
+            content = self._get_path(key).read_bytes()
+            if content[: HEADER.size] != HEADER.pack(MAGIC, *stamp):
+                self.misses += 1
+                return None
+
+            data = marshal.loads(memoryview(content)[HEADER.size :])
+        except (FileNotFoundError, ValueError, EOFError, TypeError):
+            # Missing, cut short or from another version.
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return data
+
+    def put(self, key: str, stamp: tuple[int, int, int, int], data: list | dict):
+        """
+        Cache data parsed from the file with the given generation and stat.
+        """
+        content = HEADER.pack(MAGIC, *stamp) + marshal.dumps(data)
+        write_atomic(self._get_path(key), content)
+
+    def clear(self):
+        # NOTE: The counters stay; other processes have them mapped.
+        if self.path.is_dir():
+            for file in self.path.glob("*.bin"):
+                file.unlink(missing_ok=True)
+
+    @cached_property
+    def _counters(self) -> mmap.mmap | None:
+        size = COUNTER.size * COUNTER_SLOTS
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            with open(self.path / COUNTERS_FILE, "a+b") as file:
+                if file.seek(0, 2) < size:
+                    # Zeros, so it is the same whichever process gets here first.
+                    file.truncate(size)
+
+                return mmap.mmap(file.fileno(), size)
+        except OSError:
+            # E.g. read-only storage; entries are still checked by stat.
+            return None
+
+    def _slot(self, key: str) -> int:
+        # NOTE: Not `hash()`, which differs between processes.
+        return zlib.crc32(key.encode("utf-8")) % COUNTER_SLOTS * COUNTER.size
+
+    def _get_path(self, key: str) -> Path:
+        return self.path / f"{quote(key, safe='')}.bin"
@@ -0,0 +1,319 @@
+import heapq
+import random
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, NamedTuple
+
+from patchday.clock import ManualClock, use_clock
+from patchday.main import PatchDay
+from patchday.models import HormoneApplication
+from patchday.storage import MemoryPatchData
+
+if TYPE_CHECKING:
+    from patchday.events import ExpirationWatcher
+    from patchday.schedule import HormoneSchedule
+    from patchday.storage import PatchData
+    from patchday.types import DeliveryMethod, ExpirationDuration, ScheduleID
+
+YEAR = timedelta(days=365)
+
+_MICROSECOND = timedelta(microseconds=1)
+
+# Sorts before any expiration, for hormones never taken.
+_NOT_TAKEN = float("-inf")
+
+
+class Adherence(NamedTuple):
+    """
+    How a simulated user takes their hormones.
+    """
+
+    delay: timedelta = timedelta(0)
+    """
+    How long after a hormone is due it is usually taken.
+    """
+
+    jitter: timedelta = timedelta(0)
+    """
+    Up to this much random extra delay.
+    """
+
+    miss_rate: float = 0.0
+    """
+    The chance a dose is forgotten until ``retry`` later.
+    """
+
+    retry: timedelta = timedelta(days=1)
+    """
+    How long a forgotten dose goes untaken.
+    """
+
+
+class SimulationResult(NamedTuple):
+    """
+    What happened in a simulation run.
+    """
+
+    takes: int
+    """
+    The number of hormones taken.
+    """
+
+    missed: int
+    """
+    The number of doses forgotten at first.
+    """
+
+    late: timedelta
+    """
+    The total time hormones stayed expired before being taken.
+    """
+
+    notifications: int
+    """
+    The number of expiration events published, if watching.
+    """
+
+    schedule_years: float
+    """
+    How many years of schedules were simulated.
+    """
+
+    elapsed: float
+    """
+    The wall-clock seconds the run took.
+    """
+
+    @property
+    def mean_delay(self) -> timedelta:
+        return self.late / self.takes if self.takes else timedelta(0)
+
+    @property
+    def schedule_years_per_second(self) -> float:
+        return self.schedule_years / self.elapsed if self.elapsed else 0.0
+
+
+class _LeanSchedule:
+    """
+    A schedule's hormones as plain values while a run takes them, so a take
+    costs a heap operation instead of a validated, stamped and summarized
+    write. Times are whole microseconds since the run started. Nothing is
+    stored until :meth:`save`.
+    """
+
+    __slots__ = ("due", "duration", "origin", "schedule", "takes")
+
+    def __init__(self, schedule: "HormoneSchedule", origin: datetime):
+        self.schedule = schedule
+        self.origin = origin
+        # (expiration, position), so hormones never taken come first and
+        # ties go to the earlier hormone, like `next_expired_hormone`.
+        self.due = [
+            (self._offset(h.expiration_date) if h.active else _NOT_TAKEN, idx)
+            for idx, h in enumerate(schedule.hormones)
+        ]
+        heapq.heapify(self.due)
+        self.duration = (
+            None
+            if schedule.recurrence
+            else schedule.expiration_duration.timedelta // _MICROSECOND
+        )
+        # (position, time) of each take.
+        self.takes: list[tuple[int, int]] = []
+
+    def next_due(self) -> int | None:
+        """
+        When the next hormone expires, or ``None`` if one was never taken.
+        """
+        due = self.due[0][0]
+        return None if due == _NOT_TAKEN else due
+
+    def take(self, offset: int) -> int:
+        """
+        Take the next hormone, returning its position.
+        """
+        idx = self.due[0][1]
+        self.takes.append((idx, offset))
+        if (duration := self.duration) is not None:
+            expiration = offset + duration
+        else:
+            date = self.schedule.recurrence.next_after(self.date(offset))
+            expiration = self._offset(date)
+
+        heapq.heapreplace(self.due, (expiration, idx))
+        return idx
+
+    def date(self, offset: int) -> datetime:
+        return self.origin + timedelta(microseconds=offset)
+
+    def save(self, app: PatchDay):
+        """
+        Store the hormones and their applications, with one write each.
+        """
+        if not self.takes:
+            return
+
+        schedule = self.schedule
+        hormones = schedule.hormones
+        for idx, offset in dict(self.takes).items():
+            hormones[idx].date_applied = self.date(offset)
+
+        schedule.db.persist_list(hormones, id_key="hormone_id")
+        takes, self.takes = self.takes, []
+
+        def build() -> list[HormoneApplication]:
+            return [
+                HormoneApplication(
+                    hormone_id=hormones[idx].hormone_id,
+                    date=self.date(offset),
+                    schedule_id=schedule.schedule_id,
+                    location=hormones[idx].location,
+                )
+                for idx, offset in takes
+            ]
+
+        app.history.extend_later(build)
+        app.inventory.consume_all([(schedule, len(takes))])
+
+    def _offset(self, date: datetime) -> int:
+        return (date - self.origin) // _MICROSECOND
+
+
+class Simulation:
+    """
+    Replays months or years of schedules in accelerated time. A discrete
+    event queue jumps a manual clock straight to the next take, so the cost
+    depends on the number of takes, not on the time simulated. Runs use
+    in-memory storage by default.
+
+    Takes are made on plain values and stored once at the end of
+    :meth:`run`, so no ``HORMONE_TAKEN`` events are published and the
+    inventory is consumed all at once.
+    """
+
+    def __init__(
+        self,
+        start: datetime | None = None,
+        adherence: Adherence | None = None,
+        seed: int | None = None,
+        patchdata: "PatchData | None" = None,
+        watch: bool = False,
+    ):
+        """
+        Args:
+            start (datetime | None): The simulated start time. Defaults to now.
+            adherence (Adherence | None): How hormones are taken. Defaults to
+              always on time.
+            seed (int | None): Seed the random adherence for repeatable runs.
+            patchdata (PatchData | None): The storage. Defaults to memory.
+            watch (bool): Also publish expiration events, like the service.
+        """
+        self.clock = ManualClock(start)
+        self.adherence = adherence or Adherence()
+        self.random = random.Random(seed)
+        self.app = PatchDay(
+            patchdata=patchdata or MemoryPatchData(),
+            max_schedules=None,
+            max_quantity=None,
+        )
+        # NOTE: Nobody undoes a simulated take, and the undo history would be
+        #   rewritten on every one.
+        self.app.journal.size = 0
+        self.watch = watch
+
+    def add_schedule(
+        self,
+        delivery_method: "DeliveryMethod",
+        expiration: "ExpirationDuration | str | int",
+        quantity: int = 1,
+        schedule_id: "ScheduleID | None" = None,
+    ) -> "HormoneSchedule":
+        schedule_id = schedule_id or f"Schedule {len(self.app.schedules) + 1}"
+        with use_clock(self.clock):
+            self.app.schedules.create_schedule(
+                delivery_method, expiration, schedule_id=schedule_id, quantity=quantity
+            )
+
+        return self.app.schedules[schedule_id]
+
+    def run(self, duration: timedelta) -> SimulationResult:
+        """
+        Simulate every schedule for the given duration.
+        """
+        started = time.perf_counter()
+        origin = self.clock.now()
+        end = duration // _MICROSECOND
+        schedules = [
+            _LeanSchedule(s, origin) for s in self.app.schedules.get_schedules()
+        ]
+        watcher = self._create_watcher() if self.watch else None
+        takes = missed = late = notifications = 0
+        take_time_for = self._take_times()
+        # (take time, missed, tie-breaker, due time, schedule)
+        queue: list[tuple[int, bool, int, int, _LeanSchedule]] = []
+        with use_clock(self.clock):
+            for idx, schedule in enumerate(schedules):
+                due = schedule.next_due()
+                due = 0 if due is None else due
+                queue.append((*take_time_for(due), idx, due, schedule))
+
+            heapq.heapify(queue)
+            while queue and queue[0][0] < end:
+                take_time, was_missed, idx, due, schedule = queue[0]
+                missed += was_missed
+                if watcher is not None:
+                    date = schedule.date(take_time)
+                    self.clock.set(date)
+                    notifications += len(watcher.check(date))
+
+                position = schedule.take(take_time)
+                if watcher is not None:
+                    # The watcher reads the loaded hormones, so keep them current.
+                    schedule.schedule.hormones[position].date_applied = date
+
+                takes += 1
+                late += take_time - due
+                if (due := schedule.next_due()) is None:
+                    due = take_time
+
+                heapq.heapreplace(queue, (*take_time_for(due), idx, due, schedule))
+
+            self.clock.set(origin + duration)
+            for schedule in schedules:
+                schedule.save(self.app)
+
+        return SimulationResult(
+            takes=takes,
+            missed=missed,
+            late=timedelta(microseconds=late),
+            notifications=notifications,
+            schedule_years=len(schedules) * (duration / YEAR),
+            elapsed=time.perf_counter() - started,
+        )
+
+    def _take_times(self) -> Callable[[int], tuple[int, bool]]:
+        # When the hormone due at a time is taken, and if it was forgotten.
+        miss_rate, rand = self.adherence.miss_rate, self.random.random
+        delay, jitter, retry = (
+            x // _MICROSECOND
+            for x in (self.adherence.delay, self.adherence.jitter, self.adherence.retry)
+        )
+
+        def take_time(due: int) -> tuple[int, bool]:
+            if miss_rate and rand() < miss_rate:
+                return due + retry, True
+
+            elif jitter:
+                return due + delay + int(rand() * jitter), False
+
+            return due + delay, False
+
+        return take_time
+
+    def _create_watcher(self) -> "ExpirationWatcher":
+        from patchday.events import ExpirationWatcher
+
+        watcher = ExpirationWatcher(self.app.schedules, self.app.event_bus)
+        watcher.last_checked = self.clock.now()
+        return watcher
@@ -0,0 +1,122 @@
+import json
+import sys
+from pathlib import Path
+
+from patchday.clock import get_clock
+from patchday.date import format_date
+from patchday.storage import PatchData
+from patchday.summary import ScheduleSummary
+
+# NOTE: `pday status` runs on every shell prompt or status-bar tick, so this
+#   module only reads the summary file and must never import click, pydantic,
+#   Textual or FastAPI.
+STATUS_FORMATS = ("short", "long", "json")
+
+
+def get_most_urgent(summaries: list[ScheduleSummary]) -> ScheduleSummary | None:
+    """
+    The schedule that needs attention first. A schedule with hormones that
+    have not been taken yet beats any expiration date.
+    """
+    return min(
+        summaries,
+        key=lambda s: (s.next_expiration is not None, s.next_expiration or 0),
+        default=None,
+    )
+
+
+def _describe(summary: ScheduleSummary) -> str:
+    if exp_date := summary.next_expiration_date:
+        return format_date(exp_date)
+
+    return "not taken yet"
+
+
+def get_status(path: Path | None = None, output_format: str = "short") -> str:
+    """
+    Render the status line(s).
+
+    Args:
+        path (Path | None): The storage path. Defaults to the XDG config dir.
+        output_format (str): One of ``short``, ``long`` or ``json``.
+
+    Returns:
+        str: The text to print.
+    """
+    if output_format not in STATUS_FORMATS:
+        raise ValueError(f"Unknown status format '{output_format}'.")
+
+    summaries = PatchData(path=path).summary.load()
+    if output_format == "long":
+        ordered = sorted(
+            summaries,
+            key=lambda s: (s.next_expiration is not None, s.next_expiration or 0),
+        )
+        return "\n".join(f"{s.schedule_id}: {_describe(s)}" for s in ordered)
+
+    urgent = get_most_urgent(summaries)
+    if output_format == "json":
+        if urgent is None:
+            return "{}"
+
+        return json.dumps(
+            {
+                "schedule_id": urgent.schedule_id,
+                "delivery_method": urgent.delivery_method,
+                "next_expiration": urgent.next_expiration,
+                "expired": (
+                    urgent.next_expiration is not None
+                    and urgent.next_expiration <= get_clock().time()
+                ),
+                "text": _describe(urgent),
+            }
+        )
+
+    elif urgent is None:
+        return ""
+
+    return f"{urgent.schedule_id}: {_describe(urgent)}"
+
+
+def parse_format(args: list[str]) -> str | None:
+    """
+    Parse ``status`` arguments without click. Returns ``None`` for anything
+    it does not understand so the caller can fall back to the full CLI.
+    """
+    output_format = "short"
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg.startswith("--format="):
+            output_format = arg.split("=", 1)[1]
+        elif arg in ("--format", "-f") and args:
+            output_format = args.pop(0)
+        else:
+            return None
+
+    return output_format if output_format in STATUS_FORMATS else None
+
+
+def main():
+    """
+    The ``pday`` console script. Answers ``pday status`` directly, forwards
+    what it can to a running daemon (``pday serve``) and hands everything
+    else to the click app.
+    """
+    args = sys.argv[1:]
+    if args[:1] == ["status"] and (output_format := parse_format(args[1:])):
+        if text := get_status(output_format=output_format):
+            print(text)
+
+        return
+
+    from patchday.daemon import forward, is_forwarded
+
+    if is_forwarded(args) and (response := forward(args)) is not None:
+        sys.stdout.write(response["stdout"])
+        sys.stderr.write(response["stderr"])
+        sys.exit(response["code"])
+
+    from patchday.cli import app
+
+    app()
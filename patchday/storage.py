@@ -1,16 +1,71 @@
+import fcntl
+import itertools
 import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from functools import cached_property
 from pathlib import Path
-from typing import TypeVar
+from typing import TYPE_CHECKING, Any, TypeVar
+from urllib.parse import quote
+
 from xdg_base_dirs import xdg_config_home
-from pydantic import BaseModel
 
-from patchday.exceptions import StorageCorruption
+from patchday.constants import DeliveryMethod
+from patchday.exceptions import ReadOnlyStorageError, StorageCorruption
+from patchday.journal import Journal, diff_records, get_recording
+from patchday.metrics import (
+    OperationStats,
+    StorageMetrics,
+    record_collapsed,
+    record_read,
+    record_validation,
+    record_write,
+)
+from patchday.tracing import span
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+    from patchday.backup import Backups
+    from patchday.events import EventBus
+    from patchday.history import History
+    from patchday.inventory import Inventory
+    from patchday.summary import Summary
+    from patchday.sync import Replica
 
 
 # Defaults to $HOME/.config/patchday (XDG standard).
 DEFAULT_STORAGE_PATH = xdg_config_home() / "patchday"
+SCHEDULES_KEY = "schedules"
+HORMONES_KEY = "hormones"
+# The storage key holding this device's sync bookkeeping.
+SYNC_KEY = "sync"
+# Records appended to a key since its file was last written whole.
+LOG_SUFFIX = ".log"
+# Appended to a legacy hormones key to keep the records no schedule took
+# when migrating.
+MIGRATED_SUFFIX = ".migrated"
 T = TypeVar("T")
-BASEMODEL_T = TypeVar("BASEMODEL_T", bound=BaseModel)
+BASEMODEL_T = TypeVar("BASEMODEL_T", bound="BaseModel")
+
+
+def get_hormones_key(schedule_id: str) -> str:
+    """
+    The storage key holding a schedule's hormones. Each schedule has its
+    own partition.
+    """
+    return f"{HORMONES_KEY}/{quote(schedule_id, safe='')}"
+
+
+def get_legacy_hormones_key(delivery_method: str) -> str:
+    """
+    The storage key older versions used for the hormones of every schedule
+    with the given delivery method.
+    """
+    return delivery_method.lower()
 
 
 def _load_json(content: str, key: str, default: T) -> T:
@@ -29,87 +84,565 @@ def _load_file(file: Path, key: str, default: T) -> T:
     if not file.is_file():
         return default
 
-    content = file.read_text(encoding="utf-8")
-    return _load_json(content, key, default)
+    with span("storage.read", key=key) as read_span:
+        content = file.read_bytes()
+        record_read(len(content))
+        read_span.set_attribute("bytes", len(content))
+        return _load_json(content.decode("utf-8"), key, default)
 
 
-def _write_data_model(file: Path, model: BASEMODEL_T) -> None:
-    data = model.model_dump_json()
-    _write_data_str(file, data)
+def _is_versioned(model_cls: type["BaseModel"]) -> bool:
+    return "hlc" in model_cls.model_fields
 
 
-def _write_data(file: Path, data: list | dict) -> None:
-    data_str = json.dumps(data)
-    _write_data_str(file, data_str)
+def _dump(item: "BaseModel") -> dict:
+    # NOTE: Models list fields that are not stored, such as computed ones that
+    #   would otherwise be read just to be written, in `storage_exclude`.
+    return item.model_dump(mode="json", exclude=getattr(item, "storage_exclude", None))
 
 
-def _write_data_str(file: Path, data: str) -> None:
-    file.parent.mkdir(parents=True, exist_ok=True)
-    file.unlink(missing_ok=True)
+def _write_data(file: Path, data: list | dict) -> os.stat_result:
+    data_str = json.dumps(data)
+    return _write_data_str(file, data_str)
 
+
+def _write_data_str(file: Path, data: str) -> os.stat_result:
     if not data.endswith("\n"):
         data += "\n"
 
-    file.write_text(data, encoding="utf-8")
+    content = data.encode("utf-8")
+    with span("storage.write", path=str(file), bytes=len(content)):
+        stat = write_atomic(file, content)
+
+    record_write(len(content))
+    return stat
+
+
+def write_atomic(file: Path, content: bytes) -> os.stat_result:
+    """
+    Write a file so readers (and crashes) only ever see the old or the new
+    content, never a partial write.
+
+    Returns:
+        os.stat_result: The stat of the written file, even if another
+        process replaced it since.
+    """
+    file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = file.with_name(f".{file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp_file.write_bytes(content)
+        # NOTE: Renaming keeps the inode and mtime.
+        stat = tmp_file.stat()
+        os.replace(tmp_file, file)
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+
+    return stat
+
+
+def _get_stat(base: os.stat_result, log: os.stat_result | None) -> tuple[int, int, int]:
+    # (inode, mtime in ns, size) of a key's file and its appended records.
+    if log is None:
+        return base.st_ino, base.st_mtime_ns, base.st_size
+
+    mtime = max(base.st_mtime_ns, log.st_mtime_ns)
+    return base.st_ino, mtime, base.st_size + log.st_size
+
+
+def _get_log_header(base: os.stat_result) -> list[int]:
+    # Ties a log to the file it appends to; logs left over from before the
+    # file was written whole, even by a crashed process, do not match.
+    return [base.st_ino, base.st_mtime_ns, base.st_size]
+
+
+@contextmanager
+def file_lock(file: Path, blocking: bool = True) -> Iterator[bool]:
+    """
+    Hold an exclusive lock on a file, shared with every other process and
+    thread, for changes that take more than one atomic write.
+
+    Args:
+        file (Path): The lock file. Created if needed.
+        blocking (bool): Wait for the lock. Otherwise, yields ``False``
+          straight away when someone else holds it.
+
+    Yields:
+        bool: ``True`` if the lock is held.
+    """
+    file.parent.mkdir(parents=True, exist_ok=True)
+    with open(file, "a") as lock:
+        try:
+            fcntl.flock(
+                lock, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            )
+        except BlockingIOError:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _merge_records(
+    data: list[dict], records: list[dict], id_key: str, positions: dict[Any, int]
+):
+    # Add records to a list in place, replacing the ones with the same IDs.
+    # `positions` maps the IDs in the list to their indexes.
+    for record in records:
+        if (idx := positions.get(record[id_key])) is None:
+            positions[record[id_key]] = len(data)
+            data.append(record)
+        else:
+            data[idx] = record
+
+
+def _copy_json(value):
+    # Faster than `copy.deepcopy` for parsed JSON, which has no cycles.
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [_copy_json(v) for v in value]
+
+    return value
+
+
+class _Flight:
+    # A load in progress that other threads can wait for.
+    __slots__ = ("done", "error", "result", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+        self.waiters = 0
 
 
 class ManagedData:
-    def __init__(self, key: str, base_path: Path):
+    def __init__(self, key: str, base_path: Path, patchdata: "PatchData | None" = None):
         self.key = key
         self.base_path = base_path
+        self.patchdata = patchdata
+        # The generations just before and after the last write through this
+        # object, taken from the write itself.
+        self.last_write: tuple[tuple, tuple] | None = None
 
     @property
     def path(self) -> Path:
         return self.base_path / f"{self.key}.json"
 
+    @property
+    def log_path(self) -> Path:
+        return self.base_path / f"{self.key}{LOG_SUFFIX}"
+
     def load_list(self, model_cls: type[BASEMODEL_T], **kwargs) -> list[BASEMODEL_T]:
-        items: list[dict] = self._load_data([])
+        with self._operation("load_list"):
+            items: list[dict] = self._load_data([])
 
-        for item in items:
-            for key, val in kwargs.items():
-                item[key] = val
+            for item in items:
+                for key, val in kwargs.items():
+                    item[key] = val
 
-        return [model_cls.model_validate(obj) for obj in items]
+            start = time.perf_counter()
+            with span("storage.validate", model=model_cls.__name__, count=len(items)):
+                result = [model_cls.model_validate(obj) for obj in items]
 
-    def load_object(self, model_cls: type[BASEMODEL_T]) -> BASEMODEL_T:
-        item: dict = self._load_data({})
-        return model_cls.model_validate(item)
+            record_validation(time.perf_counter() - start)
+            return result
 
-    def persist_list(self, items: list[BASEMODEL_T]):
-        data = [itm.model_dump(mode="json") for itm in items]
-        _write_data(self.path, data)
+    def load_object(self, model_cls: type[BASEMODEL_T]) -> BASEMODEL_T:
+        with self._operation("load_object"):
+            item: dict = self._load_data({})
+            start = time.perf_counter()
+            with span("storage.validate", model=model_cls.__name__, count=1):
+                result = model_cls.model_validate(item)
+
+            record_validation(time.perf_counter() - start)
+            return result
+
+    def load_raw_list(self) -> list[dict]:
+        """
+        Load the stored records without validating them.
+        """
+        with self._operation("load_raw_list"):
+            return self._load_data([])
+
+    def persist_list(self, items: list[BASEMODEL_T], id_key: str = "id"):
+        with self._operation("persist_list"):
+            data = [_dump(itm) for itm in items]
+            versioned = bool(items) and _is_versioned(type(items[0]))
+            self._write_items(data, id_key=id_key, versioned=versioned)
 
     def persist_list_object(self, item: BASEMODEL_T, id_key: str = "id"):
-        items = self._load_items_without(item, id_key=id_key)
-        data = item.model_dump(mode="json")
-        items.append(data)
-        _write_data(self.path, items)
+        with self._operation("persist_list_object"):
+            self._upsert([item], id_key=id_key)
+
+    def persist_list_objects(
+        self, items: list[BASEMODEL_T], id_key: str = "id"
+    ) -> list[dict]:
+        """
+        Add or replace several records with a single read and write.
+
+        Returns:
+            list[dict]: The records as stored, e.g. with their sync versions.
+        """
+        with self._operation("persist_list_objects"):
+            return self._upsert(items, id_key=id_key) if items else []
+
+    def persist_raw_list(
+        self,
+        items: list[dict],
+        id_key: str = "id",
+        previous: list[dict] | None = None,
+        versioned: bool = False,
+    ):
+        """
+        Write already-serialized records, journaling the ones that changed.
+
+        Args:
+            items (list[dict]): The records.
+            id_key (str): The ID field of the records.
+            previous (list[dict] | None): The stored records, if already
+              loaded, to save reading them again.
+            versioned (bool): Stamp changed records for syncing, for keys
+              whose model has an ``hlc`` field.
+        """
+        with self._operation("persist_raw_list"):
+            self._write_items(items, id_key, previous=previous, versioned=versioned)
+
+    def append_list_objects(
+        self, items: list[BASEMODEL_T], id_key: str = "id"
+    ) -> list[dict]:
+        """
+        Add records whose IDs are not stored yet, without reading or writing
+        the stored ones, so it costs the same however much is stored.
+
+        Returns:
+            list[dict]: The records as stored, e.g. with their sync versions.
+        """
+        with self._operation("append_list_objects"):
+            if not items:
+                return []
+
+            self._check_writable()
+            data = [_dump(item) for item in items]
+            versioned = _is_versioned(type(items[0]))
+            with self._stamp(id_key, [], data, versioned):
+                if (
+                    self.patchdata
+                    and (journal := get_recording(self.patchdata)) is not None
+                ):
+                    journal.extend(diff_records(self.key, id_key, [], data, versioned))
+
+                self.append_raw(data, id_key=id_key)
+
+            return data
+
+    def append_raw(self, records: list[dict], id_key: str = "id"):
+        """
+        Add already-serialized records to a stored list, replacing any with
+        the same IDs. They go to a log next to the file, which is folded
+        into it once it is as big.
+        """
+        self._check_writable()
+        before = self.generation()
+        with self._operation("append_raw"):
+            stat = self._append(records, id_key)
+
+        if self.patchdata is not None:
+            self.patchdata.on_append(self.key, records, id_key)
+
+        self.last_write = (before, self._get_generation(stat))
+
+    def compact(self):
+        """
+        Fold the appended records into the file.
+        """
+        self._check_writable()
+        with self._operation("compact"), self._log_lock():
+            if self.log_path.is_file():
+                self._write(self._read([]))
 
     def delete_list_object(self, item: BASEMODEL_T, id_key: str = "id"):
-        items = self._load_items_without(item, id_key=id_key)
-        _write_data(self.path, items)
-
-    def _load_items_without(
-        self, item: BASEMODEL_T, id_key: str = "id"
-    ) -> list[BASEMODEL_T]:
-        items: list[dict] = _load_file(self.path, self.key, [])
-
-        # Remove existing.
-        if existing := [x for x in items if x[id_key] == getattr(item, id_key)]:
-            items = [x for x in items if x not in existing]
-
-        return items
+        with self._operation("delete_list_object"):
+            previous: list[dict] = self._load_data([])
+            item_id = getattr(item, id_key)
+            items = [x for x in previous if x[id_key] != item_id]
+            self._write_items(
+                items,
+                id_key=id_key,
+                previous=previous,
+                versioned=_is_versioned(type(item)),
+            )
+
+    def _upsert(self, items: list[BASEMODEL_T], id_key: str) -> list[dict]:
+        previous: list[dict] = self._load_data([])
+        ids = {getattr(item, id_key) for item in items}
+        data = [x for x in previous if x[id_key] not in ids]
+        data.extend(_dump(item) for item in items)
+        versioned = _is_versioned(type(items[0]))
+        self._write_items(data, id_key=id_key, previous=previous, versioned=versioned)
+        return data[-len(items) :]
+
+    def _write_items(
+        self,
+        items: list[dict],
+        id_key: str,
+        previous: list[dict] | None = None,
+        versioned: bool = False,
+    ):
+        self._check_writable()
+        journal = get_recording(self.patchdata) if self.patchdata else None
+        if previous is None and (journal is not None or versioned):
+            previous = self._load_data([])
+
+        with self._stamp(id_key, previous or [], items, versioned):
+            if journal is not None:
+                journal.extend(
+                    diff_records(self.key, id_key, previous or [], items, versioned)
+                )
+
+            self.persist_raw(items)
+
+    def _stamp(
+        self, id_key: str, previous: list[dict], items: list[dict], versioned: bool
+    ) -> AbstractContextManager:
+        if versioned and self.patchdata is not None:
+            # Stamp changed records so other devices can sync them.
+            return self.patchdata.replica.stamp(self.key, id_key, previous, items)
+
+        return nullcontext()
 
     def persist_object(self, item: BASEMODEL_T):
-        _write_data_model(self.path, item)
+        with self._operation("persist_object"):
+            self.persist_raw(_dump(item))
+
+    def persist_raw(self, data: list | dict):
+        """
+        Write already-serialized data as-is.
+        """
+        self._check_writable()
+        before = self.generation()
+        with self._operation("persist_raw"):
+            stat = self._write(data)
+
+        if self.patchdata is not None:
+            self.patchdata.on_write(self.key, data)
+
+        self.last_write = (before, self._get_generation(stat))
+
+    def _check_writable(self):
+        if self.patchdata is not None and self.patchdata.read_only:
+            raise ReadOnlyStorageError(self.key)
+
+    @contextmanager
+    def _operation(self, operation: str) -> Iterator[OperationStats]:
+        with (
+            span(f"storage.{operation}", key=self.key),
+            self._measure(operation) as stats,
+        ):
+            yield stats
+
+    def delete(self, id_key: str = "id", versioned: bool = False):
+        """
+        Remove the stored data.
+
+        Args:
+            id_key (str): The ID field of the stored records, used to restore
+              them if the deletion is undone.
+            versioned (bool): The records are stamped for syncing, so they
+              are stamped again if the deletion is undone.
+        """
+        self._check_writable()
+        before = self.generation()
+        with self._operation("delete"):
+            if (
+                self.patchdata
+                and (journal := get_recording(self.patchdata)) is not None
+            ):
+                before = self._load_data([])
+                journal.append(
+                    {
+                        "key": self.key,
+                        "id_key": id_key,
+                        "versioned": versioned,
+                        "before": before,
+                        "after": None,
+                    }
+                )
+
+            self._remove()
+
+        if self.patchdata is not None:
+            self.patchdata.on_write(self.key, [])
+
+        self.last_write = (before, self._get_generation(None))
+
+    def generation(self) -> tuple:
+        """
+        A token that changes whenever the stored data does, whether this
+        process or another one wrote it. Use it to key in-memory caches.
+        """
+        return self._get_generation(self._stat())
+
+    def _get_generation(self, stat: tuple[int, int, int] | None) -> tuple:
+        # NOTE: mtime granularity can hide quick successive writes, so also
+        #   count the writes made through this process.
+        written = self.patchdata.generation(self.key) if self.patchdata else 0
+        return written, stat
+
+    def modified(self) -> int | None:
+        """
+        When the data was last written, in nanoseconds, or ``None`` if
+        there is none.
+        """
+        return None if (stat := self._stat()) is None else stat[1]
+
+    def _stat(self) -> tuple[int, int, int] | None:
+        # (inode, mtime in ns, size), counting appended records.
+        if (base := self._base_stat()) is None:
+            return None
+
+        try:
+            log = self.log_path.stat()
+        except FileNotFoundError:
+            log = None
+
+        return _get_stat(base, log)
+
+    def _base_stat(self) -> os.stat_result | None:
+        try:
+            return self.path.stat()
+        except FileNotFoundError:
+            return None
+
+    def _measure(self, operation: str) -> AbstractContextManager[OperationStats]:
+        if self.patchdata is None:
+            return nullcontext(OperationStats())
+
+        return self.patchdata.metrics.measure(self.key, operation)
 
     def _load_data(self, default: T) -> T:
-        return _load_file(self.path, self.key, default)
-
-    def _get_path(
-        self,
-    ) -> Path:
-        return self.base_path / f"{self.key}.json"
+        if self.patchdata is None:
+            return self._read(default)
+
+        return self.patchdata.load_shared(
+            self.key, self.generation(), lambda: self._read(default)
+        )
+
+    def _read(self, default: T) -> T:
+        if (
+            self.patchdata is not None
+            and (records := self.patchdata.unmigrated.get(self.key)) is not None
+            and not self.path.is_file()
+        ):
+            return _copy_json(records)
+
+        if self.patchdata is None or (cache := self.patchdata.shared_cache) is None:
+            base = self._base_stat()
+            return self._replay(_load_file(self.path, self.key, default), base)
+
+        try:
+            file = self.path.open("rb")
+        except FileNotFoundError:
+            return default
+
+        with file:
+            # NOTE: Stat the open file, so the stamp matches what is read even
+            #   if another process replaces it meanwhile.
+            generation = self.patchdata.generation(self.key)
+            stat = os.fstat(file.fileno())
+            stamp = (generation, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if isinstance(data := cache.get(self.key, stamp), type(default)):
+                return self._replay(data, stat)
+
+            with span("storage.read", key=self.key) as read_span:
+                content = file.read()
+                record_read(len(content))
+                read_span.set_attribute("bytes", len(content))
+
+        data = _load_json(content.decode("utf-8"), self.key, default)
+        if not self.patchdata.read_only:
+            cache.put(self.key, stamp, data)
+
+        return self._replay(data, stat)
+
+    def _replay(self, data: T, base: os.stat_result | None) -> T:
+        # Apply the records appended since the file was written whole.
+        if not isinstance(data, list) or base is None:
+            return data
+
+        try:
+            lines = self.log_path.read_bytes().splitlines()
+            if not lines or json.loads(lines[0]) != _get_log_header(base):
+                return data
+        except (FileNotFoundError, json.decoder.JSONDecodeError):
+            return data
+
+        positions: dict[Any, int] | None = None
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except json.decoder.JSONDecodeError:
+                # Cut short by a crash while appending.
+                break
+
+            id_key = entry["id_key"]
+            if positions is None:
+                positions = {x.get(id_key): idx for idx, x in enumerate(data)}
+
+            _merge_records(data, entry["records"], id_key, positions)
+
+        return data
+
+    def _write(self, data: list | dict) -> tuple[int, int, int]:
+        stat = _write_data(self.path, data)
+        # Folded into the file, and no longer matching it anyway.
+        self.log_path.unlink(missing_ok=True)
+        return _get_stat(stat, None)
+
+    def _append(self, records: list[dict], id_key: str) -> tuple[int, int, int]:
+        line = json.dumps({"id_key": id_key, "records": records}) + "\n"
+        with self._log_lock():
+            if (base := self._base_stat()) is None:
+                # Nothing to append to.
+                return self._write(records)
+
+            header = _get_log_header(base)
+            try:
+                with self.log_path.open("rb") as log:
+                    current = json.loads(log.readline() or "null") == header
+            except (FileNotFoundError, ValueError):
+                current = False
+
+            content = line.encode("utf-8")
+            with span("storage.append", path=str(self.log_path), bytes=len(content)):
+                if current:
+                    with self.log_path.open("ab") as log:
+                        log.write(content)
+                        log.flush()
+                        log_stat = os.fstat(log.fileno())
+                else:
+                    content = (json.dumps(header) + "\n").encode("utf-8") + content
+                    log_stat = write_atomic(self.log_path, content)
+
+            record_write(len(content))
+            if log_stat.st_size > base.st_size:
+                # As big as the file, so folding it in costs no more than
+                # the appends it saved, and reads stay quick.
+                return self._write(self._read([]))
+
+            return _get_stat(base, log_stat)
+
+    def _log_lock(self) -> AbstractContextManager[bool]:
+        # Appending and compacting are read-modify-writes of the log.
+        return file_lock(self.path.with_name(f".{self.path.name}.lock"))
+
+    def _remove(self):
+        self.path.unlink(missing_ok=True)
+        self.log_path.unlink(missing_ok=True)
 
 
 class PatchData:
@@ -117,8 +650,331 @@ class PatchData:
     PatchDay's storage manager.
     """
 
-    def __init__(self, path: Path | None = None):
+    def __init__(
+        self,
+        path: Path | None = None,
+        read_only: bool = False,
+        shared_cache: bool = False,
+    ):
+        """
+        Args:
+            path (Path | None): The storage directory. Defaults to the XDG
+              config directory.
+            read_only (bool): Set to ``True`` to raise
+              :class:`~patchday.exceptions.ReadOnlyStorageError` on any write,
+              e.g. when the storage is mounted read-only.
+            shared_cache (bool): Set to ``True`` to share parsed data with
+              other processes using the same directory, such as service
+              workers. See :class:`~patchday.shared_cache.SharedCache`.
+        """
         self.path = path or DEFAULT_STORAGE_PATH
+        self.read_only = read_only
+        # Keys found needing repair while reading; reads never write.
+        self.pending_repairs: set[str] = set()
+        self._generations: dict[str, int] = {}
+        self._migrated = False
+        # Partition key -> records, for read-only storage still holding
+        # hormones in the legacy layout.
+        self.unmigrated: dict[str, list[dict]] = {}
+        self._flights: dict[tuple[str, tuple], _Flight] = {}
+        self._flights_lock = threading.Lock()
+        if shared_cache:
+            from patchday.shared_cache import SharedCache
+
+            self.shared_cache: SharedCache | None = SharedCache(self.path)
+        else:
+            self.shared_cache = None
+
+    @cached_property
+    def event_bus(self) -> "EventBus":
+        """
+        Publishes changes made through this storage.
+        """
+        from patchday.events import EventBus
+
+        return EventBus()
+
+    @cached_property
+    def replica(self) -> "Replica":
+        """
+        Tracks record versions for syncing with other devices.
+        """
+        from patchday.sync import Replica
+
+        return Replica(self)
+
+    @cached_property
+    def backups(self) -> "Backups":
+        """
+        Snapshots of the storage for backup and point-in-time restore.
+        """
+        from patchday.backup import Backups
+
+        return Backups(self)
+
+    @cached_property
+    def history(self) -> "History":
+        """
+        Every hormone application, hot and compacted.
+        """
+        from patchday.history import History
+
+        return History(self)
+
+    @cached_property
+    def inventory(self) -> "Inventory":
+        """
+        The supply of each schedule and when it runs out.
+        """
+        from patchday.inventory import Inventory
+
+        return Inventory(self)
+
+    @cached_property
+    def journal(self) -> Journal:
+        """
+        The undo/redo history of schedule operations.
+        """
+        return Journal(self)
+
+    @cached_property
+    def metrics(self) -> StorageMetrics:
+        """
+        Counts, timings and sizes of the storage operations.
+        """
+        return StorageMetrics()
+
+    @cached_property
+    def summary(self) -> "Summary":
+        """
+        A denormalized view of the schedules for fast reads.
+        """
+        from patchday.summary import Summary
+
+        return Summary(self)
+
+    def open(self, key: str) -> ManagedData:
+        return ManagedData(key, self.path, patchdata=self)
+
+    def lock(self, name: str) -> AbstractContextManager[bool]:
+        """
+        Hold an exclusive lock shared with every process using the storage,
+        for changes that read and write more than one key.
+        """
+        return file_lock(self.path / f".{name}.lock")
+
+    def migrate(self):
+        """
+        Move hormones from the legacy per-delivery-method files (shared by
+        every schedule with that method) into per-schedule partitions.
+        Only does work the first time it is called on old data. Read-only
+        storage is left as it is, and partitions are read from the legacy
+        files instead.
+        """
+        if self._migrated:
+            return
+
+        self._migrated = True
+        legacy = [self.open(get_legacy_hormones_key(m.value)) for m in DeliveryMethod]
+        if not (legacy := [db for db in legacy if db.path.is_file()]):
+            return
+
+        schedules = self.open(SCHEDULES_KEY).load_raw_list()
+        for legacy_db in legacy:
+            partitions, unowned = self._split_legacy(legacy_db, schedules)
+            if self.read_only:
+                self.unmigrated.update(partitions)
+                continue
+
+            for key, records in partitions.items():
+                self.open(key).persist_raw(records)
+
+            if unowned:
+                # No schedule reads these anymore, but they are still the
+                # user's data.
+                self.open(f"{legacy_db.key}{MIGRATED_SUFFIX}").persist_raw(unowned)
+
+            if self.open(SYNC_KEY).path.is_file():
+                self.replica.move_key(legacy_db.key, list(partitions))
+
+            legacy_db.delete()
+
+        if not self.read_only:
+            self.summary.rebuild()
+
+    def _split_legacy(
+        self, legacy_db: ManagedData, schedules: list[dict]
+    ) -> tuple[dict[str, list[dict]], list[dict]]:
+        # Returns the records of each new partition, and the records no
+        # schedule gets.
+        records = legacy_db.load_raw_list()
+        partitions = {}
+        owned: set[int] = set()
+        for schedule in schedules:
+            if get_legacy_hormones_key(schedule["delivery_method"]) != legacy_db.key:
+                continue
+
+            key = get_hormones_key(schedule_id := schedule["schedule_id"])
+            if self.open(key).path.is_file():
+                continue
+
+            # Give each schedule what it used to read: the first `quantity`
+            # records, with applied hormones first when trimming.
+            quantity = schedule.get("quantity", 1)
+            order = range(len(records))
+            if len(records) > quantity:
+                order = sorted(order, key=lambda i: not records[i].get("date_applied"))
+
+            owned.update(order[:quantity])
+            partitions[key] = [
+                {**records[i], "schedule_id": schedule_id} for i in order[:quantity]
+            ]
+
+        unowned = [r for i, r in enumerate(records) if i not in owned]
+        return partitions, unowned
+
+    def generation(self, key: str) -> int:
+        """
+        The number of writes made to the given key through this object or,
+        with a shared cache, by every process sharing it.
+        """
+        if self.shared_cache is not None:
+            return self.shared_cache.generation(key)
+
+        return self._generations.get(key, 0)
+
+    def load_shared(self, key: str, generation: tuple, load: Callable[[], T]) -> T:
+        """
+        Load a key once for every thread asking for the same generation at
+        the same time. The first caller reads and parses; the others wait
+        for it and count as collapsed loads in :attr:`metrics`.
+
+        Args:
+            key (str): The storage key.
+            generation (tuple): The key's :meth:`ManagedData.generation`.
+            load (Callable[[], T]): Reads and parses the data.
+
+        Returns:
+            T: Data the caller owns and may change.
+        """
+        flight_key = (key, generation)
+        with self._flights_lock:
+            if leader := (flight := self._flights.get(flight_key)) is None:
+                flight = self._flights[flight_key] = _Flight()
+            else:
+                flight.waiters += 1
+
+        if not leader:
+            record_collapsed()
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+
+            return _copy_json(flight.result)
+
+        try:
+            flight.result = load()
+        except BaseException as err:
+            flight.error = err
+            raise
+        finally:
+            # Later callers start a new load; nobody joins this one anymore.
+            with self._flights_lock:
+                del self._flights[flight_key]
+
+            flight.done.set()
+
+        # NOTE: Without waiters, the result is not shared, so skip the copy.
+        return _copy_json(flight.result) if flight.waiters else flight.result
+
+    def on_write(self, key: str, data: list | dict):
+        """
+        Called after any :class:`ManagedData` write.
+        """
+        self._count_write(key)
+        self.summary.update(key, data)
+
+    def on_append(self, key: str, records: list[dict], id_key: str):
+        """
+        Called after records are appended with :meth:`ManagedData.append_raw`.
+        """
+        self._count_write(key)
+        self.summary.append(key, records, id_key)
+
+    def _count_write(self, key: str):
+        if self.shared_cache is not None:
+            self.shared_cache.count_write(key)
+        else:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+
+class MemoryManagedData(ManagedData):
+    """
+    A :class:`ManagedData` kept in memory instead of a file.
+    """
+
+    def __init__(self, key: str, patchdata: "MemoryPatchData"):
+        super().__init__(key, patchdata.path, patchdata=patchdata)
+        self.memory = patchdata
+
+    def _load_data(self, default: T) -> T:
+        if (content := self.memory.files.get(self.key)) is None:
+            return default
+
+        return _load_json(content, self.key, default)
+
+    def _write(self, data: list | dict) -> tuple[int, int, int]:
+        self.memory.files[self.key] = json.dumps(data)
+        self.memory.stats[self.key] = next(self.memory.sequence)
+        return self._stat()
+
+    def _append(self, records: list[dict], id_key: str) -> tuple[int, int, int]:
+        # NOTE: Nothing to save by appending in memory.
+        data = self._load_data([])
+        positions = {x.get(id_key): idx for idx, x in enumerate(data)}
+        _merge_records(data, records, id_key, positions)
+        return self._write(data)
+
+    def compact(self):
+        # Never appended to.
+        pass
+
+    def _remove(self):
+        self.memory.files.pop(self.key, None)
+        self.memory.stats.pop(self.key, None)
+
+    def _stat(self) -> tuple[int, int, int] | None:
+        if (written := self.memory.stats.get(self.key)) is None:
+            return None
+
+        return 0, written, len(self.memory.files[self.key])
+
+
+class MemoryPatchData(PatchData):
+    """
+    Storage kept in memory, e.g. for simulations. Data is still serialized
+    so it behaves exactly like files would.
+    """
+
+    def __init__(self, read_only: bool = False):
+        super().__init__(path=Path(":memory:"), read_only=read_only)
+        # Key -> JSON content.
+        self.files: dict[str, str] = {}
+        # Key -> a write sequence number, standing in for mtimes.
+        self.stats: dict[str, int] = {}
+        self.sequence = itertools.count(1)
+        # Nothing to migrate.
+        self._migrated = True
+
+    @cached_property
+    def history(self) -> "History":
+        from patchday.history import MemoryHistory
+
+        return MemoryHistory(self)
 
     def open(self, key: str) -> ManagedData:
-        return ManagedData(key, self.path)
+        return MemoryManagedData(key, self)
+
+    def lock(self, name: str) -> AbstractContextManager[bool]:
+        # Only ever used by one process.
+        return nullcontext(True)
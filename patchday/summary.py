@@ -0,0 +1,326 @@
+from datetime import datetime
+from functools import cached_property
+from typing import TYPE_CHECKING, NamedTuple
+
+from patchday.exceptions import StorageCorruption
+from patchday.storage import HORMONES_KEY, SCHEDULES_KEY, get_hormones_key
+
+if TYPE_CHECKING:
+    from patchday.storage import ManagedData, PatchData
+
+SUMMARY_KEY = "summary"
+
+
+# NOTE: A named tuple rather than a pydantic model (or dataclass) so that
+#   reading the summary imports and validates as little as possible.
+class ScheduleSummary(NamedTuple):
+    """
+    The parts of a schedule needed to list it.
+    """
+
+    schedule_id: str
+    """
+    The ID of the schedule.
+    """
+
+    delivery_method: str
+    """
+    The delivery method value, such as ``"PATCH"``.
+    """
+
+    next_expiration: float | None
+    """
+    The epoch time the next hormone expires, or ``None`` if a
+    hormone has not been taken yet.
+    """
+
+    hormones_key: str
+    """
+    The storage key holding the schedule's hormones.
+    """
+
+    quantity: int = 1
+    """
+    The quantity of hormones in the schedule.
+    """
+
+    expiration_duration: int = 0
+    """
+    The expiration duration in seconds.
+    """
+
+    recurrence: str | None = None
+    """
+    The schedule's calendar rule, such as ``"mon/thu 09:00"``, if any.
+    """
+
+    last_taken: float | None = None
+    """
+    The epoch time a hormone was last taken, or ``None`` if none was.
+    """
+
+    @property
+    def next_expiration_date(self) -> datetime | None:
+        if self.next_expiration is None:
+            return None
+
+        return datetime.fromtimestamp(self.next_expiration)
+
+    @property
+    def last_taken_date(self) -> datetime | None:
+        if self.last_taken is None:
+            return None
+
+        return datetime.fromtimestamp(self.last_taken)
+
+
+def get_next_expiration(
+    hormones: list[dict],
+    quantity: int,
+    expiration_duration: int,
+    recurrence: str | None = None,
+) -> float | None:
+    """
+    Find the next expiration from stored hormone records without
+    validating them. Mirrors ``HormoneSchedule.next_expired_hormone``.
+
+    Args:
+        hormones (list[dict]): The stored hormone records.
+        quantity (int): The quantity of hormones in the schedule.
+        expiration_duration (int): The expiration duration in seconds.
+        recurrence (str | None): The schedule's calendar rule, which decides
+          expirations instead of the duration when set.
+
+    Returns:
+        float | None: The epoch time, or ``None`` if any hormone is not taken.
+    """
+    dates = [h["date_applied"] for h in hormones if h.get("date_applied")]
+    if len(dates) < quantity:
+        # Any inactive hormone is next.
+        return None
+
+    applied = min(datetime.fromisoformat(d) for d in dates[:quantity])
+    if recurrence:
+        from patchday.recurrence import parse_recurrence
+
+        return parse_recurrence(recurrence).next_after(applied).timestamp()
+
+    return applied.timestamp() + expiration_duration
+
+
+def get_last_taken(hormones: list[dict]) -> float | None:
+    """
+    Find when a hormone was last taken from stored hormone records without
+    validating them. Mirrors ``HormoneSchedule.last_taken_hormone``.
+
+    Args:
+        hormones (list[dict]): The stored hormone records.
+
+    Returns:
+        float | None: The epoch time, or ``None`` if none is taken.
+    """
+    dates = [h["date_applied"] for h in hormones if h.get("date_applied")]
+    if not dates:
+        return None
+
+    return max(datetime.fromisoformat(d) for d in dates).timestamp()
+
+
+class Summary:
+    """
+    A small denormalized file of every schedule's next expiration.
+    It is updated on every storage write so listing schedules only
+    needs to read this one file.
+    """
+
+    def __init__(self, patchdata: "PatchData"):
+        self.patchdata = patchdata
+        # The rows last saved or checked here by schedule ID, keyed by the
+        # summary's generation.
+        self._rows: tuple[tuple, dict[str, ScheduleSummary]] | None = None
+
+    @cached_property
+    def db(self) -> "ManagedData":
+        return self.patchdata.open(SUMMARY_KEY)
+
+    def load(self) -> list[ScheduleSummary]:
+        """
+        Get the schedule summaries, rebuilding them if missing or stale.
+        """
+        self.patchdata.migrate()
+        if self.patchdata.unmigrated:
+            # Read-only legacy data; the saved rows may not have seen it.
+            return self.rebuild()
+
+        rows = self._read()
+        return self.rebuild() if rows is None else rows
+
+    def rebuild(self) -> list[ScheduleSummary]:
+        """
+        Recompute every schedule summary from the stored records.
+        """
+        self.patchdata.migrate()
+        schedules = self.patchdata.open(SCHEDULES_KEY).load_raw_list()
+        return self._update_schedules(schedules, [])
+
+    def update(self, key: str, data: list | dict):
+        """
+        Update the summary after a write to ``key``.
+        """
+        if not isinstance(data, list) or key == SUMMARY_KEY:
+            return
+
+        elif key == SCHEDULES_KEY:
+            self._update_schedules(data, self._load_existing(key))
+            return
+
+        rows = self._load_existing(key)
+        if not any(r.hormones_key == key for r in rows):
+            return
+
+        rows = [
+            row._replace(
+                next_expiration=get_next_expiration(
+                    data, row.quantity, row.expiration_duration, row.recurrence
+                ),
+                last_taken=get_last_taken(data),
+            )
+            if row.hormones_key == key
+            else row
+            for row in rows
+        ]
+        self._save(rows)
+
+    def append(self, key: str, records: list[dict], id_key: str):
+        """
+        Update the summary after records were appended to ``key``. Added
+        schedules are appended to it too, so it is not rewritten whole.
+        """
+        if key == SUMMARY_KEY or (
+            key != SCHEDULES_KEY and not key.startswith(f"{HORMONES_KEY}/")
+        ):
+            # Nothing listed comes from it.
+            return
+
+        elif (
+            key != SCHEDULES_KEY
+            or self.patchdata.read_only
+            or self._rows is None
+            or self._rows[0] != self.db.generation()
+        ):
+            # Only rows known to be current can be appended to.
+            self.update(key, self.patchdata.open(key).load_raw_list())
+            return
+
+        rows = [self._get_row(schedule) for schedule in records]
+        self.db.append_raw([r._asdict() for r in rows], id_key="schedule_id")
+        by_id = self._rows[1]
+        by_id.update((r.schedule_id, r) for r in rows)
+        self._rows = (self.db.last_write[1], by_id)
+
+    def _update_schedules(
+        self, schedules: list[dict], existing: list[ScheduleSummary]
+    ) -> list[ScheduleSummary]:
+        existing_by_id = {r.schedule_id: r for r in existing}
+        rows = []
+        for schedule in schedules:
+            settings = (
+                schedule["delivery_method"],
+                schedule.get("quantity", 1),
+                int(schedule["expiration_duration"]),
+                schedule.get("recurrence"),
+            )
+            old = existing_by_id.get(schedule["schedule_id"])
+            if (
+                old is not None
+                and (
+                    old.delivery_method,
+                    old.quantity,
+                    old.expiration_duration,
+                    old.recurrence,
+                )
+                == settings
+            ):
+                # Unchanged, and so is its hormones key.
+                row = old
+            else:
+                row = self._get_row(schedule)
+
+            rows.append(row)
+
+        self._save(rows)
+        return rows
+
+    def _get_row(self, schedule: dict) -> ScheduleSummary:
+        hormones_key = get_hormones_key(schedule["schedule_id"])
+        hormones = self.patchdata.open(hormones_key).load_raw_list()
+        quantity = schedule.get("quantity", 1)
+        expiration_duration = int(schedule["expiration_duration"])
+        recurrence = schedule.get("recurrence")
+        return ScheduleSummary(
+            schedule_id=schedule["schedule_id"],
+            delivery_method=schedule["delivery_method"],
+            next_expiration=get_next_expiration(
+                hormones, quantity, expiration_duration, recurrence
+            ),
+            hormones_key=hormones_key,
+            quantity=quantity,
+            expiration_duration=expiration_duration,
+            recurrence=recurrence,
+            last_taken=get_last_taken(hormones),
+        )
+
+    def _load_existing(self, written_key: str) -> list[ScheduleSummary]:
+        if (rows := self._cached_rows(written_key)) is not None:
+            return rows
+
+        rows = self._read(written_key=written_key)
+        return self.rebuild() if rows is None else rows
+
+    def _cached_rows(self, written_key: str) -> list[ScheduleSummary] | None:
+        # NOTE: While nobody else wrote the summary, the rows checked or saved
+        #   here are still right, except for changes to the schedules file by
+        #   code that does not update the summary, such as older versions.
+        #   Those never write hormone partitions, so only one file is checked.
+        if self._rows is None or self._rows[0] != self.db.generation():
+            return None
+
+        elif written_key != SCHEDULES_KEY:
+            schedules_modified = self.patchdata.open(SCHEDULES_KEY).modified()
+            if schedules_modified is not None and schedules_modified > (
+                self.db.modified() or 0
+            ):
+                return None
+
+        return list(self._rows[1].values())
+
+    def _read(self, written_key: str | None = None) -> list[ScheduleSummary] | None:
+        # Returns ``None`` when the summary must be rebuilt.
+        if (modified := self.db.modified()) is None:
+            return None
+
+        try:
+            saved = self.db.load_raw_list()
+            rows = [ScheduleSummary(**row) for row in saved]
+        except (StorageCorruption, TypeError):
+            return None
+
+        if any(len(row) < len(ScheduleSummary._fields) for row in saved):
+            # Saved by an older version, without the newer fields.
+            return None
+
+        # Catch writes made without this code, such as by older versions.
+        for key in {SCHEDULES_KEY, *(r.hormones_key for r in rows)} - {written_key}:
+            key_modified = self.patchdata.open(key).modified()
+            if key_modified is not None and key_modified > modified:
+                return None
+
+        return rows
+
+    def _save(self, rows: list[ScheduleSummary]):
+        if self.patchdata.read_only:
+            # Still usable, just recomputed on every read.
+            return
+
+        self.db.persist_raw([r._asdict() for r in rows])
+        self._rows = (self.db.last_write[1], {r.schedule_id: r for r in rows})
@@ -0,0 +1,595 @@
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Protocol
+
+from pydantic import BaseModel
+
+from patchday.date import to_local
+from patchday.storage import SCHEDULES_KEY, SYNC_KEY, get_hormones_key
+
+if TYPE_CHECKING:
+    from patchday.storage import ManagedData, PatchData
+
+# The device's clock and node ID, shared by every process using the storage.
+SYNC_CLOCK_KEY = f"{SYNC_KEY}.clock"
+
+# The latest change to each storage key, so deltas only read changed keys.
+SYNC_INDEX_KEY = f"{SYNC_KEY}.index"
+
+
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def parse_hlc(value: str) -> tuple[int, int, str]:
+    wall, counter, node_id = value.split(".", 2)
+    return int(wall), int(counter), node_id
+
+
+def format_hlc(wall: int, counter: int, node_id: str) -> str:
+    # Fixed widths make the string form sort like the timestamp itself.
+    return f"{wall:015d}.{counter:06d}.{node_id}"
+
+
+class HybridLogicalClock:
+    """
+    A hybrid logical clock. Timestamps follow wall-clock time but stay
+    monotonic and causally ordered across devices even when their clocks
+    disagree. The node ID breaks ties so the order is total.
+    """
+
+    def __init__(self, node_id: str, last: str | None = None):
+        self.node_id = node_id
+        self._wall, self._counter = parse_hlc(last)[:2] if last else (0, 0)
+        self._lock = threading.Lock()
+
+    def __str__(self) -> str:
+        return format_hlc(self._wall, self._counter, self.node_id)
+
+    def now(self) -> str:
+        """
+        Create a timestamp for a local change.
+        """
+        with self._lock:
+            wall = _now_ms()
+            if wall > self._wall:
+                self._wall, self._counter = wall, 0
+            else:
+                self._counter += 1
+
+            return str(self)
+
+    def update(self, remote: str) -> str:
+        """
+        Merge a timestamp received from another device.
+        """
+        remote_wall, remote_counter, _ = parse_hlc(remote)
+        with self._lock:
+            wall = max(_now_ms(), self._wall, remote_wall)
+            if wall == self._wall == remote_wall:
+                counter = max(self._counter, remote_counter) + 1
+            elif wall == self._wall:
+                counter = self._counter + 1
+            elif wall == remote_wall:
+                counter = remote_counter + 1
+            else:
+                counter = 0
+
+            self._wall, self._counter = wall, counter
+            return str(self)
+
+
+class RecordChange(BaseModel):
+    """
+    A created or updated record.
+    """
+
+    key: str
+    """
+    The storage key the record lives in.
+    """
+
+    id_key: str
+    """
+    The field identifying the record.
+    """
+
+    record: dict
+    """
+    The stored record, including its ``hlc`` version.
+    """
+
+
+class RecordDelete(BaseModel):
+    """
+    A deleted record (tombstone).
+    """
+
+    key: str
+    """
+    The storage key the record lived in.
+    """
+
+    id_key: str
+    """
+    The field identifying the record.
+    """
+
+    record_id: Any
+    """
+    The ID of the deleted record.
+    """
+
+    hlc: str
+    """
+    When the record was deleted.
+    """
+
+
+class Delta(BaseModel):
+    """
+    The changes a device has seen since a sync point.
+    """
+
+    node_id: str
+    """
+    The device the delta came from.
+    """
+
+    clock: str
+    """
+    The sending device's clock when the delta was made. Use it as
+    ``since`` in the next request.
+    """
+
+    changes: list[RecordChange] = []
+    deletes: list[RecordDelete] = []
+
+    def __len__(self) -> int:
+        return len(self.changes) + len(self.deletes)
+
+
+class SyncPeer(Protocol):
+    @property
+    def node_id(self) -> str: ...
+
+    def changes_since(
+        self, since: str | None = None, exclude_node: str | None = None
+    ) -> Delta: ...
+
+    def apply(self, delta: Delta) -> int: ...
+
+
+def resolve_conflict(local: dict, remote: dict) -> dict:
+    """
+    Deterministically pick the winning version of a record. For hormones,
+    the latest ``date_applied`` wins. Otherwise, the latest ``hlc`` wins.
+
+    Args:
+        local (dict): This device's version.
+        remote (dict): The other device's version.
+
+    Returns:
+        dict: The winner.
+    """
+    local_applied = _get_date_applied(local)
+    remote_applied = _get_date_applied(remote)
+    if local_applied != remote_applied:
+        if local_applied is None or remote_applied is None:
+            return local if remote_applied is None else remote
+
+        return remote if remote_applied > local_applied else local
+
+    return remote if (remote.get("hlc") or "") > (local.get("hlc") or "") else local
+
+
+def _get_date_applied(record: dict) -> datetime | None:
+    # Compared as dates; the same moment can be written more than one way.
+    if not (value := record.get("date_applied")):
+        return None
+
+    return to_local(datetime.fromisoformat(value))
+
+
+def _content(record: dict) -> dict:
+    return {k: v for k, v in record.items() if k != "hlc"}
+
+
+class Replica:
+    """
+    This device's side of the sync protocol. Local writes are stamped with
+    hybrid-logical-clock versions as they happen, so a delta only contains
+    the records that changed since the peer last synced.
+
+    Every process using the storage, such as service workers, the daemon
+    and the CLI, shares the device's clock and state. They take turns under
+    a lock, reading both fresh and saving them before letting go.
+    """
+
+    def __init__(self, patchdata: "PatchData"):
+        self.patchdata = patchdata
+        self._clock: HybridLogicalClock | None = None
+
+    @cached_property
+    def _db(self) -> "ManagedData":
+        return self.patchdata.open(SYNC_KEY)
+
+    @cached_property
+    def _clock_db(self) -> "ManagedData":
+        return self.patchdata.open(SYNC_CLOCK_KEY)
+
+    @cached_property
+    def _index_db(self) -> "ManagedData":
+        return self.patchdata.open(SYNC_INDEX_KEY)
+
+    @property
+    def _state(self) -> dict:
+        state: dict = self._db._load_data({})
+        # key -> str(record ID) -> {"id", "seq", "deleted"}
+        state.setdefault("log", {})
+        # peer node ID -> {"pulled", "pushed"}
+        state.setdefault("peers", {})
+        return state
+
+    @property
+    def node_id(self) -> str:
+        return self.clock.node_id
+
+    @property
+    def clock(self) -> HybridLogicalClock:
+        if self._clock is None:
+            if self.patchdata.read_only:
+                self._load_clock()
+            else:
+                # Stores the node ID of a new device.
+                with self._locked():
+                    pass
+
+        return self._clock
+
+    @contextmanager
+    def _locked(self) -> Iterator[HybridLogicalClock]:
+        if self.patchdata.read_only:
+            # Nothing is saved, so there is nothing to take turns on.
+            yield self._load_clock()
+            return
+
+        with self.patchdata.lock(SYNC_KEY):
+            clock = self._load_clock()
+            yield clock
+            self._clock_db.persist_raw({"node_id": clock.node_id, "clock": str(clock)})
+
+    def _load_clock(self) -> HybridLogicalClock:
+        # Moves this process's clock past the one the device last stored.
+        if not (stored := self._clock_db._load_data({})):
+            # Kept with the rest of the state before.
+            stored = self._db._load_data({})
+
+        local = self._clock
+        node_id = stored.get("node_id") or (
+            local.node_id if local else uuid.uuid4().hex[:12]
+        )
+        last = [x for x in (stored.get("clock"), local and str(local)) if x]
+        self._clock = HybridLogicalClock(
+            node_id, last=max(last, key=parse_hlc) if last else None
+        )
+        return self._clock
+
+    @contextmanager
+    def stamp(
+        self, key: str, id_key: str, previous: list[dict], items: list[dict]
+    ) -> Iterator[None]:
+        """
+        Version the records about to be written. Unchanged records keep
+        their version; removed records become tombstones.
+
+        Used around the write, which happens under the lock, so no delta
+        is taken between versioning the records and storing them.
+        """
+        previous_by_id = {x[id_key]: x for x in previous}
+        changed = []
+        for item in items:
+            old = previous_by_id.pop(item[id_key], None)
+            if old is item:
+                # The very record that was read, so unchanged.
+                continue
+            elif old is not None and _content(old) == _content(item):
+                item["hlc"] = old.get("hlc")
+            else:
+                changed.append(item)
+
+        if not changed and not previous_by_id:
+            yield
+            return
+
+        with self._locked() as clock:
+            for item in changed:
+                item["hlc"] = clock.now()
+
+            if previous_by_id:
+                state = self._state
+                for record_id in previous_by_id:
+                    deleted = clock.now()
+                    self._log(
+                        state,
+                        key,
+                        record_id,
+                        id_key=id_key,
+                        seq=deleted,
+                        deleted=deleted,
+                    )
+
+                self._db.persist_raw(state)
+
+            self._index({key: id_key}, clock)
+            yield
+
+    def changes_since(
+        self, since: str | None = None, exclude_node: str | None = None
+    ) -> Delta:
+        """
+        Collect the changes this device saw after ``since``. Only the keys
+        changed since then are read.
+
+        Args:
+            since (str | None): A clock value from a previous delta. ``None``
+              collects everything.
+            exclude_node (str | None): Skip versions authored by this node,
+              because it already has them.
+
+        Returns:
+            Delta
+        """
+        with self._locked() as clock:
+            delta = Delta(node_id=clock.node_id, clock=clock.now())
+
+        state = self._state
+        if since is None or self._index_db.modified() is None:
+            keys = dict(self._collections())
+        else:
+            keys = dict(self._changed(since))
+
+        for key, id_key in keys.items():
+            log = state["log"].get(key, {})
+            for record in self.patchdata.open(key).load_raw_list():
+                version = record.get("hlc") or ""
+                entry = log.get(str(record[id_key]), {})
+                seq = max(entry.get("seq") or "", version)
+                if (since and seq <= since) or (
+                    exclude_node and version.endswith(f".{exclude_node}")
+                ):
+                    continue
+
+                delta.changes.append(
+                    RecordChange(key=key, id_key=id_key, record=record)
+                )
+
+        for key, log in state["log"].items():
+            if since is not None and key not in keys:
+                continue
+
+            for entry in log.values():
+                if (
+                    not (deleted := entry.get("deleted"))
+                    or (since and entry["seq"] <= since)
+                    or (exclude_node and deleted.endswith(f".{exclude_node}"))
+                ):
+                    continue
+
+                delta.deletes.append(
+                    RecordDelete(
+                        key=key,
+                        id_key=entry["id_key"],
+                        record_id=entry["id"],
+                        hlc=deleted,
+                    )
+                )
+
+        return delta
+
+    def apply(self, delta: Delta) -> int:
+        """
+        Merge another device's changes, writing each touched key once.
+
+        Args:
+            delta (Delta): The changes to merge.
+
+        Returns:
+            int: The number of records that changed locally.
+        """
+        touched: dict[str, tuple[str, dict[Any, dict]]] = {}
+
+        def get_records(key: str, id_key: str) -> dict[Any, dict]:
+            if key not in touched:
+                items = self.patchdata.open(key).load_raw_list()
+                touched[key] = (id_key, {x[id_key]: x for x in items})
+
+            return touched[key][1]
+
+        applied = 0
+        with self._locked() as clock:
+            clock.update(delta.clock)
+            state = self._state
+            for change in delta.changes:
+                records = get_records(change.key, change.id_key)
+                record_id = change.record[change.id_key]
+                version = change.record.get("hlc") or ""
+                entry = state["log"].get(change.key, {}).get(str(record_id), {})
+                if (deleted := entry.get("deleted")) and deleted >= version:
+                    # Deleted here after the remote change.
+                    continue
+
+                local = records.get(record_id)
+                if (
+                    local is not None
+                    and resolve_conflict(local, change.record) is local
+                ):
+                    continue
+
+                records[record_id] = change.record
+                self._log(
+                    state, change.key, record_id, id_key=change.id_key, seq=clock.now()
+                )
+                applied += 1
+
+            for delete in delta.deletes:
+                records = get_records(delete.key, delete.id_key)
+                local = records.get(delete.record_id)
+                if local is not None and (local.get("hlc") or "") > delete.hlc:
+                    # Changed here after the remote delete.
+                    continue
+
+                if records.pop(delete.record_id, None) is not None:
+                    applied += 1
+
+                self._log(
+                    state,
+                    delete.key,
+                    delete.record_id,
+                    id_key=delete.id_key,
+                    seq=clock.now(),
+                    deleted=delete.hlc,
+                )
+
+            for key, (_, records) in touched.items():
+                self.patchdata.open(key).persist_raw(list(records.values()))
+
+            self._db.persist_raw(state)
+            if touched:
+                self._index({k: id_key for k, (id_key, _) in touched.items()}, clock)
+
+        return applied
+
+    def sync(self, peer: SyncPeer) -> tuple[int, int]:
+        """
+        Exchange deltas with a peer since the last time they synced.
+
+        Args:
+            peer (SyncPeer): Another :class:`Replica` or a
+              :class:`ServicePeer`.
+
+        Returns:
+            tuple[int, int]: The amount of records changed here and on the peer.
+        """
+        marks = self._state["peers"].get(peer.node_id, {})
+        incoming = peer.changes_since(marks.get("pulled"), exclude_node=self.node_id)
+        pulled = self.apply(incoming)
+
+        outgoing = self.changes_since(
+            marks.get("pushed"), exclude_node=incoming.node_id
+        )
+        pushed = peer.apply(outgoing) if len(outgoing) else 0
+        with self._locked():
+            state = self._state
+            state["peers"][peer.node_id] = {
+                "pulled": incoming.clock,
+                "pushed": outgoing.clock,
+            }
+            self._db.persist_raw(state)
+
+        return pulled, pushed
+
+    def _collections(self) -> Iterator[tuple[str, str]]:
+        schedules_db = self.patchdata.open(SCHEDULES_KEY)
+        yield schedules_db.key, "schedule_id"
+        hormone_keys = {
+            get_hormones_key(s["schedule_id"]) for s in schedules_db.load_raw_list()
+        }
+        for key in sorted(hormone_keys):
+            yield key, "hormone_id"
+
+    def _changed(self, since: str) -> Iterator[tuple[str, str]]:
+        for mark in self._index_db.load_raw_list():
+            if mark["seq"] > since:
+                yield mark["key"], mark["id_key"]
+
+    def _index(self, keys: dict[str, str], clock: HybridLogicalClock):
+        # Mark the keys as changed now, so deltas skip the keys that did
+        # not change. Called with the lock held.
+        marks = [
+            {"key": key, "id_key": id_key, "seq": str(clock)}
+            for key, id_key in keys.items()
+        ]
+        if self._index_db.modified() is not None:
+            self._index_db.append_raw(marks, id_key="key")
+            return
+
+        # Index everything changed before there was an index.
+        state = self._state
+        seqs: dict[str, dict] = {}
+        for key, id_key in self._collections():
+            records = self.patchdata.open(key).load_raw_list()
+            versions = [r.get("hlc") or "" for r in records]
+            versions.extend(e["seq"] for e in state["log"].get(key, {}).values())
+            seqs[key] = {"key": key, "id_key": id_key, "seq": max(versions, default="")}
+
+        for key, log in state["log"].items():
+            if key not in seqs and log:
+                id_key = next(iter(log.values()))["id_key"]
+                seq = max(e["seq"] for e in log.values())
+                seqs[key] = {"key": key, "id_key": id_key, "seq": seq}
+
+        seqs.update((mark["key"], mark) for mark in marks)
+        self._index_db.persist_raw(list(seqs.values()))
+
+    def move_key(self, old_key: str, new_keys: list[str]):
+        """
+        Carry the versions logged for records under ``old_key`` over to the
+        keys the records moved to.
+        """
+        with self._locked() as clock:
+            state = self._state
+            if (log := state["log"].pop(old_key, None)) is None:
+                return
+
+            for key in new_keys:
+                state["log"].setdefault(key, {}).update(
+                    {record_id: dict(entry) for record_id, entry in log.items()}
+                )
+
+            self._db.persist_raw(state)
+            self._index(dict.fromkeys(new_keys, "hormone_id"), clock)
+
+    def _log(self, state: dict, key: str, record_id: Any, **kwargs):
+        entry = {"id": record_id, **kwargs}
+        state["log"].setdefault(key, {})[str(record_id)] = entry
+
+
+class ServicePeer:
+    """
+    A ``patchday.service`` instance reached through an HTTP client, such
+    as ``httpx.Client(base_url=...)`` or FastAPI's ``TestClient``.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    @cached_property
+    def node_id(self) -> str:
+        response = self.client.get("/sync/node")
+        response.raise_for_status()
+        return response.json()["node_id"]
+
+    def changes_since(
+        self, since: str | None = None, exclude_node: str | None = None
+    ) -> Delta:
+        params = {
+            k: v for k, v in (("since", since), ("exclude_node", exclude_node)) if v
+        }
+        response = self.client.get("/sync", params=params)
+        response.raise_for_status()
+        return Delta.model_validate(response.json())
+
+    def apply(self, delta: Delta) -> int:
+        response = self.client.post(
+            "/sync",
+            content=delta.model_dump_json(),
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+        return response.json()["applied"]
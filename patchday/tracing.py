@@ -0,0 +1,405 @@
+import atexit
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Protocol, final
+
+# NOTE: Tracing is off unless configured, in which case `span()` hands back a
+#   shared no-op object. This module is imported by storage, so it must stay
+#   cheap to import (no pydantic).
+
+# Set to e.g. "chrome:/tmp/trace.json" or "otlp:/tmp/trace.json". Separate
+# several exporters with commas. Each process writes its own file, with its
+# process ID added to the name, e.g. "/tmp/trace.1234.json".
+TRACE_ENV = "PATCHDAY_TRACE"
+
+# File exporters write once this many spans are buffered, or once this many
+# seconds passed since they last wrote.
+FLUSH_SPANS = 512
+FLUSH_SECONDS = 5.0
+
+
+def _random_id(size: int) -> int:
+    return int.from_bytes(os.urandom(size), "big")
+
+
+class Span:
+    """
+    A timed operation, optionally nested in another.
+    """
+
+    __slots__ = (
+        "attributes",
+        "end_ns",
+        "error",
+        "name",
+        "parent_id",
+        "span_id",
+        "start_ns",
+        "thread_id",
+        "trace_id",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: int,
+        parent_id: int | None = None,
+        attributes: dict[str, Any] | None = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _random_id(8)
+        self.parent_id = parent_id
+        self.attributes = attributes or {}
+        self.thread_id = threading.get_ident()
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.error: str | None = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    @property
+    def duration_ns(self) -> int:
+        return (self.end_ns or time.time_ns()) - self.start_ns
+
+
+@final
+class _NoopSpan:
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *args):
+        return None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Exporter(Protocol):
+    def export(self, span: Span): ...
+
+    @property
+    def file_path(self) -> Path:
+        """
+        The file this process writes.
+        """
+        if not self.per_process:
+            return self.path
+
+        return self.path.with_name(f"{self.path.stem}.{os.getpid()}{self.path.suffix}")
+
+    @property
+    def _started(self) -> bool:
+        # A forked process starts a file of its own.
+        return self._pid == os.getpid()
+
+    def shutdown(self): ...
+
+
+class _FileExporter(ABC):
+    """
+    Buffers spans and appends them to a file in batches, so memory stays
+    bounded in long-running processes and a crash loses at most one batch.
+
+    With ``per_process``, the process ID is added to the file name, so
+    processes sharing the configuration, such as service workers, do not
+    write over each other's spans.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_buffer: int = FLUSH_SPANS,
+        flush_interval: float = FLUSH_SECONDS,
+        per_process: bool = False,
+    ):
+        self.path = Path(path)
+        self.max_buffer = max_buffer
+        self.flush_interval = flush_interval
+        self.per_process = per_process
+        self._buffer: list[dict] = []
+        # The process that started the file.
+        self._pid: int | None = None
+        self._closed = False
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        record = self._encode(span)
+        with self._lock:
+            if self._closed:
+                return
+
+            self._buffer.append(record)
+            if (
+                len(self._buffer) >= self.max_buffer
+                or time.monotonic() - self._flushed_at >= self.flush_interval
+            ):
+                self._flush()
+
+    @property
+    def file_path(self) -> Path:
+        """
+        The file this process writes.
+        """
+        if not self.per_process:
+            return self.path
+
+        return self.path.with_name(f"{self.path.stem}.{os.getpid()}{self.path.suffix}")
+
+    @property
+    def _started(self) -> bool:
+        # A forked process starts a file of its own.
+        return self._pid == os.getpid()
+
+    def shutdown(self):
+        with self._lock:
+            self._flush()
+            if self._started and not self._closed:
+                self._finish()
+
+            self._closed = True
+
+    def _flush(self):
+        self._flushed_at = time.monotonic()
+        if not self._buffer:
+            return
+
+        records, self._buffer = self._buffer, []
+        first = not self._started
+        if first:
+            # A new trace replaces the file from an earlier run.
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            self.file_path.write_text("")
+            self._pid = os.getpid()
+
+        with open(self.file_path, "a", encoding="utf8") as file:
+            file.write(self._format(records, first=first))
+
+    @abstractmethod
+    def _encode(self, span: Span) -> dict: ...
+
+    @abstractmethod
+    def _format(self, records: list[dict], first: bool) -> str: ...
+
+    def _finish(self):
+        pass
+
+
+class ChromeTraceExporter(_FileExporter):
+    """
+    Writes spans as Chrome trace events, viewable in ``chrome://tracing``
+    or Perfetto. Uses the JSON array format, which those tools read even
+    before the closing bracket is written.
+    """
+
+    def _encode(self, span: Span) -> dict:
+        args = dict(span.attributes)
+        if span.error:
+            args["error"] = span.error
+
+        return {
+            "name": span.name,
+            "cat": "patchday",
+            "ph": "X",
+            "ts": span.start_ns / 1000,
+            "dur": span.duration_ns / 1000,
+            "pid": os.getpid(),
+            "tid": span.thread_id,
+            "args": args,
+        }
+
+    def _format(self, records: list[dict], first: bool) -> str:
+        events = ",\n".join(json.dumps(r, default=str) for r in records)
+        return f"[\n{events}" if first else f",\n{events}"
+
+    def _finish(self):
+        with open(self.file_path, "a", encoding="utf8") as file:
+            file.write("\n]\n")
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    elif isinstance(value, int):
+        return {"intValue": str(value)}
+    elif isinstance(value, float):
+        return {"doubleValue": value}
+
+    return {"stringValue": str(value)}
+
+
+class OTLPJSONExporter(_FileExporter):
+    """
+    Writes spans in the OTLP/JSON trace format, which OpenTelemetry
+    collectors and most tracing backends can import. Each batch is one line,
+    like the collector's file exporter writes.
+    """
+
+    def __init__(self, path: Path, service_name: str = "patchday", **kwargs):
+        super().__init__(path, **kwargs)
+        self.service_name = service_name
+
+    def _encode(self, span: Span) -> dict:
+        data: dict[str, Any] = {
+            "traceId": f"{span.trace_id:032x}",
+            "spanId": f"{span.span_id:016x}",
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.start_ns + span.duration_ns),
+            "attributes": [
+                {"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()
+            ],
+            "status": {"code": 2, "message": span.error} if span.error else {},
+        }
+        if span.parent_id is not None:
+            data["parentSpanId"] = f"{span.parent_id:016x}"
+
+        return data
+
+    def _format(self, records: list[dict], first: bool) -> str:
+        resource = {
+            "attributes": [
+                {"key": "service.name", "value": _otlp_value(self.service_name)}
+            ]
+        }
+        data = {
+            "resourceSpans": [
+                {
+                    "resource": resource,
+                    "scopeSpans": [{"scope": {"name": "patchday"}, "spans": records}],
+                }
+            ]
+        }
+        return f"{json.dumps(data)}\n"
+
+
+EXPORTERS: dict[str, type] = {
+    "chrome": ChromeTraceExporter,
+    "otlp": OTLPJSONExporter,
+}
+
+# The span running in this context, if any.
+_current: ContextVar[Span | None] = ContextVar("patchday_span", default=None)
+
+
+class Tracer:
+    """
+    Records spans and hands finished ones to its exporters.
+    """
+
+    def __init__(self, exporters: list[Exporter] | None = None):
+        self.exporters = exporters or []
+
+    @classmethod
+    def from_env(cls) -> "Tracer | None":
+        """
+        Create a tracer from ``PATCHDAY_TRACE``, or ``None`` when unset.
+        """
+        if not (value := os.environ.get(TRACE_ENV)):
+            return None
+
+        exporters = []
+        for item in value.split(","):
+            kind, _, path = item.partition(":")
+            if kind not in EXPORTERS or not path:
+                raise ValueError(f"Invalid {TRACE_ENV} value '{item}'.")
+
+            exporters.append(EXPORTERS[kind](Path(path), per_process=True))
+
+        tracer = cls(exporters)
+        atexit.register(tracer.shutdown)
+        return tracer
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        parent = _current.get()
+        trace_id = parent.trace_id if parent else _random_id(16)
+        span = Span(
+            name,
+            trace_id,
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+        )
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as err:
+            span.error = repr(err)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current.reset(token)
+            for exporter in self.exporters:
+                exporter.export(span)
+
+    @property
+    def file_path(self) -> Path:
+        """
+        The file this process writes.
+        """
+        if not self.per_process:
+            return self.path
+
+        return self.path.with_name(f"{self.path.stem}.{os.getpid()}{self.path.suffix}")
+
+    @property
+    def _started(self) -> bool:
+        # A forked process starts a file of its own.
+        return self._pid == os.getpid()
+
+    def shutdown(self):
+        for exporter in self.exporters:
+            exporter.shutdown()
+
+
+_UNSET: Any = object()
+_tracer: Tracer | None = _UNSET
+
+
+def get_tracer() -> Tracer | None:
+    """
+    The global tracer, configured from the environment on first use.
+    """
+    global _tracer
+    if _tracer is _UNSET:
+        _tracer = Tracer.from_env()
+
+    return _tracer
+
+
+def set_tracer(tracer: Tracer | None) -> Tracer | None:
+    """
+    Replace the global tracer. Returns the previous one.
+    """
+    global _tracer
+    previous = get_tracer()
+    _tracer = tracer
+    return previous
+
+
+def span(name: str, **attributes):
+    """
+    Trace a block of code::
+
+        with span("schedule.take", schedule_id=schedule_id):
+            ...
+
+    Does nothing unless a tracer is configured.
+    """
+    if (tracer := get_tracer()) is None:
+        return _NOOP_SPAN
+
+    return tracer.span(name, **attributes)
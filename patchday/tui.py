@@ -1,62 +1,151 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, ClassVar
 
+from rich.segment import Segment
 from textual.app import App, ComposeResult
-from textual.containers import VerticalScroll
-from textual.widget import Widget
-from textual.widgets import Label, Button
-import patchday
+from textual.binding import Binding, BindingType
+from textual.events import Click
+from textual.geometry import Region, Size
+from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.widgets import Input, Label
+
 from patchday.date import format_date
 
 if TYPE_CHECKING:
-    from patchday.schedule import HormoneSchedule
+    from patchday.summary import ScheduleSummary
+
+
+# Drawn at the end of every row; clicking it takes that schedule.
+TAKE_BUTTON = " Take "
 
+# The lines each schedule takes up, enough for its status.
+ROW_HEIGHT = 2
 
-class BaseWidget(Widget):
-    def update_peer(self, selector_id: str, *args, **kwargs):
-        self.query_one(f"#{selector_id}").update(*args, **kwargs)  # type: ignore
 
+def get_status(summary: "ScheduleSummary") -> str:
+    if (exp_date := summary.next_expiration_date) and (
+        last_taken_date := summary.last_taken_date
+    ):
+        return (
+            f"Last taken: {format_date(last_taken_date)}\n"
+            f"Next expiration: {format_date(exp_date)}"
+        )
 
-class ScheduleContainer(BaseWidget):
-    schedule: "HormoneSchedule"
+    return "Not yet taken!"
+
+
+class ScheduleList(ScrollView, can_focus=True):
+    """
+    Every schedule with its status and a button to take it. Rows come from
+    the summary file in one read and only the visible lines are rendered,
+    so showing many schedules costs no more than showing a few.
+    """
+
+    BINDINGS: ClassVar[list[BindingType]] = [
+        Binding("up", "cursor_up", "Up", show=False),
+        Binding("down", "cursor_down", "Down", show=False),
+        Binding("enter,t", "take", "Take"),
+    ]
+    COMPONENT_CLASSES: ClassVar[set[str]] = {
+        "schedule-list--button",
+        "schedule-list--cursor",
+    }
+    DEFAULT_CSS = """
+        ScheduleList { height: 1fr; }
+        ScheduleList > .schedule-list--button { background: $primary; }
+        ScheduleList > .schedule-list--cursor { background: $accent; }
+    """
+
+    cursor: reactive[int] = reactive(0)
+    filter_text: reactive[str] = reactive("")
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._summaries: list[ScheduleSummary] = []
+        self.rows: list[ScheduleSummary] = []
+
+    def on_mount(self) -> None:
+        self.load()
+
+    def load(self) -> None:
+        """
+        Read the schedules again, e.g. after they change.
+        """
+        from patchday.main import patchday
+
+        self._summaries = patchday.summary.load()
+        self._filter_rows()
+
+    def watch_filter_text(self) -> None:
+        self._filter_rows()
+
+    def watch_cursor(self) -> None:
+        width = self.scrollable_content_region.width
+        region = Region(0, self.cursor * ROW_HEIGHT, width, ROW_HEIGHT)
+        self.scroll_to_region(region, animate=False)
+        self.refresh()
+
+    def render_line(self, y: int) -> Strip:
+        index, line = divmod(self.scroll_offset.y + y, ROW_HEIGHT)
+        width = self.scrollable_content_region.width
+        if index >= len(self.rows):
+            return Strip.blank(width)
+
+        summary = self.rows[index]
+        style = None
+        if index == self.cursor:
+            style = self.get_component_rich_style("schedule-list--cursor")
+
+        status = get_status(summary).split("\n")
+        title = summary.schedule_id if line == 0 else ""
+        text = f"{title:<24} {status[line] if line < len(status) else ''}"
+        if line != 0:
+            return Strip([Segment(text.ljust(width), style)]).crop(0, width)
+
+        text_width = max(width - len(TAKE_BUTTON) - 1, 0)
+        button_style = self.get_component_rich_style("schedule-list--button")
+        segments = [
+            Segment(f"{text[:text_width]:<{text_width}} ", style),
+            Segment(TAKE_BUTTON, button_style),
+        ]
+        return Strip(segments).crop(0, width)
 
-    @classmethod
-    def from_schedule(cls, schedule: "HormoneSchedule") -> "ScheduleContainer":
-        instance = cls()
-        instance.schedule = schedule
-        return instance
+    def action_cursor_up(self) -> None:
+        self.cursor = max(self.cursor - 1, 0)
 
-    def compose(self):
-        yield Label(self.schedule.schedule_id)
-        yield self.create_status_label()
-        yield Button("Take", id="take_button")
+    def action_cursor_down(self) -> None:
+        self.cursor = min(self.cursor + 1, max(len(self.rows) - 1, 0))
 
-    def on_button_pressed(self, event: Button.Pressed) -> None:
-        if event.button.id != "take_button":
-            # Not the right button pressed.
+    def action_take(self) -> None:
+        if not self.rows:
             return
 
-        self.handle_take_button_pressed()
+        from patchday.main import patchday
 
-    def get_next_expiration_status(self) -> str:
-        next_hormone = self.schedule.next_expired_hormone
-        if exp_date := next_hormone.expiration_date:
-            if last_taken := self.schedule.last_taken_hormone:
-                if last_taken_date := last_taken.date_applied:
-                    return (
-                        f"Last taken: {format_date(last_taken_date)}\n"
-                        f"Next expiration: {format_date(exp_date)}"
-                    )
+        # Only the taken schedule is loaded and validated.
+        schedule_id = self.rows[self.cursor].schedule_id
+        patchday.schedules[schedule_id].take_next_hormone()
+        self.load()
 
-        return "Not yet taken!"
+    def on_click(self, event: Click) -> None:
+        index, line = divmod(self.scroll_offset.y + event.y, ROW_HEIGHT)
+        if index >= len(self.rows):
+            return
 
-    def create_status_label(self) -> Label:
-        status_text = self.get_next_expiration_status()
-        return Label(status_text, id="take_label")
+        self.cursor = index
+        width = self.scrollable_content_region.width
+        if line == 0 and width - len(TAKE_BUTTON) <= event.x < width:
+            self.action_take()
 
-    def handle_take_button_pressed(self):
-        self.schedule.take_next_hormone()
-        status_text = self.get_next_expiration_status()
-        self.update_peer("take_label", status_text)
+    def _filter_rows(self) -> None:
+        text = self.filter_text.lower()
+        self.rows = [s for s in self._summaries if text in s.schedule_id.lower()]
+        self.virtual_size = Size(
+            self.scrollable_content_region.width, len(self.rows) * ROW_HEIGHT
+        )
+        self.cursor = min(self.cursor, max(len(self.rows) - 1, 0))
+        self.refresh()
 
 
 class PatchDay(App):
@@ -64,25 +153,47 @@ class PatchDay(App):
         Screen { align: center middle; }
         Label { width: auto; }
     """
+    BINDINGS: ClassVar[list[BindingType]] = [
+        ("u", "undo", "Undo"),
+        ("r", "redo", "Redo"),
+    ]
 
     def compose(self) -> ComposeResult:
         yield Label("best hrt ever\n~~~~~~~")
-
-        schedules = [
-            ScheduleContainer.from_schedule(schedule) for schedule in patchday.schedules
-        ]
-
-        yield VerticalScroll(*schedules)
+        yield Input(placeholder="Filter schedules", id="filter")
+        yield ScheduleList(id="schedules")
 
     def on_ready(self) -> None:
-        self.update_dates()
+        self.query_one(ScheduleList).focus()
 
         # Update dates every minute so it works like a clock.
         self.set_interval(60, self.update_dates)
 
+    def on_input_changed(self, event: Input.Changed) -> None:
+        self.query_one(ScheduleList).filter_text = event.value
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        self.query_one(ScheduleList).focus()
+
+    def action_undo(self) -> None:
+        self._move_journal("undo")
+
+    def action_redo(self) -> None:
+        self._move_journal("redo")
+
+    def _move_journal(self, direction: str):
+        from patchday.journal import describe_entry
+        from patchday.main import patchday
+
+        if entry := getattr(patchday.journal, direction)():
+            self.notify(f"{direction.capitalize()}: {describe_entry(entry)}")
+            self.query_one(ScheduleList).load()
+        else:
+            self.notify(f"Nothing to {direction}.")
+
     def update_dates(self) -> None:
-        # TODO
-        pass
+        # Relative dates change as time passes; only visible lines redraw.
+        self.query_one(ScheduleList).refresh()
 
 
 def launch_app():
@@ -1,11 +1,20 @@
 from datetime import timedelta, datetime
-from enum import Enum
-from typing import Any
+from typing import Annotated, Any
 
-from pydantic import RootModel, model_validator
+from pydantic import (
+    AfterValidator,
+    PlainSerializer,
+    PlainValidator,
+    RootModel,
+    model_validator,
+)
 
 from patchday.constants import MAX_QUANTITY
-from patchday.date import parse_duration, format_duration
+
+# NOTE: Defined in constants so the CLI can use it without importing pydantic.
+from patchday.constants import DeliveryMethod  # noqa: F401
+from patchday.date import parse_duration, format_duration, to_local
+from patchday.recurrence import RecurrenceRule, parse_recurrence
 
 # Can be custom.
 ScheduleID = str
@@ -15,20 +24,6 @@ HormoneID = int
 SiteID = int
 
 
-class DeliveryMethod(str, Enum):
-    PATCH = "PATCH"
-    INJECTION = "INJECTION"
-    PILL = "PILL"
-    GEL = "GEL"
-
-    @property
-    def plural_name(self) -> str:
-        if self is DeliveryMethod.PATCH:
-            return "patches"
-
-        return f"{self.lower()}s"
-
-
 class ExpirationDuration(RootModel[int]):
     """
     An expiration duration for hormones. It works like
@@ -67,13 +62,48 @@ class ExpirationDuration(RootModel[int]):
         return date + self.timedelta
 
 
-def validate_quantity(value: int) -> int:
+def _validate_recurrence(value: Any) -> RecurrenceRule:
+    if isinstance(value, RecurrenceRule):
+        return value
+    elif isinstance(value, str):
+        return parse_recurrence(value)
+
+    raise ValueError(
+        f"Invalid recurrence {value!r}. Expecting strings like 'mon/thu 9am'."
+    )
+
+
+# A calendar rule such as ``"mon/thu 9am"``, stored as its string form.
+Recurrence = Annotated[
+    RecurrenceRule,
+    PlainValidator(_validate_recurrence),
+    PlainSerializer(str, return_type=str),
+]
+
+
+# A date in naive local time. Dates with a time zone, such as ISO strings
+# ending in ``Z``, are converted.
+LocalDatetime = Annotated[datetime, AfterValidator(to_local)]
+
+
+def validate_quantity(value: int, max_quantity: int | None = MAX_QUANTITY) -> int:
+    """
+    Validate a schedule's hormone quantity.
+
+    Args:
+        value (int): The quantity.
+        max_quantity (int | None): The largest allowed quantity, or ``None``
+          for no limit.
+
+    Returns:
+        int: The quantity as an integer.
+    """
     try:
         int_value = int(value)
     except Exception as err:
         raise TypeError(err)
 
-    if int_value > MAX_QUANTITY or int_value < 0:
-        raise ValueError(f"'{int_value}' out of bounds (max={MAX_QUANTITY}).")
+    if int_value < 0 or (max_quantity is not None and int_value > max_quantity):
+        raise ValueError(f"'{int_value}' out of bounds (max={max_quantity}).")
 
     return int_value
@@ -24,6 +24,9 @@ extras_require = {
         "wheel",
         "twine",
     ],
+    "levels": [
+        "numpy>=1.26",
+    ],
     "dev": [
         "commitizen",
         "pre-commit",
@@ -61,7 +64,7 @@ setup(
         "xdg-base-dirs>=6.0.2,<7",
     ],
     entry_points={
-        "console_scripts": ["pday=patchday.cli:app"],
+        "console_scripts": ["pday=patchday.status:main"],
     },
     python_requires=">=3.10,<4",
     extras_require=extras_require,
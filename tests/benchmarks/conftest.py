@@ -0,0 +1,154 @@
+import json
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from patchday.main import PatchDay
+from patchday.storage import SCHEDULES_KEY, get_hormones_key
+from patchday.types import DeliveryMethod
+
+# Timings are saved relative to a calibration loop timed in the same session,
+# so baselines saved on one machine still apply on a faster or slower one.
+BASELINES_PATH = Path(__file__).parent / "baselines.json"
+QUICK_SIZES = (1, 100)
+ALL_SIZES = (1, 100, 10_000, 1_000_000)
+SCHEDULE_ID = "Benchmark Schedule"
+
+# Ignore slowdowns smaller than this many seconds; tiny timings are noisy.
+NOISE_FLOOR = 0.001
+
+
+def pytest_generate_tests(metafunc):
+    if "size" not in metafunc.fixturenames:
+        return
+
+    config = metafunc.config
+    if sizes := config.getoption("--pd-benchmark-sizes"):
+        params = [int(x) for x in sizes.split(",")]
+    elif config.getoption("--pd-benchmark") or config.getoption("--pd-benchmark-save"):
+        params = list(ALL_SIZES)
+    else:
+        params = list(QUICK_SIZES)
+
+    metafunc.parametrize("size", params)
+
+
+def calibrate() -> float:
+    """
+    Time a fixed mix of interpreter work and JSON encoding, like the code
+    under test does, as the unit benchmark timings are saved in.
+    """
+    records = [
+        {"schedule_id": f"Schedule {idx}", "quantity": idx} for idx in range(1000)
+    ]
+    return min(
+        timeit.repeat(lambda: json.loads(json.dumps(records)), number=10, repeat=5)
+    )
+
+
+@pytest.fixture(scope="session")
+def calibration() -> float:
+    return calibrate()
+
+
+@pytest.fixture(scope="session")
+def baselines(request):
+    saved = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.is_file() else {}
+    results: dict[str, float] = {}
+    yield saved, results
+
+    if request.config.getoption("--pd-benchmark-save") and results:
+        BASELINES_PATH.write_text(
+            json.dumps({**saved, **results}, indent=2, sort_keys=True) + "\n"
+        )
+
+
+@pytest.fixture
+def pd_benchmark(request, baselines, calibration):
+    """
+    Time a callable (best of several rounds) and, with ``--pd-benchmark``,
+    fail if it regressed past the threshold compared to its baseline.
+    """
+    saved, results = baselines
+    config = request.config
+
+    def run(fn, rounds: int = 5, setup=None) -> float:
+        timings = []
+        for _ in range(rounds):
+            if setup is not None:
+                setup()
+
+            timings.append(timeit.timeit(fn, number=1))
+
+        best = min(timings)
+        name = request.node.name
+        results[name] = best / calibration
+        if config.getoption("--pd-benchmark") and (baseline := saved.get(name)):
+            expected = baseline * calibration
+            limit = expected * config.getoption("--pd-benchmark-threshold")
+            if best > limit and best - expected > NOISE_FLOOR:
+                pytest.fail(
+                    f"{name} regressed: {best:.6f}s > {limit:.6f}s "
+                    f"(baseline {expected:.6f}s on this machine)."
+                )
+
+        return best
+
+    return run
+
+
+def rounds_for(size: int) -> int:
+    # Keep the largest sizes to a single round.
+    return 1 if size >= 100_000 else 5
+
+
+@pytest.fixture
+def app(tmp_path):
+    return PatchDay(storage_path=tmp_path)
+
+
+def seed_schedules(app: PatchDay, size: int):
+    """
+    Write ``size`` injection schedules directly, bypassing
+    ``create_schedule`` for speed.
+    """
+    records = [
+        {
+            "delivery_method": DeliveryMethod.INJECTION.value,
+            "expiration_duration": 604800,
+            "schedule_id": f"Schedule {idx}",
+            "quantity": 1,
+        }
+        for idx in range(size)
+    ]
+    app._db.open(SCHEDULES_KEY).persist_raw(records)
+
+
+def seed_hormones(app: PatchDay, size: int):
+    """
+    Write one patch schedule with ``size`` hormones (past the default
+    ``MAX_QUANTITY``), all applied at different times.
+    """
+    app._db.open(SCHEDULES_KEY).persist_raw(
+        [
+            {
+                "delivery_method": DeliveryMethod.PATCH.value,
+                "expiration_duration": 302400,
+                "schedule_id": SCHEDULE_ID,
+                "quantity": size,
+            }
+        ]
+    )
+    now = datetime.now()
+    hormones = [
+        {
+            "expiration_duration": 302400,
+            "hormone_id": idx,
+            "date_applied": (now - timedelta(minutes=idx)).isoformat(),
+        }
+        for idx in range(size)
+    ]
+    key = get_hormones_key(SCHEDULE_ID)
+    app._db.open(key).persist_raw(hormones)
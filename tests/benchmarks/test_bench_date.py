@@ -0,0 +1,19 @@
+from datetime import datetime, timedelta
+
+from patchday.date import format_date, format_duration, parse_duration
+
+# Date helpers do not depend on the data size; time a batch of calls instead.
+BATCH = 1_000
+
+
+def test_parse_duration(pd_benchmark):
+    pd_benchmark(lambda: [parse_duration("3d12h30m15s") for _ in range(BATCH)])
+
+
+def test_format_duration(pd_benchmark):
+    pd_benchmark(lambda: [format_duration(987_654) for _ in range(BATCH)])
+
+
+def test_format_date(pd_benchmark):
+    dates = [datetime.now() + timedelta(hours=h) for h in range(-500, 500)]
+    pd_benchmark(lambda: [format_date(d) for d in dates])
@@ -0,0 +1,79 @@
+from patchday.schedule import ScheduleManager
+from patchday.types import DeliveryMethod
+from tests.benchmarks.conftest import (
+    SCHEDULE_ID,
+    rounds_for,
+    seed_hormones,
+    seed_schedules,
+)
+
+
+def test_get_schedules(pd_benchmark, app, size):
+    seed_schedules(app, size)
+    assert len(app.schedules.get_schedules()) == size
+    pd_benchmark(app.schedules.get_schedules, rounds=rounds_for(size))
+
+
+def test_get_schedule_by_id(pd_benchmark, app, size):
+    seed_schedules(app, size)
+    schedule_id = f"Schedule {size - 1}"
+    pd_benchmark(lambda: app.schedules[schedule_id], rounds=rounds_for(size))
+
+
+def test_create_schedule(pd_benchmark, app, size):
+    seed_schedules(app, size)
+    manager = ScheduleManager(app._db, max_schedules=None)
+    # Loaded once up front; only the cost of each create is measured.
+    assert len(manager) == size
+    counter = iter(range(10))
+
+    def create():
+        schedule_id = f"New Schedule {next(counter)}"
+        manager.create_schedule(DeliveryMethod.PILL, "1d", schedule_id=schedule_id)
+
+    # The first write also builds the summary and sync index once.
+    create()
+    pd_benchmark(create, rounds=rounds_for(size))
+
+
+def test_create_schedules(pd_benchmark, app, size):
+    seed_schedules(app, size)
+    manager = ScheduleManager(app._db, max_schedules=None)
+    # Loaded once up front; only the cost of each create is measured.
+    assert len(manager) == size
+    counter = iter(range(10))
+
+    def create():
+        batch = next(counter)
+        manager.create_schedules(
+            [
+                {
+                    "delivery_method": DeliveryMethod.PILL,
+                    "expiration": "1d",
+                    "schedule_id": f"New Schedule {batch}.{idx}",
+                }
+                for idx in range(10)
+            ]
+        )
+
+    # The first write also builds the summary and sync index once.
+    create()
+    pd_benchmark(create, rounds=rounds_for(size))
+
+
+def test_next_expired_hormone(pd_benchmark, app, size):
+    seed_hormones(app, size)
+    schedule = app.schedules[SCHEDULE_ID]
+    pd_benchmark(lambda: schedule.next_expired_hormone, rounds=rounds_for(size))
+
+
+def test_take_next_hormone(pd_benchmark, app, size):
+    seed_hormones(app, size)
+    schedule = app.schedules[SCHEDULE_ID]
+    pd_benchmark(schedule.take_next_hormone, rounds=rounds_for(size))
+
+
+def test_get_hormone(pd_benchmark, app, size):
+    seed_hormones(app, size)
+    schedule = app.schedules[SCHEDULE_ID]
+    pd_benchmark(lambda: schedule.get_hormone(size - 1), rounds=rounds_for(size))
@@ -0,0 +1,41 @@
+from patchday.models import Hormone
+from tests.benchmarks.conftest import rounds_for
+
+EXPIRATION = "3d12h"
+
+
+def create_hormones(size: int) -> list[Hormone]:
+    return [
+        Hormone(expiration_duration=EXPIRATION, hormone_id=idx) for idx in range(size)
+    ]
+
+
+def test_persist_list(pd_benchmark, app, size):
+    db = app._db.open("bench")
+    hormones = create_hormones(size)
+    pd_benchmark(
+        lambda: db.persist_list(hormones, id_key="hormone_id"),
+        rounds=rounds_for(size),
+    )
+
+
+def test_load_list(pd_benchmark, app, size):
+    db = app._db.open("bench")
+    db.persist_list(create_hormones(size), id_key="hormone_id")
+    pd_benchmark(
+        lambda: db.load_list(Hormone, expiration_duration=EXPIRATION),
+        rounds=rounds_for(size),
+    )
+
+
+def test_persist_list_object(pd_benchmark, app, size):
+    db = app._db.open("bench")
+    hormones = create_hormones(size)
+    db.persist_list(hormones, id_key="hormone_id")
+    hormone = hormones[-1]
+
+    def persist():
+        hormone.apply()
+        db.persist_list_object(hormone, id_key="hormone_id")
+
+    pd_benchmark(persist, rounds=rounds_for(size))
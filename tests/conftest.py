@@ -1,6 +1,55 @@
 import pytest
 
+from patchday.types import DeliveryMethod
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption(
+        "--pd-benchmark",
+        action="store_true",
+        help="run benchmarks at every size and compare them to the baselines",
+    )
+    group.addoption(
+        "--pd-benchmark-save",
+        action="store_true",
+        help="save the benchmark results as the new baselines",
+    )
+    group.addoption(
+        "--pd-benchmark-sizes",
+        help="comma-separated data sizes, e.g. '1,100,10000,1000000'",
+    )
+    group.addoption(
+        "--pd-benchmark-threshold",
+        type=float,
+        default=1.5,
+        help="fail when a benchmark is this many times slower than its baseline",
+    )
+
 
 @pytest.fixture
 def mock_data(mocker):
     return mocker.MagicMock()
+
+
+@pytest.fixture
+def schedule_id() -> str:
+    """
+    The ID of the schedule in ``app``. Override it to name it differently.
+    """
+    return "My Schedule"
+
+
+@pytest.fixture
+def app(tmp_path, schedule_id):
+    """
+    A :class:`~patchday.main.PatchDay` storing in a temporary directory,
+    with a patch schedule of two.
+    """
+    from patchday.main import PatchDay
+
+    app = PatchDay(storage_path=tmp_path)
+    app.schedules.create_schedule(
+        DeliveryMethod.PATCH, "3d12h", schedule_id=schedule_id, quantity=2
+    )
+    return app
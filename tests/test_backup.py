@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+
+import pytest
+from click.testing import CliRunner
+
+from patchday.backup import RetentionPolicy, Snapshot, SnapshotNotFoundError
+from patchday.storage import get_hormones_key
+from patchday.types import DeliveryMethod
+
+
+def count_chunks(app) -> int:
+    return len(list((app.backups.root / "objects").glob("*/*")))
+
+
+def test_snapshot_deduplicates(app):
+    first = app.backups.snapshot()
+    assert "schedules" in first.files
+    assert not any(k.startswith(".") for k in first.files)
+    chunks = count_chunks(app)
+
+    second = app.backups.snapshot()
+    assert second.files == first.files
+    assert count_chunks(app) == chunks
+
+    app.schedules["My Schedule"].take_next_hormone()
+    app.backups.snapshot()
+    assert count_chunks(app) > chunks
+    assert [s.snapshot_id for s in app.backups.snapshots()][:2] == [
+        first.snapshot_id,
+        second.snapshot_id,
+    ]
+
+
+def test_restore(app):
+    snapshot = app.backups.snapshot()
+    schedule = app.schedules["My Schedule"]
+    schedule.take_next_hormone()
+    app.schedules.create_schedule(DeliveryMethod.PILL, "1d", schedule_id="Pills")
+
+    assert app.backups.restore(at=datetime.now()) == snapshot
+    assert "Pills" not in app.schedules
+    assert not app.schedules["My Schedule"].active_hormones
+
+    with pytest.raises(SnapshotNotFoundError):
+        app.backups.restore(at=datetime.now() - timedelta(days=1))
+
+
+def test_snapshot_appended(app):
+    app.schedules.create_schedules(
+        [{"delivery_method": DeliveryMethod.PILL, "expiration": "1d"}] * 3
+    )
+    app.schedules.create_schedule(DeliveryMethod.PILL, "1d", schedule_id="Pills")
+    assert app.schedules.db.log_path.is_file()
+    snapshot = app.backups.snapshot()
+    assert b'"Pills"' in app.backups.read(snapshot, "schedules")
+
+    app.schedules.remove_schedule("Pills")
+    app.backups.restore()
+    assert "Pills" in app.schedules
+
+
+def test_restore_single_key(app):
+    app.backups.snapshot()
+    schedule = app.schedules["My Schedule"]
+    schedule.take_next_hormone()
+    app.schedules.create_schedule(DeliveryMethod.PILL, "1d", schedule_id="Pills")
+
+    app.backups.restore(keys=[get_hormones_key("My Schedule")])
+    assert not app.schedules["My Schedule"].active_hormones
+    assert "Pills" in app.schedules
+
+
+def test_prune(app):
+    app.backups.retention = RetentionPolicy(keep_last=1, keep_daily=0, keep_weekly=0)
+    first = app.backups.snapshot()
+    app.schedules["My Schedule"].take_next_hormone()
+    last = app.backups.snapshot()
+
+    assert app.backups.prune() == [first.snapshot_id]
+    assert app.backups.snapshots() == [last]
+    used = {h for f in last.files.values() for h in f["chunks"]}
+    chunks = {p.name for p in (app.backups.root / "objects").glob("*/*")}
+    assert chunks == used
+
+
+def test_retention_policy():
+    now = datetime(2024, 6, 14, 12).timestamp()
+    snapshots = [
+        Snapshot(snapshot_id=f"{n}", created=now - n * 3600 * 7, files={})
+        for n in range(50)
+    ]
+    keep = RetentionPolicy(keep_last=2, keep_daily=3, keep_weekly=2).select(snapshots)
+    # Two latest, the newest of three days and the newest of an earlier week.
+    assert keep == {"0", "1", "2", "6", "16"}
+
+
+def test_writes_are_atomic(app):
+    app.schedules["My Schedule"].take_next_hormone()
+    assert not [p for p in app._db.path.rglob("*.tmp")]
+
+
+def test_cli(mocker, app):
+    from patchday.cli import app as cli
+
+    mocker.patch("patchday.main.patchday", app)
+    result = CliRunner().invoke(cli, ["backup"])
+    assert result.exit_code == 0, result.output
+    assert "Created snapshot" in result.output
+
+    app.schedules["My Schedule"].take_next_hormone()
+    result = CliRunner().invoke(cli, ["restore", "--key", "schedules"])
+    assert result.exit_code == 0, result.output
+
+    result = CliRunner().invoke(cli, ["restore", "--at", "2000-01-01"])
+    assert result.exit_code != 0
+    assert "No snapshot at or before" in result.output
+
+    result = CliRunner().invoke(cli, ["backup", "--list"])
+    assert result.output.count("bytes") == 1
+
+
+def test_snapshot_includes_history(app):
+    app.schedules["My Schedule"].take_next_hormone()
+    app.history.compact(now=datetime.now() + timedelta(days=365))
+    (application,) = app.history.query()
+    snapshot = app.backups.snapshot()
+    assert {k for k in snapshot.files if k.startswith("history/")} == {
+        "history/hot.1.jsonl",
+        "history/index.json",
+        f"history/{app.history.segments[0]['name']}",
+    }
+
+    app.schedules["My Schedule"].take_next_hormone()
+    app.history.compact(now=datetime.now() + timedelta(days=365))
+    assert len(app.history.query()) == 2
+
+    app.backups.restore()
+    assert app.history.query() == [application]
+    assert not (app.history.root / "hot.2.jsonl").exists()
+
+
+def test_snapshot_uses_clock(app):
+    from patchday.clock import ManualClock, use_clock
+
+    date = datetime(2024, 6, 14, 12)
+    with use_clock(ManualClock(date)):
+        snapshot = app.backups.snapshot()
+
+    assert snapshot.created_date == date
+    assert app.backups.find(at=date) == snapshot
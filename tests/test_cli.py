@@ -0,0 +1,107 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from patchday.main import PatchDay
+from patchday.types import DeliveryMethod
+
+# Cumulative microseconds `import patchday.cli` may take. Click alone is
+# most of it; Textual or pydantic would blow well past this.
+IMPORT_TIME_BUDGET = 100_000
+HEAVY_MODULES = ("textual", "fastapi", "pydantic")
+
+
+def get_import_times(code: str, **kwargs) -> dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        **kwargs,
+        timeout=60,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+
+    return times
+
+
+def test_import_time_budget():
+    times = get_import_times("import patchday.cli")
+    assert times["patchday.cli"] < IMPORT_TIME_BUDGET
+
+
+@pytest.mark.parametrize(
+    "args",
+    (
+        ["--help"],
+        ["schedule", "create", "--help"],
+        ["schedule", "--help"],
+        ["schedule", "list"],
+    ),
+)
+def test_quick_commands_skip_heavy_imports(args, tmp_path):
+    app = PatchDay(storage_path=tmp_path / "patchday")
+    app.schedules.create_schedule(DeliveryMethod.PATCH, "3d12h", quantity=2)
+    app.schedules[0].take_next_hormone()
+
+    # NOTE: The group callback reads sys.argv to decide whether to launch the TUI.
+    code = (
+        f"import sys; sys.argv = ['pday', *{args!r}]; "
+        "from patchday.cli import app; app(standalone_mode=False)"
+    )
+    env = {**os.environ, "XDG_CONFIG_HOME": f"{tmp_path}"}
+    times = get_import_times(code, env=env)
+    loaded = [m for m in HEAVY_MODULES if m in times]
+    assert not loaded
+
+
+def test_maintenance_repair(mocker, tmp_path):
+    from click.testing import CliRunner
+
+    from patchday.cli import app as cli
+
+    app = PatchDay(storage_path=tmp_path)
+    app.schedules.create_schedule(DeliveryMethod.PATCH, "3d12h", "A", quantity=2)
+    mocker.patch("patchday.main.patchday", app)
+    mocker.patch("sys.argv", ["pday", "maintenance", "repair"])
+
+    result = CliRunner().invoke(cli, ["maintenance", "repair"])
+    assert result.exit_code == 0, result.output
+    assert "Repaired schedule 'A'" in result.output
+
+    result = CliRunner().invoke(cli, ["maintenance", "repair"])
+    assert "Nothing to repair." in result.output
+
+
+def test_hormones_take(mocker, tmp_path):
+    from click.testing import CliRunner
+
+    from patchday.cli import app as cli
+
+    app = PatchDay(storage_path=tmp_path)
+    app.schedules.create_schedule(DeliveryMethod.PATCH, "3d12h", "A", quantity=2)
+    app.schedules.create_schedule(DeliveryMethod.PILL, "1d", "B")
+    mocker.patch("patchday.main.patchday", app)
+    mocker.patch("sys.argv", ["pday", "hormones", "take"])
+
+    result = CliRunner().invoke(cli, ["hormones", "take", "--schedule-id", "B"])
+    assert result.exit_code == 0, result.output
+    assert "Took 1 from 'B'." in result.output
+
+    result = CliRunner().invoke(cli, ["hormones", "take", "--all-expired"])
+    assert result.exit_code == 0, result.output
+    assert result.output == "Took 2 from 'A'.\n"
+
+    result = CliRunner().invoke(cli, ["hormones", "take", "--all-expired"])
+    assert result.output == "Nothing is due.\n"
+
+    result = CliRunner().invoke(cli, ["hormones", "take"])
+    assert result.exit_code == 2
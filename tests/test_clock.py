@@ -0,0 +1,53 @@
+import threading
+from datetime import datetime, timedelta
+
+from patchday.clock import ManualClock, SystemClock, get_clock, set_clock, use_clock
+from patchday.date import format_date
+from patchday.models import Hormone
+
+START = datetime(2024, 6, 14, 12)
+
+
+def test_manual_clock():
+    clock = ManualClock(START)
+    clock.advance(timedelta(hours=1))
+    clock.advance(60)
+    assert clock.now() == START + timedelta(hours=1, minutes=1)
+    assert clock.time() == clock.now().timestamp()
+
+
+def test_use_clock():
+    assert isinstance(get_clock(), SystemClock)
+    seen = []
+    with use_clock(ManualClock(START)):
+        assert get_clock().now() == START
+
+        # Other threads keep their own clock.
+        thread = threading.Thread(target=lambda: seen.append(get_clock()))
+        thread.start()
+        thread.join()
+
+    assert isinstance(seen[0], SystemClock)
+    assert isinstance(get_clock(), SystemClock)
+
+
+def test_set_clock():
+    previous = set_clock(ManualClock(START))
+    try:
+        assert get_clock().now() == START
+    finally:
+        set_clock(previous)
+
+    assert isinstance(get_clock(), SystemClock)
+
+
+def test_models_and_dates_use_clock():
+    hormone = Hormone(expiration_duration="1d", hormone_id=0, date_applied=START)
+    clock = ManualClock(START)
+    with use_clock(clock):
+        assert not hormone.expired
+        assert format_date(START + timedelta(days=1)) == "Tomorrow"
+
+        clock.advance(timedelta(days=1))
+        assert hormone.expired
+        assert format_date(START) == "Yesterday"
@@ -0,0 +1,144 @@
+import socket
+import threading
+
+import pytest
+
+from patchday import daemon as daemon_module
+from patchday import status
+from patchday.daemon import Daemon, forward, is_forwarded
+
+
+@pytest.fixture
+def schedule_id():
+    return "Patches"
+
+
+@pytest.fixture
+def app(mocker, app):
+    mocker.patch("patchday.main.patchday", app)
+    return app
+
+
+@pytest.fixture
+def daemon(app, tmp_path):
+    # NOTE: A short path; Unix socket paths are limited to about 100 bytes.
+    daemon = Daemon(tmp_path / "d.sock")
+    daemon.start()
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    yield daemon
+    daemon.shutdown()
+    thread.join(timeout=5)
+
+
+@pytest.mark.parametrize(
+    "args,expected",
+    [
+        (["schedule"], True),
+        (["schedule", "list"], True),
+        (["schedule", "refill", "Patches", "3"], True),
+        (["status", "--format", "bad"], True),
+        (["undo"], True),
+        ([], False),
+        (["schedule", "create"], False),
+        (["--profile", "schedule", "list"], False),
+        (["serve"], False),
+    ],
+)
+def test_is_forwarded(args, expected):
+    assert is_forwarded(args) is expected
+
+
+def test_forward(app, daemon):
+    response = forward(["schedule", "refill", "Patches", "4"], path=daemon.path)
+    assert response["code"] == 0, response["stderr"]
+    assert response["stdout"].startswith("'Patches' has 4 left, running out")
+    assert app.inventory.get("Patches").stock == 4
+
+    response = forward(["schedule", "list"], path=daemon.path)
+    assert response["code"] == 0
+    assert "4 left" in response["stdout"]
+
+    # Changes made by other processes are seen.
+    app.schedules["Patches"].take_next_hormone()
+    response = forward(["schedule", "list"], path=daemon.path)
+    assert "3 left" in response["stdout"]
+
+
+def test_forward_error(daemon):
+    response = forward(["schedule", "refill", "Nope", "4"], path=daemon.path)
+    assert response["code"] == 2
+    assert "No such schedule: Nope" in response["stderr"]
+
+    response = forward(["schedule", "create"], path=daemon.path)
+    assert response["code"] == 2
+
+
+def test_no_daemon(tmp_path):
+    assert forward(["schedule", "list"], path=tmp_path / "d.sock") is None
+
+
+def test_different_env(monkeypatch, app, daemon):
+    monkeypatch.setenv("PATCHDAY_READ_ONLY", "1")
+    assert forward(["schedule", "refill", "Patches", "4"], path=daemon.path) is None
+    assert app.inventory.get("Patches") is None
+
+    # The socket is not part of it.
+    monkeypatch.delenv("PATCHDAY_READ_ONLY")
+    monkeypatch.setenv("PATCHDAY_SOCKET", f"{daemon.path}")
+    assert forward(["undo"], path=daemon.path) is not None
+
+
+@pytest.mark.parametrize("answer", (False, True))
+def test_broken_daemon(monkeypatch, tmp_path, answer):
+    monkeypatch.setattr(daemon_module, "CLIENT_TIMEOUT", 0.1)
+    path = tmp_path / "d.sock"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(str(path))
+        server.listen()
+        if answer:
+            # Accepts, then closes without a reply.
+            thread = threading.Thread(target=lambda: server.accept()[0].close())
+            thread.start()
+            assert forward(["undo"], path=path) is None
+            thread.join(timeout=5)
+        else:
+            # Never answers.
+            assert forward(["undo"], path=path) is None
+
+
+def test_stale_socket(app, tmp_path):
+    path = tmp_path / "d.sock"
+    first = Daemon(path)
+    first.start()
+    # Stopped without removing the socket file.
+    first._server.server_close()
+    assert forward(["undo"], path=path) is None
+
+    second = Daemon(path)
+    second.start()
+    second._server.server_close()
+
+
+def test_already_running(daemon):
+    with pytest.raises(RuntimeError, match="already listening"):
+        Daemon(daemon.path).start()
+
+
+def test_main(mocker, capsys, daemon):
+    mocker.patch("patchday.daemon.get_socket_path", return_value=daemon.path)
+    mocker.patch("sys.argv", ["pday", "schedule", "list"])
+    cli = mocker.patch("patchday.cli.app")
+    with pytest.raises(SystemExit) as err:
+        status.main()
+
+    assert err.value.code == 0
+    assert capsys.readouterr().out == "PATCH - not taken yet\n"
+    assert not cli.called
+
+
+def test_client_skips_heavy_imports():
+    from tests.test_cli import HEAVY_MODULES, get_import_times
+
+    times = get_import_times("import patchday.daemon")
+    assert not [m for m in HEAVY_MODULES if m in times]
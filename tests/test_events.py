@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from patchday.events import EventBus, EventType, ExpirationWatcher, format_sse
+from patchday.models import Hormone
+
+
+@pytest.fixture
+def bus():
+    return EventBus(queue_size=3)
+
+
+class TestEventBus:
+    def test_publish(self, bus):
+        with bus.subscribe() as subscription:
+            bus.publish(EventType.SCHEDULE_CREATED, "My Schedule")
+            event = subscription.get(timeout=0)
+
+        assert event.event_type is EventType.SCHEDULE_CREATED
+        assert event.schedule_id == "My Schedule"
+        assert event.sequence == 1
+
+    def test_unsubscribe_on_close(self, bus):
+        subscription = bus.subscribe()
+        assert len(bus) == 1
+        subscription.close()
+        assert len(bus) == 0
+
+    def test_bounded_queue_drops_oldest(self, bus):
+        with bus.subscribe() as subscription:
+            for idx in range(5):
+                bus.publish(EventType.HORMONE_TAKEN, "My Schedule", hormone_id=idx)
+
+            assert len(subscription) == 3
+            assert subscription.dropped == 2
+            assert subscription.get(timeout=0).hormone_id == 2
+
+    def test_get_timeout(self, bus):
+        with bus.subscribe() as subscription:
+            assert subscription.get(timeout=0) is None
+
+    def test_aget(self, bus):
+        async def run():
+            with bus.subscribe() as subscription:
+                loop = asyncio.get_running_loop()
+                loop.call_later(
+                    0.01, bus.publish, EventType.SCHEDULE_REMOVED, "My Schedule"
+                )
+                return await subscription.aget(timeout=1)
+
+        event = asyncio.run(run())
+        assert event.event_type is EventType.SCHEDULE_REMOVED
+
+    def test_format_sse(self, bus):
+        event = bus.publish(EventType.SCHEDULE_CREATED, "My Schedule")
+        actual = format_sse(event)
+        assert actual.startswith("id: 1\nevent: SCHEDULE_CREATED\ndata: {")
+        assert actual.endswith("\n\n")
+
+
+class TestExpirationWatcher:
+    @pytest.fixture
+    def schedule(self, mocker):
+        schedule = mocker.MagicMock()
+        schedule.schedule_id = "My Schedule"
+        schedule.hormones = [
+            Hormone(expiration_duration="1h", hormone_id=0),
+            Hormone(expiration_duration="1h", hormone_id=1),
+        ]
+        return schedule
+
+    def test_check(self, bus, schedule):
+        now = datetime.now()
+        schedule.hormones[0].date_applied = now - timedelta(minutes=30)
+        watcher = ExpirationWatcher([schedule], bus)  # type: ignore
+        watcher.last_checked = now
+        assert watcher.next_expiration() == now + timedelta(minutes=30)
+
+        with bus.subscribe() as subscription:
+            assert watcher.check(now=now + timedelta(minutes=10)) == []
+            events = watcher.check(now=now + timedelta(hours=1))
+            assert len(events) == 1
+            assert subscription.get(timeout=0).event_type is EventType.HORMONE_EXPIRED
+
+        # Does not fire twice.
+        assert watcher.check(now=now + timedelta(hours=2)) == []
+        assert watcher.next_expiration() is None
@@ -0,0 +1,127 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from click.testing import CliRunner
+
+from patchday.exceptions import ReadOnlyStorageError
+from patchday.history import LOCK_FILE, History
+from patchday.main import PatchDay
+from patchday.models import HormoneApplication
+from patchday.storage import PatchData, file_lock
+
+NOW = datetime(2024, 6, 14, 12)
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = History(PatchData(path=tmp_path))
+    for days in range(0, 120, 10):
+        for schedule_id in ("A", "B"):
+            history.append(
+                HormoneApplication(
+                    hormone_id=0,
+                    schedule_id=schedule_id,
+                    date=NOW - timedelta(days=days),
+                )
+            )
+
+    return history
+
+
+def test_take_records_application(app):
+    app.schedules["My Schedule"].take_next_hormone()
+
+    (application,) = app.history.query()
+    assert application.schedule_id == "My Schedule"
+    assert application.hormone_id == 0
+    assert application.date == app.schedules["My Schedule"].hormones[0].date_applied
+
+
+def test_undo_take(app):
+    app.schedules["My Schedule"].take_next_hormone()
+    (application,) = app.history.query()
+    app.schedules.take_expired()
+    assert len(app.history.query()) == 2
+
+    app.journal.undo()
+    assert app.history.query() == [application]
+    app.journal.undo()
+    assert app.history.query() == []
+
+    app.journal.redo()
+    assert app.history.query() == [application]
+
+
+def test_compact(history):
+    before = history.query()
+    assert len(before) == 24
+
+    moved = history.compact(now=NOW)
+    assert moved == 16
+    assert history.query() == before
+    assert [s["name"] for s in history.segments] == [
+        "2024-02.0.jsonl.xz",
+        "2024-03.0.jsonl.xz",
+        "2024-04.0.jsonl.xz",
+        "2024-05.0.jsonl.xz",
+    ]
+    assert len(list(history.root.glob("hot.*"))) == 1
+
+    # Nothing more to move; existing segments are never rewritten.
+    assert history.compact(now=NOW) == 0
+    history.append(
+        HormoneApplication(hormone_id=1, schedule_id="A", date=NOW - timedelta(60))
+    )
+    history.compact(now=NOW)
+    assert history.segments[-2]["name"] == "2024-04.1.jsonl.xz"
+
+
+def test_query_skips_segments(mocker, history):
+    history.compact(now=NOW)
+    read = mocker.spy(history, "_read_segment")
+
+    start = NOW - timedelta(days=45)
+    result = history.query(start=start, end=NOW, schedule_id="A")
+    assert [(NOW - a.date).days for a in result] == [40, 30, 20, 10]
+    assert read.call_count == 1
+
+    history.query(start=NOW - timedelta(days=200), end=NOW - timedelta(days=150))
+    assert read.call_count == 1
+
+
+def test_zlib_codec(history):
+    history.codec = "zlib"
+    history.compact(now=NOW)
+    assert history.segments[0]["name"].endswith(".zz")
+    assert len(history.query()) == 24
+
+
+def test_read_only(history):
+    history.patchdata.read_only = True
+    with pytest.raises(ReadOnlyStorageError):
+        history.compact(now=NOW)
+
+    assert len(history.query()) == 24
+
+
+def test_cli(mocker, tmp_path):
+    from patchday.cli import app as cli
+
+    mocker.patch("patchday.main.patchday", PatchDay(storage_path=tmp_path))
+    result = CliRunner().invoke(cli, ["maintenance", "compact"])
+    assert result.exit_code == 0, result.output
+    assert "Compacted 0 application(s)." in result.output
+
+
+def test_writes_wait_for_lock(history):
+    application = HormoneApplication(hormone_id=1, schedule_id="A", date=NOW)
+    # Another process compacting.
+    with file_lock(history.root / LOCK_FILE):
+        thread = threading.Thread(target=history.append, args=(application,))
+        thread.start()
+        thread.join(timeout=0.2)
+        assert thread.is_alive()
+
+    thread.join()
+    assert application in history.query(start=NOW)
@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from patchday.clock import ManualClock, use_clock
+from patchday.events import EventType
+from patchday.inventory import Supply, forecast_run_out
+from patchday.recurrence import parse_recurrence
+
+NOW = datetime(2024, 6, 10, 9)
+INTERVAL = timedelta(days=3, hours=12)
+
+
+@pytest.fixture(autouse=True)
+def clock():
+    clock = ManualClock(NOW)
+    with use_clock(clock):
+        yield clock
+
+
+@pytest.fixture
+def schedule_id():
+    return "Patches"
+
+
+@pytest.mark.parametrize(
+    "stock,expected",
+    [
+        (0, NOW),
+        (1, NOW + timedelta(days=1)),
+        (2, NOW + INTERVAL),
+        (5, NOW + timedelta(days=1) + 2 * INTERVAL),
+    ],
+)
+def test_forecast_run_out(stock, expected):
+    expirations = [NOW + timedelta(days=1), NOW]
+    assert forecast_run_out(expirations, stock, INTERVAL, now=NOW) == expected
+
+
+def test_forecast_run_out_not_taken():
+    assert forecast_run_out([None, None], 3, INTERVAL, now=NOW) == NOW + INTERVAL
+    assert forecast_run_out([], 3, INTERVAL, now=NOW) is None
+
+
+def test_forecast_run_out_recurrence():
+    # Monday 9am; due again Thursday, then Monday.
+    rule = parse_recurrence("mon/thu 9am")
+    actual = forecast_run_out([NOW], 3, INTERVAL, recurrence=rule, now=NOW)
+    assert actual == NOW + timedelta(days=7 + 3)
+
+
+def test_refill_and_take(app, clock):
+    schedule = app.schedules["Patches"]
+    supply = app.inventory.refill(schedule, 8)
+    assert supply.stock == 8
+    # Two patches due now, then two every 3.5 days.
+    assert supply.runs_out_date == NOW + 4 * INTERVAL
+
+    schedule.take_next_hormone()
+    schedule.take_next_hormone()
+    supply = app.inventory.get("Patches")
+    assert supply.stock == 6
+    assert supply.runs_out_date == NOW + 4 * INTERVAL
+
+    supply = app.inventory.refill(schedule, 3, replace=True)
+    assert supply.stock == 3
+    assert supply.runs_out_date == NOW + 2 * INTERVAL
+
+
+def test_untracked(app):
+    app.schedules["Patches"].take_next_hormone()
+    assert app.inventory.load() == []
+
+
+def test_undo(app):
+    schedule = app.schedules["Patches"]
+    app.inventory.refill(schedule, 4)
+    schedule.take_next_hormone()
+    assert app.inventory.get("Patches").stock == 3
+
+    entry = app.journal.undo()
+    assert app.inventory.get("Patches").stock == 4
+    # Hormones sync, so undoing stamps them again; supplies do not.
+    versioned = {c["key"]: c["versioned"] for c in entry["changes"] if "id" in c}
+    assert versioned == {schedule.db.key: True, app.inventory.db.key: False}
+    assert all("hlc" not in r for r in app.inventory.db.load_raw_list())
+
+    app.journal.undo()
+    assert app.inventory.get("Patches") is None
+
+
+def test_low_stock(app, clock):
+    schedule = app.schedules["Patches"]
+    subscription = app.event_bus.subscribe(maxsize=100)
+    app.inventory.refill(schedule, 5, alert_days=4)
+    assert app.inventory.low_stock() == []
+
+    schedule.take_next_hormone()
+    schedule.take_next_hormone()
+    assert EventType.LOW_STOCK not in _drain(subscription)
+
+    # Two left, which run out when they expire 3.5 days from now.
+    clock.advance(INTERVAL)
+    schedule.take_next_hormone()
+    assert EventType.LOW_STOCK in _drain(subscription)
+    assert app.inventory.low_stock() == [app.inventory.get("Patches")]
+
+    # Refilling stops the alerts.
+    app.inventory.refill(schedule, 10)
+    schedule.take_next_hormone()
+    assert EventType.LOW_STOCK not in _drain(subscription)
+
+
+def _drain(subscription) -> list[EventType]:
+    events = []
+    while len(subscription):
+        events.append(subscription.get(timeout=0).event_type)
+
+    return events
+
+
+def test_remove_schedule(app):
+    app.inventory.refill(app.schedules["Patches"], 4)
+    app.schedules.remove_schedule("Patches")
+    assert app.inventory.load() == []
+
+
+def test_list_schedules(mocker, app):
+    from click.testing import CliRunner
+
+    from patchday.cli import app as cli
+
+    mocker.patch("patchday.main.patchday", app)
+    mocker.patch("sys.argv", ["pday", "schedule", "refill", "Patches", "3"])
+    result = CliRunner().invoke(cli, ["schedule", "refill", "Patches", "3"])
+    assert result.exit_code == 0, result.output
+    assert "'Patches' has 3 left" in result.output
+
+    mocker.patch("sys.argv", ["pday", "schedule", "list"])
+    result = CliRunner().invoke(cli, ["schedule", "list"])
+    assert result.exit_code == 0, result.output
+    assert "3 left, runs out" in result.output
+    assert "(low)" in result.output
+
+
+def test_supply_is_low():
+    supply = Supply(
+        "A", 1, alert_days=2, runs_out=(NOW + timedelta(days=3)).timestamp()
+    )
+    assert not supply.is_low(NOW)
+    assert supply.is_low(NOW + timedelta(days=1))
+    assert not Supply("A", 1).is_low(NOW)
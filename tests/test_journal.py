@@ -0,0 +1,86 @@
+from click.testing import CliRunner
+
+from patchday.types import DeliveryMethod
+
+
+def test_undo_take(app):
+    schedule = app.schedules["My Schedule"]
+    schedule.take_next_hormone()
+    schedule.take_next_hormone()
+    assert len(schedule.active_hormones) == 2
+
+    entry = app.journal.undo()
+    assert entry["operation"] == "take"
+    # The one hormone and its application history.
+    assert [c["key"] for c in entry["changes"]] == [schedule.db.key, "history"]
+    assert len(schedule.active_hormones) == 1
+
+    app.journal.undo()
+    assert not schedule.active_hormones
+    assert app.summary.load()[0].next_expiration is None
+
+    app.journal.redo()
+    assert len(schedule.active_hormones) == 1
+    assert [h.hormone_id for h in schedule.hormones] == [0, 1]
+
+
+def test_undo_create_and_remove(app):
+    schedule = app.schedules["My Schedule"]
+    schedule.take_next_hormone()
+    app.schedules.remove_schedule("My Schedule")
+    assert "My Schedule" not in app.schedules
+
+    assert app.journal.undo()["operation"] == "remove"
+    restored = app.schedules["My Schedule"]
+    assert len(restored.active_hormones) == 1
+
+    app.journal.undo()
+    app.journal.undo()
+    assert "My Schedule" not in app.schedules
+    assert app.journal.undo() is None
+
+    app.journal.redo()
+    assert "My Schedule" in app.schedules
+
+
+def test_new_operation_clears_redo(app):
+    app.journal.undo()
+    assert app.journal.redo_entries
+    app.schedules.create_schedule(DeliveryMethod.PILL, "1d")
+    assert not app.journal.redo_entries
+
+
+def test_bounded(app):
+    app.journal.size = 3
+    schedule = app.schedules["My Schedule"]
+    for _ in range(5):
+        schedule.take_next_hormone()
+
+    assert len(app.journal.undo_entries) == 3
+
+
+def test_cli(mocker, app):
+    from patchday.cli import app as cli
+
+    app.schedules["My Schedule"].take_next_hormone()
+    mocker.patch("patchday.main.patchday", app)
+    mocker.patch("sys.argv", ["pday", "undo"])
+
+    result = CliRunner().invoke(cli, ["undo"])
+    assert result.exit_code == 0, result.output
+    assert "Undo: take 'My Schedule'" in result.output
+
+    result = CliRunner().invoke(cli, ["redo"])
+    assert "Redo: take 'My Schedule'" in result.output
+
+
+def test_service(mocker, app):
+    from fastapi.testclient import TestClient
+
+    from patchday import service
+
+    mocker.patch.object(service, "patchday", app)
+    client = TestClient(service.app)
+    assert client.post("/undo").json()["operation"] == "create"
+    assert client.post("/undo").status_code == 409
+    assert client.post("/redo").status_code == 200
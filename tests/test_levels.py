@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from patchday import levels
+from patchday.levels import Levels
+from patchday.simulation import Simulation
+from patchday.types import DeliveryMethod
+
+START = datetime(2024, 1, 1, 8)
+STEP = timedelta(minutes=10)
+
+
+@pytest.fixture
+def sim():
+    sim = Simulation(start=START)
+    sim.add_schedule(DeliveryMethod.PATCH, "3d12h", quantity=2, schedule_id="Patches")
+    sim.add_schedule(DeliveryMethod.PILL, "1d", schedule_id="Pills")
+    sim.run(timedelta(weeks=8))
+    return sim
+
+
+def test_patch_steady_state(sim):
+    week = START + timedelta(weeks=7)
+    curve = sim.app.levels.estimate("Patches", week, week + timedelta(weeks=1), STEP)
+    assert len(curve) == 7 * 24 * 6
+    assert curve.end == week + timedelta(weeks=1)
+    # Two patches, each 1.0 once absorbed; swaps happen instantly.
+    assert curve.values.min() == pytest.approx(2, abs=0.01)
+    assert curve.at(week + timedelta(hours=5)) == pytest.approx(2, abs=0.01)
+
+
+def test_pill_average(sim):
+    week = START + timedelta(weeks=7)
+    curve = sim.app.levels.estimate("Pills", week, week + timedelta(weeks=1), STEP)
+    assert curve.values.mean() == pytest.approx(1, abs=0.02)
+    assert curve.values.max() > 1.2
+    assert curve.values.min() < 0.8
+
+
+def test_before_first_application(sim):
+    before = START - timedelta(days=2)
+    curve = sim.app.levels.estimate("Patches", before, START, STEP)
+    assert not curve.values.any()
+
+
+def test_incremental(mocker, sim):
+    app = sim.app
+    end = START + timedelta(weeks=8)
+    first = app.levels.estimate("Patches", START, end, STEP)
+    first_values = first.values.copy()
+
+    sim.run(timedelta(weeks=1))
+    add = mocker.spy(app.levels, "_add")
+    later = app.levels.estimate("Patches", START, end + timedelta(weeks=1), STEP)
+    fresh = Levels(app.schedules, app.history).estimate(
+        "Patches", START, end + timedelta(weeks=1), STEP
+    )
+    np.testing.assert_allclose(later.values, fresh.values, atol=1e-9)
+    # The cached weeks only get the changes: the two patches that were still
+    # on are replaced by removed ones, and four new ones are added. Every
+    # dose is checked against the new week.
+    doses = len(app.history.query(schedule_id="Patches"))
+    assert add.call_count == 2 + 2 + 4 + doses
+    # Curves already returned are not changed.
+    np.testing.assert_array_equal(first.values, first_values)
+
+
+def test_pure_python(monkeypatch, sim):
+    start = START + timedelta(weeks=6)
+    end = start + timedelta(days=3)
+    expected = sim.app.levels.estimate_all(start, end, timedelta(hours=1))
+
+    monkeypatch.setattr(levels, "np", None)
+    actual = Levels(sim.app.schedules, sim.app.history).estimate_all(
+        start, end, timedelta(hours=1)
+    )
+    for schedule_id, curve in expected.items():
+        assert isinstance(actual[schedule_id].values, list)
+        np.testing.assert_allclose(actual[schedule_id].values, curve.values)
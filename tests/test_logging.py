@@ -0,0 +1,114 @@
+import io
+import json
+import logging
+
+import pytest
+
+from patchday.logging import (
+    LOG_ASYNC_ENV,
+    LOG_FORMAT_ENV,
+    LOG_LEVEL_ENV,
+    PDLogger,
+    correlation_id,
+)
+
+
+@pytest.fixture
+def make_logger(monkeypatch, request):
+    created = []
+
+    def make(level="DEBUG", fmt="json", use_queue=True) -> tuple[PDLogger, io.StringIO]:
+        monkeypatch.setenv(LOG_LEVEL_ENV, level)
+        monkeypatch.setenv(LOG_FORMAT_ENV, fmt)
+        monkeypatch.setenv(LOG_ASYNC_ENV, "1" if use_queue else "0")
+        stream = io.StringIO()
+        monkeypatch.setattr("sys.stderr", stream)
+        logger = PDLogger(f"test_logging.{request.node.name}.{len(created)}")
+        created.append(logger)
+        return logger, stream
+
+    yield make
+
+    for logger in created:
+        logger.close()
+        logging.getLogger(logger.name).handlers.clear()
+
+
+def _records(logger: PDLogger, stream: io.StringIO) -> list[dict]:
+    logger.flush()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json(make_logger):
+    logger, stream = make_logger()
+    logger.info("took %s of %d", "patch", 2, context={"schedule_id": "My Schedule"})
+    (record,) = _records(logger, stream)
+    assert record["level"] == "INFO"
+    assert record["message"] == "took patch of 2"
+    assert record["schedule_id"] == "My Schedule"
+    assert "correlation_id" not in record
+
+
+def test_text(make_logger):
+    logger, stream = make_logger(fmt="text", use_queue=False)
+    logger.warning("careful")
+    assert stream.getvalue().rstrip().endswith("WARNING - careful")
+
+
+def test_formats_off_calling_thread(make_logger):
+    logger, _ = make_logger()
+    (handler,) = logger.logger.handlers
+    record = logging.LogRecord("x", logging.INFO, "", 0, "%s", ("a",), None)
+    prepared = handler.prepare(record)
+    assert prepared.msg == "%s"
+    assert prepared.args == ("a",)
+
+
+def test_lazy(make_logger):
+    logger, stream = make_logger(level="INFO")
+
+    def expensive():
+        raise AssertionError("Should not be called.")
+
+    logger.debug(expensive, context=expensive)
+    logger.info(lambda: "built", context=lambda: {"size": 3})
+    (record,) = _records(logger, stream)
+    assert record["message"] == "built"
+    assert record["size"] == 3
+
+
+def test_correlate(make_logger):
+    logger, stream = make_logger()
+    with logger.correlate("abc") as cid:
+        assert cid == "abc"
+        logger.info("inside")
+
+    with logger.correlate() as cid:
+        generated = cid
+
+    logger.info("outside")
+    assert correlation_id.get() is None
+    inside, outside = _records(logger, stream)
+    assert inside["correlation_id"] == "abc"
+    assert "correlation_id" not in outside
+    assert len(generated) == 32
+
+
+def test_service_request_id(mocker, tmp_path):
+    from fastapi.testclient import TestClient
+
+    from patchday import service
+    from patchday.main import PatchDay
+
+    mocker.patch.object(service, "patchday", PatchDay(storage_path=tmp_path))
+    log = mocker.patch.object(service.logger, "debug")
+    client = TestClient(service.app)
+
+    response = client.get("/schedules", headers={"X-Request-ID": "req-1"})
+    assert response.headers["X-Request-ID"] == "req-1"
+    context = log.call_args.kwargs["context"]()
+    assert context["path"] == "/schedules"
+    assert context["status"] == 200
+
+    response = client.get("/schedules")
+    assert response.headers["X-Request-ID"]
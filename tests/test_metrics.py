@@ -0,0 +1,133 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from click.testing import CliRunner
+
+from patchday.exceptions import StorageCorruption
+from patchday.main import PatchDay
+from patchday.metrics import StorageMetrics, record_read
+
+
+@pytest.fixture
+def app(app, tmp_path):
+    # Another process, so nothing is read yet.
+    return PatchDay(storage_path=tmp_path)
+
+
+class TestStorageMetrics:
+    def test_measure(self):
+        metrics = StorageMetrics()
+        with metrics.measure("schedules", "load_list"):
+            record_read(10)
+
+            # Nested operations on the same key count once.
+            with metrics.measure("schedules", "load_raw_list"):
+                record_read(5)
+
+        stats = metrics["schedules", "load_list"]
+        assert stats.calls == 1
+        assert stats.bytes_read == 15
+        assert stats.seconds > 0
+        assert metrics["schedules", "load_raw_list"].calls == 0
+
+    def test_storage_operations(self, app):
+        list(app.schedules)
+        app.schedules["My Schedule"].take_next_hormone()
+
+        # The second read is served from the schedule index.
+        load = app.metrics["schedules", "load_list"]
+        assert load.calls == 1
+        assert load.bytes_read > 0
+        assert load.validation_seconds > 0
+        write = app.metrics["hormones/My%20Schedule", "persist_list"]
+        assert write.calls == 1
+        assert write.bytes_written > 0
+
+    def test_format_prometheus(self, app):
+        list(app.schedules)
+        actual = app.metrics.format_prometheus()
+        assert "# TYPE patchday_storage_calls_total counter" in actual
+        expected = (
+            'patchday_storage_calls_total{key="schedules",operation="load_list"} 1'
+        )
+        assert expected in actual
+
+    def test_collapsed_loads(self, mocker, app):
+        from patchday import storage
+
+        threads = 8
+        started = threading.Barrier(threads)
+        load_file = storage._load_file
+
+        def slow_load(*args):
+            # Every thread asks before the first read finishes.
+            time.sleep(0.2)
+            return load_file(*args)
+
+        read = mocker.patch.object(storage, "_load_file", side_effect=slow_load)
+        db = app.schedules.db
+
+        def load():
+            started.wait()
+            return db.load_raw_list()
+
+        with ThreadPoolExecutor(threads) as pool:
+            results = list(pool.map(lambda _: load(), range(threads)))
+
+        assert read.call_count == 1
+        assert app.metrics["schedules", "load_raw_list"].collapsed_loads == threads - 1
+        assert all(r == results[0] for r in results)
+        # Each caller gets its own copy.
+        results[0][0]["schedule_id"] = "Changed"
+        assert results[1][0]["schedule_id"] == "My Schedule"
+
+        # Once done, the next load reads again.
+        db.load_raw_list()
+        assert read.call_count == 2
+
+    def test_collapsed_load_error(self, app):
+        started = threading.Event()
+        release = threading.Event()
+
+        def failing_load():
+            started.set()
+            release.wait()
+            raise StorageCorruption("schedules", "Unexpected type")
+
+        with ThreadPoolExecutor(2) as pool:
+            leader = pool.submit(app._db.load_shared, "schedules", (), failing_load)
+            started.wait()
+            follower = pool.submit(app._db.load_shared, "schedules", (), list)
+            while not app._db._flights[("schedules", ())].waiters:
+                time.sleep(0.001)
+
+            release.set()
+            for future in (leader, follower):
+                with pytest.raises(StorageCorruption):
+                    future.result()
+
+
+def test_metrics_endpoint(mocker, app):
+    from fastapi.testclient import TestClient
+
+    from patchday import service
+
+    mocker.patch.object(service, "patchday", app)
+    client = TestClient(service.app)
+    client.get("/schedules")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert 'key="schedules",operation="load_list"' in response.text
+
+
+def test_cli_profile(mocker, app):
+    from patchday.cli import app as cli
+
+    mocker.patch("patchday.main.patchday", app)
+    mocker.patch("sys.argv", ["pday", "--profile", "schedule", "list"])
+    result = CliRunner().invoke(cli, ["--profile", "schedule", "list"])
+    assert result.exit_code == 0, result.output
+    assert "PATCH - not taken yet" in result.output
+    assert "load_raw_list" in result.output
@@ -0,0 +1,114 @@
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from patchday.clock import ManualClock, use_clock
+from patchday.main import PatchDay
+from patchday.recurrence import UTC, RecurrenceRule, parse_recurrence
+from patchday.types import DeliveryMethod
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("mon/thu 9am", RecurrenceRule(at=time(9), weekdays=(0, 3))),
+        ("Mon,Thu at 21:30", RecurrenceRule(at=time(21, 30), weekdays=(0, 3))),
+        ("sat-mon 12pm UTC", RecurrenceRule(time(12), (0, 5, 6), timezone="UTC")),
+        ("daily 12am", RecurrenceRule(at=time(0), interval_days=1)),
+        (
+            "every 2w 8am from 2024-01-01 Europe/Berlin",
+            RecurrenceRule(
+                at=time(8),
+                interval_days=14,
+                anchor=date(2024, 1, 1),
+                timezone="Europe/Berlin",
+            ),
+        ),
+    ],
+)
+def test_parse(value, expected):
+    rule = parse_recurrence(value)
+    assert rule == expected
+    assert parse_recurrence(str(rule)) == rule
+
+
+@pytest.mark.parametrize(
+    "value", ["mon/thu", "9am", "mon every 2d 9am", "funday 9am", "mon 9am Mars/Base"]
+)
+def test_parse_invalid(value):
+    with pytest.raises(ValueError):
+        parse_recurrence(value)
+
+
+def test_weekly():
+    rule = parse_recurrence("mon/thu 9am UTC")
+    # Monday 2024-06-10.
+    monday = datetime(2024, 6, 10, 9, tzinfo=UTC)
+    assert rule.next_after(monday - timedelta(seconds=1)) == monday
+    assert rule.next_after(monday) == monday + timedelta(days=3)
+    assert rule.next_after(monday + timedelta(days=3)) == monday + timedelta(days=7)
+    assert rule.between(monday, monday + timedelta(weeks=2)) == [
+        monday + timedelta(days=d) for d in (3, 7, 10, 14)
+    ]
+
+
+def test_interval():
+    rule = parse_recurrence("every 14d 8am from 2024-01-01 UTC")
+    start = datetime(2024, 1, 1, 8, tzinfo=UTC)
+    assert rule.next_after(start) == start + timedelta(days=14)
+    # Far from the anchor costs the same.
+    later = start + timedelta(days=14 * 1000 + 3)
+    assert rule.next_after(later) == start + timedelta(days=14 * 1001)
+    # Before the anchor too.
+    assert rule.next_after(start - timedelta(days=1)) == start
+
+    # Without an anchor, counted from the day asked about.
+    relative = parse_recurrence("every 3d 8am UTC")
+    applied = datetime(2024, 1, 1, 22, tzinfo=UTC)
+    assert relative.next_after(applied) == datetime(2024, 1, 4, 8, tzinfo=UTC)
+
+
+def test_dst():
+    rule = parse_recurrence("daily 9am America/New_York")
+    # DST started on 2024-03-10; 9am moves from 14:00 to 13:00 UTC.
+    before = datetime(2024, 3, 9, 14, tzinfo=UTC)
+    after = rule.next_after(before)
+    assert after == datetime(2024, 3, 10, 13, tzinfo=UTC)
+    assert after.astimezone(NEW_YORK).hour == 9
+
+    # 2:30am did not exist that day; it happens at 3:30 instead.
+    skipped = parse_recurrence("sun 2:30am America/New_York")
+    occurrence = skipped.next_after(before).astimezone(NEW_YORK)
+    assert (occurrence.date(), occurrence.hour, occurrence.minute) == (
+        date(2024, 3, 10),
+        3,
+        30,
+    )
+
+
+def test_naive_is_local():
+    rule = parse_recurrence("mon/thu 9am")
+    assert rule.next_after(datetime(2024, 6, 10, 8)) == datetime(2024, 6, 10, 9)
+
+
+def test_schedule(tmp_path):
+    app = PatchDay(storage_path=tmp_path)
+    app.schedules.create_schedule(
+        DeliveryMethod.INJECTION, "3d12h", schedule_id="Shots", recurrence="mon/thu 9am"
+    )
+    schedule = app.schedules["Shots"]
+    assert str(schedule.recurrence) == "mon/thu 09:00"
+
+    # Taken late on Monday evening; due again Thursday morning.
+    with use_clock(ManualClock(datetime(2024, 6, 10, 20))):
+        schedule.take_next_hormone()
+
+    hormone = schedule.hormones[0]
+    assert hormone.expiration_date == datetime(2024, 6, 13, 9)
+    assert "recurrence" not in schedule.db.load_raw_list()[0]
+
+    (summary,) = app.summary.load()
+    assert summary.next_expiration_date == datetime(2024, 6, 13, 9)
@@ -1,7 +1,9 @@
 from datetime import datetime, timedelta
 
+from patchday.events import EventType
 from patchday.models import Hormone
 from patchday.schedule import HormoneSchedule
+from patchday.storage import get_hormones_key
 import pytest
 
 from patchday.types import DeliveryMethod
@@ -31,7 +33,7 @@ def create_patch(idx) -> Hormone:
 @pytest.fixture(autouse=True)
 def patch_data(mocker, mock_data, patches_db):
     def open_fn(key):
-        if key == "patch":
+        if key == get_hormones_key("My Schedule"):
             return patches_db
 
         return mocker.MagicMock()
@@ -105,3 +107,330 @@ class TestHormoneSchedule:
         latest_hormone = schedule.last_taken_hormone
         schedule.take_next_hormone()
         assert schedule.last_taken_hormone != latest_hormone
+
+    def test_take_next_hormone_publishes_event(self, schedule, mock_data):
+        schedule.take_next_hormone()
+        mock_data.event_bus.publish.assert_called_once()
+        assert mock_data.event_bus.publish.call_args[0] == (
+            EventType.HORMONE_TAKEN,
+            "My Schedule",
+        )
+
+    def test_get_hormone(self, schedule):
+        assert schedule.get_hormone(1).hormone_id == 1
+        assert schedule.get_hormone(99) is None
+
+
+class TestScheduleManager:
+    @pytest.fixture
+    def app(self, tmp_path):
+        from patchday.main import PatchDay
+
+        return PatchDay(storage_path=tmp_path, max_schedules=3, max_quantity=20)
+
+    def test_max_schedules(self, app):
+        for _ in range(3):
+            app.schedules.create_schedule(DeliveryMethod.PILL, "1d")
+
+        with pytest.raises(ValueError, match="Maximum schedules reached"):
+            app.schedules.create_schedule(DeliveryMethod.PILL, "1d")
+
+    def test_max_quantity(self, app):
+        app.schedules.create_schedule(DeliveryMethod.PATCH, "1d", quantity=20)
+        with pytest.raises(ValueError, match="out of bounds"):
+            app.schedules.create_schedule(DeliveryMethod.PATCH, "1d", quantity=21)
+
+    def test_unlimited(self, tmp_path):
+        from patchday.main import PatchDay
+
+        app = PatchDay(storage_path=tmp_path, max_schedules=None, max_quantity=None)
+        app.schedules.create_schedules(
+            [{"delivery_method": DeliveryMethod.PILL, "expiration": "1d"}] * 25
+        )
+        assert len(app.schedules) == 25
+        assert "Pill Schedule 24" in app.schedules
+
+    def test_create_schedules(self, app):
+        app.schedules.create_schedules(
+            [
+                {"delivery_method": DeliveryMethod.PILL, "expiration": "1d"},
+                {"delivery_method": DeliveryMethod.PILL, "expiration": "2d"},
+            ]
+        )
+        assert app.metrics["schedules", "append_list_objects"].calls == 1
+        assert app.metrics["schedules", "persist_list_object"].calls == 0
+        assert [s.schedule_id for s in app.schedules] == [
+            "Pill Schedule 0",
+            "Pill Schedule 1",
+        ]
+
+        with pytest.raises(ValueError, match="already exists"):
+            app.schedules.create_schedules(
+                [
+                    {
+                        "delivery_method": DeliveryMethod.PILL,
+                        "expiration": "1d",
+                        "schedule_id": "Pill Schedule 0",
+                    }
+                ]
+            )
+
+    def test_index_sees_other_writers(self, app, tmp_path):
+        from patchday.main import PatchDay
+
+        app.schedules.create_schedule(DeliveryMethod.PILL, "1d", schedule_id="A")
+        assert app.schedules.get("B") is None
+
+        other = PatchDay(storage_path=tmp_path)
+        other.schedules.create_schedule(DeliveryMethod.PILL, "1d", schedule_id="B")
+        assert app.schedules["B"].schedule_id == "B"
+
+    def test_index_updated_in_place(self, app, tmp_path):
+        from patchday.main import PatchDay
+
+        app.schedules.create_schedule(DeliveryMethod.PILL, "1d", schedule_id="A")
+        app.schedules.create_schedule(DeliveryMethod.PILL, "1d", schedule_id="B")
+        app.schedules.remove_schedule("A")
+
+        # Its own writes never load the schedules again.
+        assert app.metrics["schedules", "load_list"].calls == 1
+        assert [s.schedule_id for s in app.schedules] == ["B"]
+        stored = PatchDay(storage_path=tmp_path).schedules["B"]
+        assert app.schedules["B"] == stored
+        assert stored.hlc is not None
+
+    def test_index_sees_writes_right_after_its_own(self, mocker, app, tmp_path):
+        from patchday.main import PatchDay
+
+        app.schedules.create_schedule(DeliveryMethod.PILL, "1d", schedule_id="A")
+        other = PatchDay(storage_path=tmp_path)
+        advance_index = app.schedules._advance_index
+
+        def other_then_advance(*args, **kwargs):
+            # Writes after ours, before the index takes in our write.
+            other.schedules.create_schedule(DeliveryMethod.PILL, "1d", "B")
+            advance_index(*args, **kwargs)
+
+        mocker.patch.object(
+            app.schedules, "_advance_index", side_effect=other_then_advance
+        )
+        app.schedules.remove_schedule("A")
+        assert [s.schedule_id for s in app.schedules] == ["B"]
+
+    def test_create_appends(self, tmp_path):
+        from patchday.main import PatchDay
+
+        app = PatchDay(storage_path=tmp_path, max_schedules=None)
+        app.schedules.create_schedules(
+            [{"delivery_method": DeliveryMethod.PILL, "expiration": "1d"}] * 3
+        )
+        db = app.schedules.db
+        content = db.path.read_bytes()
+        app.schedules.create_schedule(DeliveryMethod.PILL, "1d", "A")
+        assert db.path.read_bytes() == content
+        assert db.log_path.is_file()
+        other = PatchDay(storage_path=tmp_path)
+        assert other.schedules["A"].schedule_id == "A"
+        assert [r.schedule_id for r in other.summary.load()][-1] == "A"
+
+        # Folded in once the appended records are as big as the file.
+        for idx in range(3):
+            app.schedules.create_schedule(DeliveryMethod.PILL, "1d", f"B{idx}")
+
+        assert b'"A"' in db.path.read_bytes()
+        assert len(PatchDay(storage_path=tmp_path).schedules) == 7
+
+    def test_stale_log(self, tmp_path):
+        from patchday.main import PatchDay
+
+        app = PatchDay(storage_path=tmp_path, max_schedules=None)
+        app.schedules.create_schedules(
+            [{"delivery_method": DeliveryMethod.PILL, "expiration": "1d"}] * 3
+        )
+        app.schedules.create_schedule(DeliveryMethod.PILL, "1d", "A")
+        db = app.schedules.db
+        log = db.log_path.read_bytes()
+        app.schedules.remove_schedule("A")
+
+        # Left behind, e.g. by a crash right after writing the file whole.
+        db.log_path.write_bytes(log + b'{"id_key": "sched')
+        assert "A" not in PatchDay(storage_path=tmp_path).schedules
+
+    def test_partitions(self, app):
+        app.schedules.create_schedule(DeliveryMethod.PATCH, "1d", "A", quantity=2)
+        app.schedules.create_schedule(DeliveryMethod.PATCH, "1d", "B", quantity=3)
+        schedule_a, schedule_b = app.schedules["A"], app.schedules["B"]
+        schedule_a.take_next_hormone()
+        assert len(schedule_a.hormones) == 2
+        assert len(schedule_b.hormones) == 3
+        assert len(schedule_a.active_hormones) == 1
+        assert not schedule_b.active_hormones
+        assert {h.schedule_id for h in schedule_b.hormones} == {"B"}
+
+        schedule_b.take_next_hormone()
+        app.schedules.remove_schedule("A")
+        assert not schedule_a.db.path.exists()
+        assert schedule_b.db.path.is_file()
+
+    @pytest.fixture
+    def legacy_path(self, tmp_path):
+        from patchday.storage import PatchData
+
+        legacy = PatchData(path=tmp_path)
+        legacy.open("schedules").persist_raw(
+            [
+                {
+                    "delivery_method": "PATCH",
+                    "expiration_duration": 86400,
+                    "schedule_id": schedule_id,
+                    "quantity": quantity,
+                }
+                for schedule_id, quantity in (("A", 1), ("B", 2))
+            ]
+        )
+        legacy.open("patch").persist_raw(
+            [
+                {"expiration_duration": 86400, "hormone_id": 0},
+                {
+                    "expiration_duration": 86400,
+                    "hormone_id": 1,
+                    "date_applied": datetime.now().isoformat(),
+                },
+                {"expiration_duration": 86400, "hormone_id": 2},
+            ]
+        )
+        # No schedule uses gels.
+        legacy.open("gel").persist_raw([{"expiration_duration": 86400}])
+        return tmp_path
+
+    def test_migrate_legacy_hormones(self, legacy_path):
+        from patchday.main import PatchDay
+
+        app = PatchDay(storage_path=legacy_path)
+        assert [h.hormone_id for h in app.schedules["A"].hormones] == [1]
+        assert [h.hormone_id for h in app.schedules["B"].hormones] == [1, 0]
+        assert not (legacy_path / "patch.json").exists()
+        stored = app.schedules["A"].db.load_raw_list()
+        assert stored[0]["schedule_id"] == "A"
+
+        # Records no schedule took are kept.
+        kept = app._db.open("patch.migrated").load_raw_list()
+        assert [r["hormone_id"] for r in kept] == [2]
+        assert app._db.open("gel.migrated").load_raw_list() == [
+            {"expiration_duration": 86400}
+        ]
+        assert not (legacy_path / "gel.json").exists()
+
+    def test_migrate_before_summary(self, legacy_path):
+        from patchday.status import get_status
+
+        status = get_status(legacy_path, output_format="long")
+        assert "A: not taken yet" not in status
+        assert not (legacy_path / "patch.json").exists()
+
+    def test_read_only_legacy_hormones(self, legacy_path):
+        from patchday.main import PatchDay
+
+        replica = PatchDay(storage_path=legacy_path, read_only=True)
+        assert replica.summary.load()[0].next_expiration is not None
+        assert [h.hormone_id for h in replica.schedules["A"].hormones] == [1]
+        assert (legacy_path / "patch.json").is_file()
+        assert not (legacy_path / "hormones").exists()
+
+    def test_reads_do_not_write(self, app):
+        app.schedules.create_schedule(DeliveryMethod.PATCH, "1d", "A", quantity=2)
+        schedule = app.schedules["A"]
+        app.metrics.reset()
+        assert len(schedule.hormones) == 2
+        assert schedule.next_expired_hormone.hormone_id == 0
+        assert not schedule.db.path.exists()
+        assert schedule.db.key in app._db.pending_repairs
+        assert not any(op.startswith("persist") for _, op, _ in app.metrics)
+
+    def test_repair(self, app):
+        app.schedules.create_schedule(DeliveryMethod.PATCH, "1d", "A", quantity=2)
+        app.schedules.create_schedule(DeliveryMethod.PATCH, "1d", "B", quantity=2)
+        # Reading queues the repair.
+        assert len(app.schedules["A"].hormones) == 2
+        assert app.schedules.repair() == ["A"]
+        assert len(app.schedules["A"].db.load_raw_list()) == 2
+        assert not app._db.pending_repairs
+        assert app.schedules.repair() == []
+        assert app.schedules.repair(all_schedules=True) == ["B"]
+        assert app.schedules.repair(all_schedules=True) == []
+
+    def test_read_only(self, app, tmp_path):
+        from patchday.exceptions import ReadOnlyStorageError
+        from patchday.main import PatchDay
+
+        app.schedules.create_schedule(DeliveryMethod.PATCH, "1d", "A", quantity=2)
+        app.schedules["A"].take_next_hormone()
+        replica = PatchDay(storage_path=tmp_path, read_only=True)
+        assert len(replica.schedules["A"].active_hormones) == 1
+        assert len(replica.summary.load()) == 1
+        with pytest.raises(ReadOnlyStorageError):
+            replica.schedules["A"].take_next_hormone()
+
+        with pytest.raises(ReadOnlyStorageError):
+            replica.schedules.create_schedule(DeliveryMethod.PILL, "1d")
+
+    def test_take(self, app):
+        app.schedules.create_schedule(DeliveryMethod.PATCH, "1d", "A", quantity=4)
+        schedule = app.schedules["A"]
+        app.metrics.reset()
+        date = datetime(2024, 6, 10, 9)
+        applications = schedule.take([0, 2], date=date)
+        assert [a.hormone_id for a in applications] == [0, 2]
+        assert {a.date for a in applications} == {date}
+        assert [h.date_applied for h in schedule.hormones] == [date, None, date, None]
+        assert app.metrics[schedule.db.key, "persist_list"].calls == 1
+
+        # Defaults to the due ones.
+        assert [a.hormone_id for a in schedule.take()] == [0, 1, 2, 3]
+        assert schedule.get_due_hormones() == []
+
+        with pytest.raises(KeyError, match="No such hormone: 9"):
+            schedule.take([9])
+
+    def test_take_aware_date(self, app):
+        from zoneinfo import ZoneInfo
+
+        app.schedules.create_schedule(DeliveryMethod.PATCH, "1d", "A", quantity=2)
+        app.schedules.create_schedule(DeliveryMethod.PILL, "1d", "B")
+        date = datetime(2024, 6, 10, 9, tzinfo=ZoneInfo("UTC"))
+        local = date.astimezone().replace(tzinfo=None)
+        schedule = app.schedules["A"]
+        assert len(schedule.get_due_hormones(date)) == 2
+
+        schedule.take([0], date=date)
+        assert schedule.hormones[0].date_applied == local
+
+        taken = app.schedules.take_expired(["B"], date=date)
+        assert [a.date for a in taken["B"]] == [local]
+        assert app.schedules["B"].hormones[0].date_applied == local
+
+    def test_take_expired(self, app):
+        from patchday.exceptions import ScheduleNotExistsError
+
+        app.schedules.create_schedule(DeliveryMethod.PATCH, "1d", "A", quantity=2)
+        app.schedules.create_schedule(DeliveryMethod.PILL, "1d", "B")
+        app.schedules.create_schedule(DeliveryMethod.GEL, "1d", "C")
+        app.schedules["C"].take_next_hormone()
+        app.metrics.reset()
+
+        taken = app.schedules.take_expired()
+        assert {k: len(v) for k, v in taken.items()} == {"A": 2, "B": 1}
+        assert len({a.date for v in taken.values() for a in v}) == 1
+        for schedule_id in ("A", "B"):
+            key = app.schedules[schedule_id].db.key
+            assert app.metrics[key, "persist_list"].calls == 1
+
+        # One undoable operation.
+        assert app.journal.undo_entries[-1]["schedule_ids"] == ["A", "B"]
+        app.journal.undo()
+        assert app.schedules["A"].get_due_hormones()
+
+        later = datetime.now() + timedelta(days=2)
+        assert list(app.schedules.take_expired(["C"], date=later)) == ["C"]
+        with pytest.raises(ScheduleNotExistsError):
+            app.schedules.take_expired(["Nope"])
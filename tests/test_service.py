@@ -0,0 +1,122 @@
+import asyncio
+import json
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+from fastapi.testclient import TestClient
+
+from patchday import service
+from patchday.schedule import HormoneSchedule
+from patchday.storage import file_lock
+from patchday.types import DeliveryMethod
+
+
+@pytest.fixture
+def schedule_id():
+    return "A"
+
+
+@pytest.fixture
+def app(mocker, app):
+    app.schedules.create_schedule(DeliveryMethod.PILL, "1d", "B")
+    mocker.patch.object(service, "patchday", app)
+    mocker.patch.object(service, "schedule_responses", service.ScheduleResponses())
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return TestClient(service.app)
+
+
+def test_get_schedules(mocker, app, client):
+    dump = mocker.spy(HormoneSchedule, "model_dump_json")
+    response = client.get("/schedules")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    expected = [json.loads(s.model_dump_json()) for s in app.schedules]
+    assert response.json() == expected
+    assert dump.call_count == 2 + 2
+
+    # Nothing changed, so nothing is serialized again.
+    assert client.get("/schedules").content == response.content
+    assert dump.call_count == 4
+
+    # Only the changed schedule is.
+    app.schedules["A"].take_next_hormone()
+    response = client.get("/schedules")
+    assert dump.call_count == 5
+    assert response.json()[0]["hormones"][0]["date_applied"] is not None
+
+    app.schedules.remove_schedule("B")
+    assert [s["schedule_id"] for s in client.get("/schedules").json()] == ["A"]
+
+
+def test_take(app, client):
+    response = client.post("/schedules/A/take", json={"hormone_ids": [1]})
+    assert response.status_code == 200
+    assert [a["hormone_id"] for a in response.json()] == [1]
+
+    response = client.post("/take")
+    assert response.status_code == 200
+    taken = response.json()
+    assert {k: len(v) for k, v in taken.items()} == {"A": 1, "B": 1}
+    assert taken["A"][0]["date"] == taken["B"][0]["date"]
+
+    assert client.post("/take").json() == {}
+    response = client.post("/take", json={"date": "2100-01-01T09:00:00"})
+    assert response.json()["B"][0]["date"] == "2100-01-01T09:00:00"
+    assert client.post("/schedules/Nope/take").status_code == 404
+    assert (
+        client.post("/schedules/A/take", json={"hormone_ids": [9]}).status_code == 404
+    )
+    assert client.post("/take", json={"schedule_ids": ["Nope"]}).status_code == 404
+
+
+def test_take_with_time_zone(app, client):
+    utc = datetime(2100, 1, 1, 9, tzinfo=ZoneInfo("UTC"))
+    local = utc.astimezone().replace(tzinfo=None).isoformat()
+    response = client.post("/take", json={"date": "2100-01-01T09:00:00Z"})
+    assert response.status_code == 200
+    assert response.json()["B"][0]["date"] == local
+
+    # Compared with stored dates, which are naive local time.
+    response = client.post("/schedules/A/take", json={"date": "2100-01-02T09:00:00Z"})
+    assert response.status_code == 200
+    assert client.post("/take").status_code == 200
+
+
+def test_websocket_events(app, client):
+    with client.websocket_connect("/events/ws") as websocket:
+        app.schedules["A"].take_next_hormone()
+        assert websocket.receive_json()["event_type"] == "HORMONE_TAKEN"
+
+
+def test_websocket_idle_disconnect(mocker, app):
+    websocket = mocker.AsyncMock()
+    websocket.receive.return_value = {"type": "websocket.disconnect", "code": 1000}
+
+    # Returns without any event being published.
+    asyncio.run(asyncio.wait_for(service.websocket_events(websocket), timeout=5))
+    assert len(app.event_bus) == 0
+    assert not websocket.send_text.called
+
+
+def test_compact_history_in_one_process(mocker, app):
+    compact = mocker.patch.object(app.history, "compact")
+    mocker.patch.object(service.asyncio, "sleep", side_effect=asyncio.CancelledError)
+
+    # Another worker compacts.
+    with (
+        file_lock(app.history.compactor_lock_file),
+        pytest.raises(asyncio.CancelledError),
+    ):
+        asyncio.run(service.compact_history())
+
+    assert not compact.called
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(service.compact_history())
+
+    compact.assert_called_once()
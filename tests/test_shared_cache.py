@@ -0,0 +1,104 @@
+import multiprocessing
+
+import pytest
+
+from patchday.main import PatchDay
+from patchday.shared_cache import SharedCache
+from patchday.types import DeliveryMethod
+
+
+def load_schedules(path) -> tuple[list[str], int, int]:
+    # Runs in a worker process.
+    app = PatchDay(storage_path=path, shared_cache=True)
+    ids = [s.schedule_id for s in app.schedules]
+    cache = app._db.shared_cache
+    return ids, cache.hits, cache.misses
+
+
+@pytest.fixture
+def schedule_id():
+    return "A"
+
+
+@pytest.fixture
+def app(app, tmp_path):
+    return PatchDay(storage_path=tmp_path, shared_cache=True)
+
+
+def test_hit_and_invalidate(app, tmp_path):
+    cache = app._db.shared_cache
+    db = app.schedules.db
+    assert db.load_raw_list()[0]["schedule_id"] == "A"
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    # A new process finds it parsed already.
+    other = PatchDay(storage_path=tmp_path, shared_cache=True)
+    assert other.schedules.db.load_raw_list() == db.load_raw_list()
+    assert other._db.shared_cache.hits == 1
+
+    # Writing the file invalidates the entry.
+    other.schedules.create_schedule(DeliveryMethod.PILL, "1d", "B")
+    assert [r["schedule_id"] for r in db.load_raw_list()] == ["A", "B"]
+
+
+def test_corrupt_entry(app):
+    cache = app._db.shared_cache
+    app.schedules.db.load_raw_list()
+    (entry,) = cache.path.glob("*.bin")
+    entry.write_bytes(entry.read_bytes()[:30])
+    assert app.schedules.db.load_raw_list()[0]["schedule_id"] == "A"
+
+    entry.write_bytes(b"")
+    assert app.schedules.db.load_raw_list()[0]["schedule_id"] == "A"
+
+
+def test_not_backed_up(app):
+    app.schedules.db.load_raw_list()
+    snapshot = app.backups.snapshot()
+    assert not [key for key in snapshot.files if "cache" in key]
+
+
+def test_workers(app, tmp_path):
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(2) as pool:
+        # The first worker parses and caches; the next ones hit.
+        assert pool.apply(load_schedules, (tmp_path,)) == (["A"], 0, 1)
+        assert pool.apply(load_schedules, (tmp_path,)) == (["A"], 1, 0)
+
+        # A write from any process invalidates it for every worker.
+        app.schedules.remove_schedule("A")
+        app.schedules.create_schedule(DeliveryMethod.PILL, "1d", "B")
+        results = pool.starmap(load_schedules, [(tmp_path,)] * 2)
+
+    assert sorted(ids for ids, _, _ in results) == [["B"], ["B"]]
+    assert sum(hits for _, hits, _ in results) >= 1
+
+
+def test_clear(tmp_path):
+    cache = SharedCache(tmp_path)
+    cache.put("schedules", (0, 1, 2, 3), [{"a": 1}])
+    assert cache.get("schedules", (0, 1, 2, 3)) == [{"a": 1}]
+    assert cache.get("schedules", (0, 1, 2, 4)) is None
+
+    cache.clear()
+    assert cache.get("schedules", (0, 1, 2, 3)) is None
+
+
+def test_generation(app, tmp_path):
+    cache = app._db.shared_cache
+    other = PatchDay(storage_path=tmp_path, shared_cache=True)
+    db = app.schedules.db
+    assert db.load_raw_list()[0]["schedule_id"] == "A"
+    generation = cache.generation(db.key)
+
+    # Counted for every process sharing the cache.
+    other.schedules.create_schedule(DeliveryMethod.PILL, "1d", "B")
+    assert cache.generation(db.key) == generation + 1
+    assert app._db.generation(db.key) == other._db.generation(db.key)
+
+    # An entry stamped with an older generation is not used, even when the
+    # file looks the same.
+    stat = db.path.stat()
+    stamp = (generation, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    cache.put(db.key, stamp, [{"stale": True}])
+    assert [r["schedule_id"] for r in db.load_raw_list()] == ["A", "B"]
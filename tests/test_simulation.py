@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from patchday.simulation import YEAR, Adherence, Simulation
+from patchday.storage import MemoryPatchData
+from patchday.types import DeliveryMethod
+
+START = datetime(2024, 1, 1, 8)
+
+
+def test_on_time():
+    sim = Simulation(start=START)
+    schedule = sim.add_schedule(DeliveryMethod.PATCH, "3d12h", quantity=2)
+    result = sim.run(timedelta(weeks=4))
+
+    # Two patches up front, then one every 3.5 days each.
+    assert result.takes == 2 + 2 * 7
+    assert result.missed == 0
+    assert result.late == timedelta(0)
+    assert sim.clock.now() == START + timedelta(weeks=4)
+    next_due = schedule.next_expired_hormone.expiration_date
+    assert next_due == START + timedelta(weeks=4)
+
+    assert len(sim.app.history.query(schedule_id=schedule.schedule_id)) == 16
+
+
+def test_adherence():
+    adherence = Adherence(delay=timedelta(hours=2), miss_rate=0.2)
+    sim = Simulation(start=START, adherence=adherence, seed=1)
+    for _ in range(3):
+        sim.add_schedule(DeliveryMethod.PILL, "1d")
+
+    result = sim.run(timedelta(days=365))
+    assert 0 < result.missed < result.takes
+    assert result.mean_delay > timedelta(hours=2)
+    assert result.schedule_years == 3
+
+    again = Simulation(start=START, adherence=adherence, seed=1)
+    for _ in range(3):
+        again.add_schedule(DeliveryMethod.PILL, "1d")
+
+    assert again.run(timedelta(days=365))[:4] == result[:4]
+
+
+def test_watch():
+    sim = Simulation(
+        start=START, adherence=Adherence(delay=timedelta(hours=1)), watch=True
+    )
+    sim.add_schedule(DeliveryMethod.PILL, "1d")
+    result = sim.run(timedelta(days=10))
+    assert result.notifications == result.takes - 1
+
+
+def test_memory_storage():
+    patchdata = MemoryPatchData()
+    db = patchdata.open("things")
+    assert db.load_raw_list() == []
+    assert db.generation() == (0, None)
+
+    db.persist_raw([{"id": 1}])
+    assert db.load_raw_list() == [{"id": 1}]
+    assert db.generation()[0] == 1
+    assert not patchdata.path.exists()
+
+    db.delete()
+    assert db.modified() is None
+
+
+def test_throughput():
+    sim = Simulation(start=START, adherence=Adherence(delay=timedelta(hours=2)))
+    for _ in range(50):
+        sim.add_schedule(DeliveryMethod.PATCH, "3d12h", quantity=2)
+
+    result = sim.run(10 * YEAR)
+    assert result.schedule_years == 500
+    # Several thousand here; a large margin for slow machines.
+    assert result.schedule_years_per_second > 1000
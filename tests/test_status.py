@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+
+from patchday.status import get_most_urgent, get_status, parse_format
+from patchday.summary import ScheduleSummary
+from patchday.types import DeliveryMethod
+from tests.test_cli import get_import_times
+
+# Milliseconds `pday status` may spend once imported.
+LATENCY_BUDGET = 5
+
+
+@pytest.fixture
+def schedule_id():
+    return "First"
+
+
+@pytest.fixture
+def app(app):
+    app.schedules.create_schedule(DeliveryMethod.PILL, "1d", schedule_id="Second")
+    app.schedules["First"].take()
+    return app
+
+
+def create_summary(schedule_id, next_expiration) -> ScheduleSummary:
+    return ScheduleSummary(schedule_id, "PATCH", next_expiration, "patch")
+
+
+def test_get_most_urgent():
+    summaries = [create_summary("a", 200.0), create_summary("b", 100.0)]
+    assert get_most_urgent(summaries).schedule_id == "b"
+
+    # Not taken yet is the most urgent.
+    summaries.append(create_summary("c", None))
+    assert get_most_urgent(summaries).schedule_id == "c"
+    assert get_most_urgent([]) is None
+
+
+@pytest.mark.parametrize(
+    "args,expected",
+    [
+        ([], "short"),
+        (["--format=long"], "long"),
+        (["-f", "json"], "json"),
+        (["--help"], None),
+        (["--format=bad"], None),
+    ],
+)
+def test_parse_format(args, expected):
+    assert parse_format(args) == expected
+
+
+class TestGetStatus:
+    def test_short(self, app, tmp_path):
+        assert get_status(tmp_path) == "Second: not taken yet"
+
+    def test_long(self, app, tmp_path):
+        actual = get_status(tmp_path, output_format="long").splitlines()
+        assert actual[0] == "Second: not taken yet"
+        assert actual[1].startswith("First: ")
+
+    def test_latency(self, app, tmp_path):
+        get_status(tmp_path)
+        durations = []
+        for _ in range(20):
+            start = time.perf_counter()
+            get_status(tmp_path)
+            durations.append((time.perf_counter() - start) * 1000)
+
+        assert sorted(durations)[len(durations) // 2] < LATENCY_BUDGET
+
+
+def test_status_skips_heavy_imports(app, tmp_path):
+    code = (
+        "import sys; sys.argv = ['pday', 'status']; "
+        "from patchday.status import main; main()"
+    )
+    env = {**os.environ, "XDG_CONFIG_HOME": f"{tmp_path}"}
+    times = get_import_times(code, env=env)
+    assert not [m for m in ("click", "pydantic", "textual", "fastapi") if m in times]
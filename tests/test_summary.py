@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from patchday.summary import get_last_taken, get_next_expiration
+
+
+@pytest.fixture
+def schedule(app):
+    return app.schedules["My Schedule"]
+
+
+def test_get_next_expiration():
+    now = datetime.now().replace(microsecond=0)
+    hormones = [
+        {"date_applied": now.isoformat()},
+        {"date_applied": (now - timedelta(days=1)).isoformat()},
+    ]
+    assert get_next_expiration(hormones[:1], 2, 60) is None
+    actual = get_next_expiration(hormones, 2, 60)
+    assert actual == (now - timedelta(days=1)).timestamp() + 60
+
+
+def test_get_last_taken():
+    now = datetime.now().replace(microsecond=0)
+    hormones = [
+        {"date_applied": (now - timedelta(days=1)).isoformat()},
+        {"date_applied": now.isoformat()},
+        {"date_applied": None},
+    ]
+    assert get_last_taken(hormones[2:]) is None
+    assert get_last_taken(hormones) == now.timestamp()
+
+
+class TestSummary:
+    def test_create_schedule(self, app, schedule):
+        (summary,) = app.summary.load()
+        assert summary.schedule_id == "My Schedule"
+        assert summary.delivery_method == "PATCH"
+        assert summary.next_expiration is None
+
+    def test_take_next_hormone(self, app, schedule):
+        schedule.take_next_hormone()
+        schedule.take_next_hormone()
+        (summary,) = app.summary.load()
+        expected = schedule.next_expired_hormone.expiration_date
+        assert summary.next_expiration_date == expected
+        assert summary.last_taken_date == schedule.last_taken_hormone.date_applied
+
+    def test_rebuilds_older_rows(self, app, schedule):
+        schedule.take_next_hormone()
+        rows = app.summary.db.load_raw_list()
+        app.summary.db.persist_raw(
+            [{k: v for k, v in r.items() if k != "last_taken"} for r in rows]
+        )
+        app.summary._rows = None
+        (summary,) = app.summary.load()
+        assert summary.last_taken is not None
+
+    def test_remove_schedule(self, app, schedule):
+        app.schedules.remove_schedule("My Schedule")
+        assert app.summary.load() == []
+
+    def test_rebuilds_when_missing(self, app, schedule):
+        schedule.take_next_hormone()
+        expected = app.summary.load()
+        app.summary.db.path.unlink()
+        assert app.summary.load() == expected
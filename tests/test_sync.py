@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from patchday.main import PatchDay
+from patchday.sync import HybridLogicalClock, ServicePeer, resolve_conflict
+from patchday.types import DeliveryMethod
+
+
+@pytest.fixture
+def device_a(tmp_path):
+    return PatchDay(storage_path=tmp_path / "a")
+
+
+@pytest.fixture
+def device_b(tmp_path):
+    return PatchDay(storage_path=tmp_path / "b")
+
+
+def create_schedule(device: PatchDay):
+    device.schedules.create_schedule(
+        DeliveryMethod.PATCH, "3d12h", schedule_id="My Schedule", quantity=2
+    )
+
+
+class TestHybridLogicalClock:
+    def test_now_is_monotonic(self):
+        clock = HybridLogicalClock("a")
+        stamps = [clock.now() for _ in range(100)]
+        assert stamps == sorted(stamps)
+        assert len(set(stamps)) == 100
+
+    def test_update_moves_past_remote(self):
+        clock = HybridLogicalClock("a")
+        remote = HybridLogicalClock("b", last="999999999999999.000005.b").now()
+        assert clock.update(remote) > remote
+        assert clock.now() > remote
+
+
+def test_resolve_conflict_latest_date_applied_wins():
+    local = {"date_applied": "2025-01-02T00:00:00", "hlc": "2"}
+    remote = {"date_applied": "2025-01-01T00:00:00", "hlc": "3"}
+    assert resolve_conflict(local, remote) is local
+    assert resolve_conflict(remote, local) is local
+
+
+def test_resolve_conflict_compares_dates():
+    local = {"date_applied": "2025-01-01T10:00:00+00:00", "hlc": "2"}
+    remote = {"date_applied": "2025-01-01T11:30:00+02:00", "hlc": "3"}
+    assert resolve_conflict(local, remote) is local
+
+    never = {"date_applied": None, "hlc": "4"}
+    assert resolve_conflict(never, local) is local
+    assert resolve_conflict(local, never) is local
+
+
+class TestReplica:
+    def test_sync(self, device_a, device_b):
+        create_schedule(device_a)
+        device_a.schedules["My Schedule"].take_next_hormone()
+        assert device_a.replica.sync(device_b.replica) != (0, 0)
+
+        schedule = device_b.schedules["My Schedule"]
+        assert len(schedule.active_hormones) == 1
+
+        # Nothing new to exchange.
+        assert device_a.replica.sync(device_b.replica) == (0, 0)
+
+    def test_delta_only_contains_changes(self, device_a, device_b):
+        create_schedule(device_a)
+        device_a.schedules["My Schedule"].take_next_hormone()
+        device_a.replica.sync(device_b.replica)
+        since = device_a.replica.changes_since().clock
+        device_a.schedules["My Schedule"].take_next_hormone()
+
+        delta = device_a.replica.changes_since(since)
+        assert len(delta) == 1
+        assert delta.changes[0].record["date_applied"] is not None
+
+    def test_conflict_latest_date_applied_wins(self, device_a, device_b):
+        create_schedule(device_a)
+        device_a.replica.sync(device_b.replica)
+
+        earlier = datetime.now() - timedelta(hours=1)
+        hormone_a = device_a.schedules["My Schedule"].next_expired_hormone
+        hormone_b = device_b.schedules["My Schedule"].next_expired_hormone
+        hormone_a.date_applied = earlier
+        hormone_b.date_applied = earlier + timedelta(minutes=30)
+        device_a.schedules["My Schedule"].db.persist_list_object(
+            hormone_a, id_key="hormone_id"
+        )
+        device_b.schedules["My Schedule"].db.persist_list_object(
+            hormone_b, id_key="hormone_id"
+        )
+
+        device_a.replica.sync(device_b.replica)
+        for device in (device_a, device_b):
+            hormone = device.schedules["My Schedule"].last_taken_hormone
+            assert hormone.date_applied == hormone_b.date_applied
+
+    def test_delete(self, device_a, device_b):
+        create_schedule(device_a)
+        device_a.replica.sync(device_b.replica)
+        device_b.schedules.remove_schedule("My Schedule")
+
+        device_a.replica.sync(device_b.replica)
+        assert device_a.schedules.get("My Schedule") is None
+
+    def test_delta_only_reads_changed_keys(self, device_a):
+        create_schedule(device_a)
+        device_a.schedules.create_schedule(DeliveryMethod.PILL, "1d", "Other")
+        device_a.schedules["My Schedule"].take_next_hormone()
+        since = device_a.replica.changes_since().clock
+        device_a.schedules["Other"].take_next_hormone()
+
+        loads = device_a.metrics["hormones/My%20Schedule", "load_raw_list"]
+        calls = loads.calls
+        delta = device_a.replica.changes_since(since)
+        assert [c.key for c in delta.changes] == ["hormones/Other"]
+        assert loads.calls == calls
+
+    def test_processes_share_state(self, tmp_path, device_a, device_b):
+        create_schedule(device_a)
+        device_a.schedules.create_schedule(DeliveryMethod.PILL, "1d", "Other")
+        other_process = PatchDay(storage_path=tmp_path / "a")
+        assert other_process.replica.node_id == device_a.replica.node_id
+        device_a.replica.sync(device_b.replica)
+
+        # Each removal is logged, though neither process saw the other's.
+        other_process.schedules.remove_schedule("Other")
+        device_a.schedules.remove_schedule("My Schedule")
+        assert len(device_a.replica.changes_since().deletes) == 2
+
+        other_process.replica.sync(device_b.replica)
+        assert len(device_b.schedules) == 0
+
+
+def test_sync_with_service(mocker, device_a, device_b):
+    from fastapi.testclient import TestClient
+
+    from patchday import service
+
+    mocker.patch.object(service, "patchday", device_b)
+    create_schedule(device_a)
+
+    peer = ServicePeer(TestClient(service.app))
+    assert device_a.replica.sync(peer) != (0, 0)
+    assert device_b.schedules.get("My Schedule") is not None
+
+    # The first take stores both hormones.
+    device_b.schedules["My Schedule"].take_next_hormone()
+    assert device_a.replica.sync(peer) == (2, 0)
+    assert len(device_a.schedules["My Schedule"].active_hormones) == 1
@@ -0,0 +1,176 @@
+import json
+import os
+
+import pytest
+
+from patchday.tracing import (
+    TRACE_ENV,
+    ChromeTraceExporter,
+    OTLPJSONExporter,
+    Tracer,
+    set_tracer,
+    span,
+)
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+    def shutdown(self):
+        pass
+
+
+@pytest.fixture
+def exporter():
+    exporter = ListExporter()
+    previous = set_tracer(Tracer([exporter]))
+    yield exporter
+    set_tracer(previous)
+
+
+@pytest.fixture
+def schedule(app):
+    return app.schedules["My Schedule"]
+
+
+def test_noop():
+    previous = set_tracer(None)
+    try:
+        with span("anything") as noop:
+            noop.set_attribute("key", "value")
+    finally:
+        set_tracer(previous)
+
+
+def test_span(exporter):
+    with span("outer", size=1) as outer, span("inner"):
+        pass
+
+    with pytest.raises(ValueError), span("failing"):
+        raise ValueError("bad")
+
+    inner, finished_outer, failing = exporter.spans
+    assert finished_outer is outer
+    assert outer.attributes == {"size": 1}
+    assert inner.parent_id == outer.span_id
+    assert inner.trace_id == outer.trace_id
+    assert failing.trace_id != outer.trace_id
+    assert "bad" in failing.error
+
+
+def test_take_next_hormone(exporter, schedule):
+    exporter.spans.clear()
+    schedule.take_next_hormone()
+    names = [s.name for s in exporter.spans]
+    assert names[-1] == "schedule.take"
+    assert "storage.read" in names
+    assert "storage.validate" in names
+    assert "storage.write" in names
+
+    take = exporter.spans[-1]
+    assert take.attributes["schedule_id"] == "My Schedule"
+    assert all(s.trace_id == take.trace_id for s in exporter.spans)
+
+
+def test_chrome_exporter(tmp_path, schedule):
+    path = tmp_path / "trace.json"
+    tracer = Tracer([ChromeTraceExporter(path)])
+    previous = set_tracer(tracer)
+    try:
+        schedule.take_next_hormone()
+    finally:
+        set_tracer(previous)
+
+    tracer.shutdown()
+    events = json.loads(path.read_text())
+    take = next(e for e in events if e["name"] == "schedule.take")
+    assert take["ph"] == "X"
+    assert take["dur"] > 0
+    assert take["args"]["schedule_id"] == "My Schedule"
+
+
+def test_otlp_exporter(tmp_path):
+    path = tmp_path / "trace.json"
+    tracer = Tracer([OTLPJSONExporter(path)])
+    with tracer.span("outer", count=2, ok=True), tracer.span("inner"):
+        pass
+
+    tracer.shutdown()
+    (line,) = path.read_text().splitlines()
+    (resource,) = json.loads(line)["resourceSpans"]
+    inner, outer = resource["scopeSpans"][0]["spans"]
+    assert inner["parentSpanId"] == outer["spanId"]
+    assert inner["traceId"] == outer["traceId"]
+    assert len(outer["traceId"]) == 32
+    assert {"key": "count", "value": {"intValue": "2"}} in outer["attributes"]
+    assert {"key": "ok", "value": {"boolValue": True}} in outer["attributes"]
+
+
+def test_exporters_write_in_batches(tmp_path):
+    chrome = ChromeTraceExporter(tmp_path / "chrome.json", max_buffer=2)
+    otlp = OTLPJSONExporter(tmp_path / "otlp.jsonl", max_buffer=2)
+    tracer = Tracer([chrome, otlp])
+    for idx in range(5):
+        with tracer.span(f"span {idx}"):
+            pass
+
+    # Written before shutdown, and nothing more than a batch is held.
+    assert len(chrome._buffer) == len(otlp._buffer) == 1
+    assert len(otlp.path.read_text().splitlines()) == 2
+    # Chrome reads the array before it is closed, as after a crash.
+    assert json.loads(f"{chrome.path.read_text()}]")[-1]["name"] == "span 3"
+
+    tracer.shutdown()
+    tracer.shutdown()
+    assert [e["name"] for e in json.loads(chrome.path.read_text())] == [
+        f"span {idx}" for idx in range(5)
+    ]
+    assert len(otlp.path.read_text().splitlines()) == 3
+
+
+def test_exporter_flush_interval(tmp_path):
+    exporter = ChromeTraceExporter(tmp_path / "trace.json", flush_interval=0)
+    with Tracer([exporter]).span("span"):
+        pass
+
+    assert json.loads(f"{exporter.path.read_text()}]")[0]["name"] == "span"
+
+
+def test_from_env(monkeypatch, tmp_path):
+    monkeypatch.delenv(TRACE_ENV, raising=False)
+    assert Tracer.from_env() is None
+
+    monkeypatch.setenv(TRACE_ENV, f"chrome:{tmp_path / 'a.json'},otlp:{tmp_path}/b")
+    tracer = Tracer.from_env()
+    assert [type(e) for e in tracer.exporters] == [
+        ChromeTraceExporter,
+        OTLPJSONExporter,
+    ]
+
+    assert all(e.per_process for e in tracer.exporters)
+
+    monkeypatch.setenv(TRACE_ENV, "zipkin:foo")
+    with pytest.raises(ValueError):
+        Tracer.from_env()
+
+
+def test_exporter_per_process(monkeypatch, tmp_path):
+    exporter = ChromeTraceExporter(
+        tmp_path / "trace.json", flush_interval=0, per_process=True
+    )
+    tracer = Tracer([exporter])
+    for pid in (100, 200):
+        monkeypatch.setattr(os, "getpid", lambda pid=pid: pid)
+        with tracer.span(f"span {pid}"):
+            pass
+
+    tracer.shutdown()
+    # The second process started its own file instead of replacing the first,
+    # which stays open until its own process shuts down.
+    first = json.loads(f"{(tmp_path / 'trace.100.json').read_text()}]")
+    second = json.loads((tmp_path / "trace.200.json").read_text())
+    assert [e["name"] for e in first + second] == ["span 100", "span 200"]
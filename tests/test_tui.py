@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+
+from patchday.main import PatchDay
+from patchday.schedule import HormoneSchedule
+from patchday.tui import ROW_HEIGHT, TAKE_BUTTON, ScheduleList
+from patchday.tui import PatchDay as TUI
+from patchday.types import DeliveryMethod
+
+SCHEDULES = 500
+
+
+@pytest.fixture
+def app(mocker, tmp_path):
+    app = PatchDay(storage_path=tmp_path, max_schedules=None)
+    app.schedules.create_schedules(
+        [
+            {
+                "delivery_method": DeliveryMethod.PILL,
+                "expiration": "1d",
+                "schedule_id": f"Schedule {idx:03}",
+            }
+            for idx in range(SCHEDULES)
+        ]
+    )
+    mocker.patch("patchday.main.patchday", app)
+    return app
+
+
+def run(coroutine_function):
+    async def main():
+        tui = TUI()
+        async with tui.run_test(size=(80, 12)) as pilot:
+            await pilot.pause()
+            await coroutine_function(tui, pilot)
+
+    asyncio.run(main())
+
+
+def test_renders_visible_rows_only(mocker, app):
+    load_hormones = mocker.spy(HormoneSchedule, "_load_hormones")
+    rendered = set()
+    render_line = ScheduleList.render_line
+
+    def spy(self, y):
+        rendered.add(self.scroll_offset.y + y)
+        return render_line(self, y)
+
+    mocker.patch.object(ScheduleList, "render_line", spy)
+
+    async def check(tui, pilot):
+        schedules = tui.query_one(ScheduleList)
+        assert len(schedules.rows) == SCHEDULES
+        assert schedules.virtual_size.height == SCHEDULES * ROW_HEIGHT
+        assert max(rendered) < schedules.size.height
+
+    run(check)
+    assert not load_hormones.called
+
+
+def test_filter_and_take(app):
+    async def check(tui, pilot):
+        schedules = tui.query_one(ScheduleList)
+        tui.query_one("#filter").focus()
+        await pilot.press(*"042")
+        await pilot.pause()
+        assert [s.schedule_id for s in schedules.rows] == ["Schedule 042"]
+
+        await pilot.press("enter", "t")
+        await pilot.pause()
+        assert schedules.rows[0].next_expiration is not None
+        assert app.schedules["Schedule 042"].hormones[0].active
+
+        await pilot.press("u")
+        await pilot.pause()
+        assert schedules.rows[0].next_expiration is None
+
+    run(check)
+    assert not app.schedules["Schedule 042"].hormones[0].active
+
+
+def test_undo_redo(app):
+    async def check(tui, pilot):
+        schedules = tui.query_one(ScheduleList)
+        await pilot.press("t")
+        await pilot.pause()
+        taken = schedules.rows[0].next_expiration
+        assert taken is not None
+
+        await pilot.press("u")
+        await pilot.pause()
+        assert schedules.rows[0].next_expiration is None
+        assert not app.schedules["Schedule 000"].hormones[0].active
+
+        await pilot.press("r")
+        await pilot.pause()
+        assert schedules.rows[0].next_expiration == taken
+        assert app.schedules["Schedule 000"].hormones[0].active
+
+        # Nothing left to redo.
+        await pilot.press("r")
+        await pilot.pause()
+        assert app.journal.redo_entries == []
+
+    run(check)
+
+
+def test_scroll(app):
+    async def check(tui, pilot):
+        schedules = tui.query_one(ScheduleList)
+        for _ in range(30):
+            await pilot.press("down")
+
+        await pilot.pause()
+        assert schedules.cursor == 30
+        assert schedules.scroll_offset.y > 0
+
+    run(check)
+
+
+def test_click_take(app):
+    async def check(tui, pilot):
+        schedules = tui.query_one(ScheduleList)
+        width = schedules.scrollable_content_region.width
+
+        def get_lines(index):
+            return [
+                "".join(s.text for s in schedules.render_line(y)).rstrip()
+                for y in range(index * ROW_HEIGHT, (index + 1) * ROW_HEIGHT)
+            ]
+
+        title, status = get_lines(2)
+        assert title.endswith(TAKE_BUTTON.rstrip())
+        assert "Not yet taken!" in title
+
+        await pilot.click(ScheduleList, offset=(width - 2, 2 * ROW_HEIGHT))
+        await pilot.pause()
+        assert schedules.cursor == 2
+        assert schedules.rows[2].last_taken is not None
+        title, status = get_lines(2)
+        assert "Last taken: Just now" in title
+        assert status.strip() == "Next expiration: 23 hours from now"
+
+        # Clicking the rest of the row only moves the cursor.
+        await pilot.click(ScheduleList, offset=(width - 2, ROW_HEIGHT + 1))
+        await pilot.pause()
+        assert schedules.cursor == 1
+        assert schedules.rows[1].last_taken is None
+
+    run(check)
+    assert app.schedules["Schedule 002"].hormones[0].active
+    assert not app.schedules["Schedule 001"].hormones[0].active
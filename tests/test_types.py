@@ -1,7 +1,7 @@
 import pytest
 
 from patchday.date import DAY
-from patchday.types import ExpirationDuration
+from patchday.types import ExpirationDuration, validate_quantity
 
 
 class TestExpirationDuration:
@@ -26,3 +26,13 @@ class TestExpirationDuration:
         duration = ExpirationDuration(duration)
         actual = repr(duration)
         assert actual == expected
+
+
+def test_validate_quantity():
+    assert validate_quantity("3") == 3
+    assert validate_quantity(500, max_quantity=None) == 500
+    with pytest.raises(ValueError):
+        validate_quantity(11)
+
+    with pytest.raises(ValueError):
+        validate_quantity(-1, max_quantity=None)